@@ -0,0 +1,333 @@
+"""
+SmartHotel360 accessibility audit
+Evaluates a rule set in the page with one script call per page and caches findings by DOM content hash
+"""
+
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from selenium.webdriver.support.ui import WebDriverWait
+
+from json_state import load_json, sharded_path, updated_json
+
+
+DEFAULT_CACHE = os.path.join('.a11y-cache', 'audits.json')
+DEFAULT_REPORT = os.path.join('reports', 'accessibility.json')
+
+# Bump whenever AUDIT_SCRIPT changes so findings cached by an older rule set are discarded
+RULESET_VERSION = 1
+
+# Width and height in CSS pixels
+VIEWPORTS = {
+    'mobile': (375, 667),
+    'tablet': (768, 1024),
+    'desktop': (1366, 768),
+}
+
+IMPACTS = ('minor', 'moderate', 'serious', 'critical')
+
+RULES = {
+    'image-alt': 'critical',
+    'label': 'critical',
+    'button-name': 'critical',
+    'color-contrast': 'serious',
+    'tabindex-positive': 'serious',
+    'aria-hidden-focus': 'serious',
+    'focusable-role': 'moderate',
+    'heading-order': 'moderate',
+    'page-has-h1': 'moderate',
+    'label-placeholder-only': 'minor',
+}
+
+# Nodes kept per rule; the count still covers every violation
+MAX_NODES = 5
+
+DOM_NODE_COUNT_SCRIPT = "return document.readyState === 'complete' ? document.getElementsByTagName('*').length : -1;"
+
+# Returns {hash, cached} when arguments[0] already lists the page's hash, otherwise the findings too.
+# The hash covers the serialized DOM and the viewport, so a resize re-audits visibility and contrast.
+AUDIT_SCRIPT = """
+var known = arguments[0], maxNodes = arguments[1];
+
+function fnv(text, seed) {
+    var h = seed >>> 0;
+    for (var i = 0; i < text.length; i++) {
+        h ^= text.charCodeAt(i);
+        h = Math.imul(h, 16777619) >>> 0;
+    }
+    return ('0000000' + h.toString(16)).slice(-8);
+}
+var content = window.innerWidth + 'x' + window.innerHeight + '|' + document.documentElement.outerHTML;
+var hash = fnv(content, 2166136261) + fnv(content, 84696351);
+if (known.indexOf(hash) !== -1) { return {hash: hash, cached: true}; }
+
+var findings = {};
+function report(rule, el, detail) {
+    var f = findings[rule] || (findings[rule] = {rule: rule, count: 0, nodes: []});
+    f.count++;
+    if (f.nodes.length < maxNodes) {
+        f.nodes.push(detail ? {target: selector(el), detail: detail} : {target: selector(el)});
+    }
+}
+function short(el) {
+    var s = el.tagName.toLowerCase();
+    if (el.id) { return s + '#' + el.id; }
+    var cls = typeof el.className === 'string' ? el.className.trim().split(/\\s+/).filter(Boolean) : [];
+    return cls.length ? s + '.' + cls.slice(0, 2).join('.') : s;
+}
+function selector(el) {
+    var parent = el.parentElement;
+    return parent && parent !== document.body && !el.id ? short(parent) + ' > ' + short(el) : short(el);
+}
+function visible(el) {
+    if (!el.getClientRects().length) { return false; }
+    var style = getComputedStyle(el);
+    return style.visibility !== 'hidden' && style.display !== 'none' && style.opacity !== '0';
+}
+function text(el) { return (el.textContent || '').replace(/\\s+/g, ' ').trim(); }
+function name(el) {
+    var ids = el.getAttribute('aria-labelledby');
+    if (ids) {
+        var labelled = ids.split(/\\s+/).map(function (id) {
+            var ref = document.getElementById(id); return ref ? text(ref) : '';
+        }).join(' ').trim();
+        if (labelled) { return labelled; }
+    }
+    var label = (el.getAttribute('aria-label') || '').trim();
+    if (label) { return label; }
+    if (el.labels && el.labels.length) {
+        var fromLabels = Array.prototype.map.call(el.labels, text).join(' ').trim();
+        if (fromLabels) { return fromLabels; }
+    }
+    if (el.tagName === 'INPUT' && /^(button|submit|reset)$/i.test(el.type)) {
+        return (el.value || '').trim() || (el.title || '').trim();
+    }
+    if (el.tagName !== 'INPUT' && el.tagName !== 'SELECT' && el.tagName !== 'TEXTAREA') {
+        var content = text(el);
+        if (content) { return content; }
+        var img = el.querySelector('img[alt]:not([alt=""]), svg title');
+        if (img) { return (img.getAttribute('alt') || img.textContent || '').trim(); }
+    }
+    return (el.getAttribute('title') || '').trim();
+}
+
+var stats = {images: 0, inputs: 0, buttons: 0, headings: 0, focusable: 0, text_elements: 0};
+
+// Alt text
+document.querySelectorAll('img, [role="img"]').forEach(function (el) {
+    stats.images++;
+    if (el.tagName === 'IMG' ? !el.hasAttribute('alt') && !name(el) : !name(el)) { report('image-alt', el); }
+});
+
+// Label association; placeholders vanish on input, so they only count as a weak name
+document.querySelectorAll('input, select, textarea').forEach(function (el) {
+    if (/^(hidden|submit|button|reset|image)$/i.test(el.type)) { return; }
+    stats.inputs++;
+    if (name(el)) { return; }
+    if ((el.getAttribute('placeholder') || '').trim()) { report('label-placeholder-only', el); }
+    else { report('label', el); }
+});
+
+// Button names
+document.querySelectorAll('button, [role="button"], input[type="button"], input[type="submit"], input[type="reset"]')
+    .forEach(function (el) {
+        stats.buttons++;
+        if (!name(el)) { report('button-name', el); }
+    });
+
+// Contrast of visible elements owning text, against the first opaque background behind them
+function rgba(value) {
+    var m = /rgba?\\(([^)]+)\\)/.exec(value || '');
+    if (!m) { return null; }
+    var p = m[1].split(/[,\\s/]+/).filter(Boolean).map(parseFloat);
+    return [p[0], p[1], p[2], p.length > 3 ? p[3] : 1];
+}
+function blend(top, bottom) {
+    var a = top[3];
+    return [0, 1, 2].map(function (i) { return top[i] * a + bottom[i] * (1 - a); }).concat([1]);
+}
+function luminance(c) {
+    var l = c.slice(0, 3).map(function (v) {
+        v /= 255; return v <= 0.03928 ? v / 12.92 : Math.pow((v + 0.055) / 1.055, 2.4);
+    });
+    return 0.2126 * l[0] + 0.7152 * l[1] + 0.0722 * l[2];
+}
+function background(el) {
+    var layers = [];
+    for (var node = el; node && node.nodeType === 1; node = node.parentElement) {
+        var style = getComputedStyle(node);
+        if (style.backgroundImage && style.backgroundImage !== 'none') { return null; }
+        var bg = rgba(style.backgroundColor);
+        if (bg && bg[3] > 0) {
+            layers.push(bg);
+            if (bg[3] >= 1) { break; }
+        }
+    }
+    var color = [255, 255, 255, 1];
+    for (var i = layers.length - 1; i >= 0; i--) { color = blend(layers[i], color); }
+    return color;
+}
+var candidates = document.body ? document.body.getElementsByTagName('*') : [];
+for (var i = 0; i < candidates.length; i++) {
+    var el = candidates[i];
+    var ownsText = Array.prototype.some.call(el.childNodes, function (n) {
+        return n.nodeType === 3 && n.textContent.trim();
+    });
+    if (!ownsText || /^(SCRIPT|STYLE|NOSCRIPT|OPTION)$/.test(el.tagName) || !visible(el)) { continue; }
+    stats.text_elements++;
+    var style = getComputedStyle(el), bg = background(el), fg = rgba(style.color);
+    if (!bg || !fg) { continue; }
+    fg = blend(fg, bg);
+    var l1 = luminance(fg), l2 = luminance(bg);
+    var ratio = (Math.max(l1, l2) + 0.05) / (Math.min(l1, l2) + 0.05);
+    var size = parseFloat(style.fontSize), weight = parseInt(style.fontWeight, 10) || 400;
+    var required = size >= 24 || (size >= 18.66 && weight >= 700) ? 3 : 4.5;
+    if (ratio < required) {
+        report('color-contrast', el, ratio.toFixed(2) + ':1 < ' + required + ':1');
+    }
+}
+
+// Heading order: levels only ever step down one at a time
+var previous = 0, h1 = 0;
+document.querySelectorAll('h1, h2, h3, h4, h5, h6, [role="heading"][aria-level]').forEach(function (el) {
+    if (!visible(el)) { return; }
+    stats.headings++;
+    var level = parseInt(el.getAttribute('aria-level') || el.tagName.substring(1), 10);
+    if (level === 1) { h1++; }
+    if (previous && level > previous + 1) { report('heading-order', el, 'h' + previous + ' -> h' + level); }
+    previous = level;
+});
+if (!h1) { report('page-has-h1', document.documentElement); }
+
+// Focusable elements
+var focusableSelector = 'a[href], area[href], button, input, select, textarea, iframe, summary, [tabindex], [contenteditable="true"]';
+document.querySelectorAll(focusableSelector).forEach(function (el) {
+    if (el.disabled || el.getAttribute('tabindex') === '-1' || (el.type || '').toLowerCase() === 'hidden') { return; }
+    stats.focusable++;
+    if (parseInt(el.getAttribute('tabindex'), 10) > 0) {
+        report('tabindex-positive', el, 'tabindex=' + el.getAttribute('tabindex'));
+    }
+    if (el.closest('[aria-hidden="true"]') && visible(el)) { report('aria-hidden-focus', el); }
+});
+document.querySelectorAll('[role="button"], [role="link"], [role="tab"], [role="checkbox"], [role="menuitem"]')
+    .forEach(function (el) {
+        if (!el.matches(focusableSelector) && visible(el)) { report('focusable-role', el); }
+    });
+
+return {
+    hash: hash,
+    cached: false,
+    stats: stats,
+    findings: Object.keys(findings).map(function (k) { return findings[k]; })
+};
+"""
+
+
+def impact_rank(impact: str) -> int:
+    return IMPACTS.index(impact)
+
+
+def wait_for_dom_settled(driver, timeout: float = 15):
+    """Wait until the document loaded and the SPA stopped adding elements"""
+    counts = []
+
+    def settled(d):
+        counts.append(d.execute_script(DOM_NODE_COUNT_SCRIPT))
+        return len(counts) > 1 and counts[-1] > 0 and counts[-1] == counts[-2]
+
+    WebDriverWait(driver, timeout, poll_frequency=0.5).until(settled)
+
+
+class AccessibilityAuditor:
+    """Runs the in-page rule set and remembers findings per DOM content hash"""
+
+    def __init__(self, cache_path: Optional[str] = DEFAULT_CACHE):
+        self.cache_path = cache_path
+        self.pages: Dict[str, Dict] = {}
+        self.cache_hits = 0
+        cached = load_json(cache_path) if cache_path else {}
+        if cached.get('ruleset') == RULESET_VERSION:
+            self.pages = cached['pages']
+
+    def audit(self, driver) -> Dict:
+        """Findings for the page currently loaded, from the cache when its DOM is unchanged"""
+        start = time.perf_counter()
+        result = driver.execute_script(AUDIT_SCRIPT, list(self.pages), MAX_NODES)
+        if result['cached']:
+            self.cache_hits += 1
+            page = dict(self.pages[result['hash']])
+        else:
+            for finding in result['findings']:
+                finding['impact'] = RULES[finding['rule']]
+            result['findings'].sort(key=lambda f: (-impact_rank(f['impact']), f['rule']))
+            page = {'stats': result['stats'], 'findings': result['findings']}
+            self.pages[result['hash']] = page
+        return dict(page, hash=result['hash'], cached=result['cached'],
+                    audit_ms=round((time.perf_counter() - start) * 1000, 1))
+
+    def save(self):
+        if not self.cache_path:
+            return
+        with updated_json(self.cache_path) as stored:
+            # Another process may have audited other pages; findings of an older rule set are dropped
+            pages = stored.get('pages', {}) if stored.get('ruleset') == RULESET_VERSION else {}
+            pages.update(self.pages)
+            stored.update(ruleset=RULESET_VERSION, pages=pages)
+
+
+def audit_routes(driver, base_url: str, routes: List[str], viewports: Optional[Dict[str, Tuple[int, int]]] = None,
+                 auditor: Optional[AccessibilityAuditor] = None, report_path: str = DEFAULT_REPORT) -> Dict:
+    """Audit every route at every viewport and write the findings report"""
+    viewports = viewports or VIEWPORTS
+    auditor = auditor or AccessibilityAuditor()
+    original_size = driver.get_window_size()
+    results = []
+    try:
+        for viewport, (width, height) in viewports.items():
+            driver.set_window_size(width, height)
+            for route in routes:
+                driver.get(f"{base_url}{route}" if route != '/' else base_url)
+                wait_for_dom_settled(driver)
+                page = auditor.audit(driver)
+                results.append(dict(page, route=route, viewport=viewport))
+                counts = ', '.join(f"{f['rule']} x{f['count']}" for f in page['findings']) or 'no findings'
+                source = 'cached' if page['cached'] else f"{page['audit_ms']:.0f} ms"
+                print(f"ℹ {route} @ {viewport}: {counts} ({source})")
+    finally:
+        driver.set_window_size(original_size['width'], original_size['height'])
+        auditor.save()
+
+    totals = {}
+    for page in results:
+        for finding in page['findings']:
+            totals[finding['rule']] = totals.get(finding['rule'], 0) + finding['count']
+
+    report = {
+        'build': os.getenv('BUILD_NUMBER'),
+        'base_url': base_url,
+        'ruleset': RULESET_VERSION,
+        'viewports': {name: list(size) for name, size in viewports.items()},
+        'cache_hits': auditor.cache_hits,
+        'totals': totals,
+        'pages': results,
+    }
+    report_path = sharded_path(report_path)
+    os.makedirs(os.path.dirname(report_path) or '.', exist_ok=True)
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"✓ Accessibility audit of {len(results)} pages written to {report_path} "
+          f"({auditor.cache_hits} unchanged pages skipped)")
+    return report
+
+
+def findings_at_least(report: Dict, impact: str) -> List[str]:
+    """One line per finding whose impact is at or above the given level"""
+    threshold = impact_rank(impact)
+    return [
+        f"{page['route']} @ {page['viewport']}: {f['rule']} x{f['count']} "
+        f"({', '.join(n['target'] for n in f['nodes'])})"
+        for page in report['pages'] for f in page['findings']
+        if impact_rank(f['impact']) >= threshold
+    ]
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Results aggregator
+Builds a summary HTML page and JUnit XML from the streamed JSONL results. Only the bytes
+appended since the previous pass are parsed, so it can run while tests are still going
+and merge the files of sharded runs quickly.
+"""
+
+import argparse
+import glob
+import html
+import json
+import os
+import sys
+import time
+import xml.etree.ElementTree as ET
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+
+DEFAULT_INPUTS = [os.path.join('reports', 'results*.jsonl')]
+DEFAULT_HTML = os.path.join('reports', 'summary.html')
+DEFAULT_JUNIT = os.path.join('reports', 'summary-junit.xml')
+DEFAULT_STATE = os.path.join('reports', '.aggregate-state.json')
+
+# A rerun outcome only decides a record whose final attempt never reported; it is the failure it was
+FAILED = {'failed', 'error', 'rerun'}
+# Quarantined tests failed, but a known flake does not fail the run
+SKIPPED = {'skipped', 'xfailed', 'cached-pass', 'quarantined'}
+OUTCOME_ORDER = ['failed', 'error', 'rerun', 'quarantined', 'passed', 'cached-pass', 'skipped', 'xfailed', 'xpassed']
+
+
+def expand_inputs(inputs: List[str]) -> List[str]:
+    """Files, directories (their results*.jsonl) and glob patterns, deduplicated in order"""
+    paths = []
+    for entry in inputs:
+        if os.path.isdir(entry):
+            entry = os.path.join(entry, 'results*.jsonl')
+        for path in sorted(glob.glob(entry)) or ([entry] if os.path.isfile(entry) else []):
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+
+class Aggregator:
+    """Test records merged from many JSONL files, with the read offset of each file"""
+
+    def __init__(self, inputs: List[str], state_path: Optional[str] = DEFAULT_STATE):
+        self.inputs = sorted(inputs)
+        self.state_path = state_path
+        self.files: Dict[str, Dict] = {}
+        self.sessions: Dict[str, Dict] = {}
+        self.tests: Dict[str, Dict] = {}
+        self.new_lines = 0
+        self.load_state()
+
+    def load_state(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        # A different input set means a different merge; start over
+        if state.get('inputs') != self.inputs:
+            return
+        self.files, self.sessions, self.tests = state['files'], state['sessions'], state['tests']
+
+    def save_state(self):
+        if not self.state_path:
+            return
+        os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+        with open(self.state_path, 'w') as f:
+            json.dump({'inputs': self.inputs, 'files': self.files,
+                       'sessions': self.sessions, 'tests': self.tests}, f)
+
+    def forget(self, path: str):
+        self.tests = {key: test for key, test in self.tests.items() if test['source'] != path}
+        self.sessions = {key: session for key, session in self.sessions.items() if session['source'] != path}
+
+    def read(self, path: str):
+        stat = os.stat(path)
+        seen = self.files.get(path)
+        if seen and (seen['inode'] != stat.st_ino or stat.st_size < seen['offset']):
+            # The file was replaced or truncated by a new run
+            self.forget(path)
+            seen = None
+        offset = seen['offset'] if seen else 0
+        if stat.st_size > offset:
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                chunk = f.read()
+            # A writer may be halfway through a line; leave it for the next pass
+            complete = chunk[:chunk.rfind(b'\n') + 1]
+            for line in complete.splitlines():
+                if line.strip():
+                    self.add(json.loads(line), path)
+                    self.new_lines += 1
+            offset += len(complete)
+        self.files[path] = {'inode': stat.st_ino, 'offset': offset}
+
+    def add(self, record: Dict, source: str):
+        event = record.get('event')
+        if event == 'session':
+            self.sessions[source] = dict(record, source=source, status='running')
+        elif event == 'session_finish' and source in self.sessions:
+            self.sessions[source].update(status='finished', exitstatus=record['exitstatus'],
+                                         finished=record['finished'], duration=record['duration'])
+        elif event == 'test':
+            # Shards, workers and reruns are merged per browser and test; the latest result wins
+            key = f"{record.get('browser')}|{record['nodeid']}"
+            known = self.tests.get(key)
+            if known is None or record['finished'] >= known['finished']:
+                self.tests[key] = dict(record, source=source)
+
+    def update(self, paths: List[str]):
+        for path in list(self.files):
+            if path not in paths:
+                self.forget(path)
+                del self.files[path]
+        for path in paths:
+            self.read(path)
+
+    def running(self) -> bool:
+        return any(session['status'] == 'running' for session in self.sessions.values())
+
+    def counts(self) -> Dict[str, int]:
+        counts = defaultdict(int)
+        for test in self.tests.values():
+            counts[test['outcome']] += 1
+        return dict(counts)
+
+    def browsers(self) -> List[str]:
+        return sorted({test.get('browser') or '' for test in self.tests.values()})
+
+    def label(self, test: Dict) -> str:
+        """Node id, with the browser when several browsers ran"""
+        return f"{test['nodeid']} [{test.get('browser')}]" if len(self.browsers()) > 1 else test['nodeid']
+
+
+def browser_comparison(aggregator: Aggregator) -> Dict:
+    """Per-browser totals and the tests whose duration or result differs most between browsers"""
+    browsers = {}
+    for test in aggregator.tests.values():
+        row = browsers.setdefault(test.get('browser') or '', {
+            'tests': 0, 'failed': 0, 'test_seconds': 0.0, 'wall_seconds': 0.0})
+        row['tests'] += 1
+        row['failed'] += test['outcome'] in FAILED
+        row['test_seconds'] += test['duration']
+    for session in aggregator.sessions.values():
+        row = browsers.get(session.get('browser') or '')
+        if row is not None and session.get('duration') is not None:
+            # Workers of one browser run side by side; the slowest one is the browser's wall time
+            row['wall_seconds'] = max(row['wall_seconds'], session['duration'])
+
+    by_test = defaultdict(dict)
+    for test in aggregator.tests.values():
+        by_test[test['nodeid']][test.get('browser') or ''] = test
+    tests = []
+    for nodeid, per_browser in by_test.items():
+        if len(per_browser) < 2:
+            continue
+        durations = {browser: test['duration'] for browser, test in per_browser.items()}
+        slowest, fastest = max(durations, key=durations.get), min(durations, key=durations.get)
+        tests.append({
+            'nodeid': nodeid,
+            'durations': durations,
+            'outcomes': {browser: test['outcome'] for browser, test in per_browser.items()},
+            'slowest': slowest,
+            'gap_seconds': durations[slowest] - durations[fastest],
+            'ratio': durations[slowest] / max(durations[fastest], 0.001),
+        })
+    tests.sort(key=lambda t: -t['gap_seconds'])
+    return {'browsers': browsers, 'tests': tests}
+
+
+def junit_xml(aggregator: Aggregator) -> ET.ElementTree:
+    """One testsuite per test file (and browser, when several ran), in JUnit's failure/error/skipped vocabulary"""
+    matrix = len(aggregator.browsers()) > 1
+    by_file = defaultdict(list)
+    for test in aggregator.tests.values():
+        by_file[((test.get('browser') or '') if matrix else '', test['file'])].append(test)
+
+    root = ET.Element('testsuites')
+    for (browser, path), tests in sorted(by_file.items()):
+        module = path[:-3] if path.endswith('.py') else path
+        # CI tools group by the package part, so a matrix run shows one tree per browser
+        package = (f"{browser}." if browser else '') + module.replace('/', '.')
+        suite = ET.SubElement(root, 'testsuite', name=package, tests=str(len(tests)),
+                              time=f"{sum(t['duration'] for t in tests):.3f}")
+        counts = defaultdict(int)
+        for test in sorted(tests, key=lambda t: t['nodeid']):
+            classname = package + (f".{test['class']}" if test.get('class') else '')
+            case = ET.SubElement(suite, 'testcase', classname=classname, name=test['name'],
+                                 time=f"{test['duration']:.3f}")
+            if test.get('browser'):
+                properties = ET.SubElement(case, 'properties')
+                ET.SubElement(properties, 'property', name='browser', value=test['browser'])
+            outcome = test['outcome']
+            if outcome in FAILED:
+                tag = 'failure' if outcome != 'error' and test.get('failed_phase') == 'call' else 'error'
+                counts['failures' if tag == 'failure' else 'errors'] += 1
+                element = ET.SubElement(case, tag, message=f"{outcome} in {test.get('failed_phase')}")
+                element.text = test.get('longrepr', '')
+            elif outcome == 'quarantined':
+                counts['skipped'] += 1
+                # The message carries the flake score, the body the failure that was let through
+                element = ET.SubElement(case, 'skipped', message=test.get('reason') or outcome)
+                element.text = test.get('longrepr', '')
+            elif outcome in SKIPPED:
+                counts['skipped'] += 1
+                ET.SubElement(case, 'skipped', message=outcome + (
+                    f": {test['longrepr']}" if test.get('longrepr') else ''))
+            printed = [line for category in ('errors', 'warnings', 'checks', 'info') for line in test.get(category, [])]
+            if printed:
+                ET.SubElement(case, 'system-out').text = '\n'.join(printed)
+        for name in ('failures', 'errors', 'skipped'):
+            suite.set(name, str(counts[name]))
+    ET.indent(root)
+    return ET.ElementTree(root)
+
+
+def summary_html(aggregator: Aggregator, refresh: Optional[int] = None) -> str:
+    """A small static page: totals, per-file results, failures, warnings and the slowest tests"""
+    e = html.escape
+    tests = sorted(aggregator.tests.values(), key=lambda t: t['nodeid'])
+    counts = aggregator.counts()
+    outcomes = [o for o in OUTCOME_ORDER if o in counts] + sorted(set(counts) - set(OUTCOME_ORDER))
+    running = aggregator.running()
+
+    parts = ['<!DOCTYPE html><html><head><meta charset="utf-8"><title>Test summary</title>']
+    if running and refresh:
+        parts.append(f'<meta http-equiv="refresh" content="{refresh}">')
+    parts.append('<style>body{font-family:sans-serif;margin:2em}table{border-collapse:collapse;margin-bottom:1.5em}'
+                 'td,th{border:1px solid #ccc;padding:4px 8px;text-align:left}.failed,.error{color:#b00}'
+                 '.passed,.cached-pass{color:#070}.rerun,.quarantined{color:#a60}pre{white-space:pre-wrap;background:#f6f6f6;padding:8px}</style>'
+                 '</head><body>')
+    parts.append(f"<h1>Test summary{' (run in progress)' if running else ''}</h1>")
+    parts.append(f"<p>{len(tests)} tests from {len(aggregator.files)} files, generated "
+                 f"{time.strftime('%Y-%m-%d %H:%M:%S')}</p>")
+    parts.append('<table><tr>' + ''.join(f'<th class="{e(o)}">{e(o)}</th>' for o in outcomes) + '</tr><tr>'
+                 + ''.join(f'<td>{counts[o]}</td>' for o in outcomes) + '</tr></table>')
+
+    parts.append('<h2>Runs</h2><table><tr><th>Run</th><th>Shard</th><th>Worker</th><th>Host</th>'
+                 '<th>Browser</th><th>Build</th><th>Status</th><th>Duration</th></tr>')
+    for session in sorted(aggregator.sessions.values(), key=lambda s: (s['run_id'], s.get('worker') or '')):
+        duration = f"{session['duration']:.0f}s" if session.get('duration') is not None else ''
+        parts.append('<tr>' + ''.join(f'<td>{e(str(v or ""))}</td>' for v in (
+            session['run_id'], session.get('shard'), session.get('worker'), session.get('host'),
+            session.get('browser'), session.get('build'), session['status'], duration)) + '</tr>')
+    parts.append('</table>')
+
+    by_file = defaultdict(lambda: defaultdict(int))
+    for test in tests:
+        by_file[test['file']][test['outcome']] += 1
+        by_file[test['file']]['_duration'] += test['duration']
+    parts.append('<h2>Files</h2><table><tr><th>File</th>' + ''.join(f'<th>{e(o)}</th>' for o in outcomes)
+                 + '<th>Duration</th></tr>')
+    for path, row in sorted(by_file.items()):
+        parts.append(f'<tr><td>{e(path)}</td>' + ''.join(f'<td>{row[o] or ""}</td>' for o in outcomes)
+                     + f"<td>{row['_duration']:.1f}s</td></tr>")
+    parts.append('</table>')
+
+    if len(aggregator.browsers()) > 1:
+        comparison = browser_comparison(aggregator)
+        browsers = sorted(comparison['browsers'])
+        parts.append('<h2>Browsers</h2><table><tr><th>Browser</th><th>Tests</th><th>Failed</th>'
+                     '<th>Test time</th><th>Wall time</th></tr>')
+        for browser in browsers:
+            row = comparison['browsers'][browser]
+            parts.append(f'<tr><td>{e(browser)}</td><td>{row["tests"]}</td><td>{row["failed"] or ""}</td>'
+                         f'<td>{row["test_seconds"]:.1f}s</td><td>{row["wall_seconds"]:.0f}s</td></tr>')
+        parts.append('</table>')
+        differing = [t for t in comparison['tests'] if len(set(t['outcomes'].values())) > 1]
+        if differing:
+            parts.append(f'<h2>Different results across browsers ({len(differing)})</h2><ul>')
+            parts.extend(f'<li>{e(t["nodeid"])}: ' + ', '.join(
+                f'<span class="{e(o)}">{e(b)} {e(o)}</span>' for b, o in sorted(t['outcomes'].items())) + '</li>'
+                for t in differing)
+            parts.append('</ul>')
+        parts.append('<h2>Largest timing differences</h2><table><tr><th>Test</th>'
+                     + ''.join(f'<th>{e(b)}</th>' for b in browsers) + '<th>Slowest</th></tr>')
+        for test in comparison['tests'][:20]:
+            parts.append(f'<tr><td>{e(test["nodeid"])}</td>' + ''.join(
+                f'<td>{test["durations"][b]:.2f}s</td>' if b in test['durations'] else '<td></td>' for b in browsers)
+                + f'<td>{e(test["slowest"])} ({test["ratio"]:.1f}x)</td></tr>')
+        parts.append('</table>')
+
+    failures = [t for t in tests if t['outcome'] in FAILED]
+    if failures:
+        parts.append(f'<h2>Failures ({len(failures)})</h2>')
+        for test in failures:
+            parts.append(f'<details><summary class="{e(test["outcome"])}">{e(aggregator.label(test))} '
+                         f'({e(test["outcome"])} in {e(str(test.get("failed_phase")))})</summary>'
+                         f'<pre>{e(test.get("longrepr", ""))}</pre></details>')
+
+    quarantined = [t for t in tests if t['outcome'] == 'quarantined']
+    if quarantined:
+        parts.append(f'<h2>Quarantined ({len(quarantined)})</h2>')
+        for test in quarantined:
+            parts.append(f'<details><summary class="quarantined">{e(aggregator.label(test))} '
+                         f'({e(test.get("reason") or "quarantined")})</summary>'
+                         f'<pre>{e(test.get("longrepr", ""))}</pre></details>')
+
+    flaky = [t for t in tests if t.get('attempts', 1) > 1 and t['outcome'] not in FAILED]
+    if flaky:
+        parts.append(f'<h2>Passed on rerun ({len(flaky)})</h2><ul>')
+        parts.extend(f'<li>{e(aggregator.label(t))} ({t["attempts"]} attempts)</li>' for t in flaky)
+        parts.append('</ul>')
+
+    warned = [t for t in tests if t.get('warnings') or t.get('errors') or t.get('pytest_warnings')]
+    if warned:
+        parts.append(f'<h2>Warnings ({len(warned)} tests)</h2>')
+        for test in warned:
+            lines = test.get('errors', []) + test.get('warnings', []) + test.get('pytest_warnings', [])
+            parts.append(f'<details><summary>{e(aggregator.label(test))} ({len(lines)})</summary>'
+                         f'<pre>{e(chr(10).join(lines))}</pre></details>')
+
+    parts.append('<h2>Slowest tests</h2><table><tr><th>Test</th><th>Outcome</th><th>Duration</th>'
+                 '<th>Largest phase</th></tr>')
+    for test in sorted(tests, key=lambda t: -t['duration'])[:20]:
+        breakdown = test.get('breakdown') or {}
+        largest = max(breakdown, key=breakdown.get) if breakdown else ''
+        parts.append(f'<tr><td>{e(aggregator.label(test))}</td><td class="{e(test["outcome"])}">{e(test["outcome"])}</td>'
+                     f'<td>{test["duration"]:.2f}s</td>'
+                     f'<td>{e(largest)}{f" {breakdown[largest]:.2f}s" if largest else ""}</td></tr>')
+    parts.append('</table></body></html>')
+    return '\n'.join(parts)
+
+
+def aggregate(inputs: List[str] = None, html_path: Optional[str] = DEFAULT_HTML,
+              junit_path: Optional[str] = DEFAULT_JUNIT, state_path: Optional[str] = DEFAULT_STATE,
+              refresh: Optional[int] = None) -> Aggregator:
+    """Read what was appended since the last pass and rewrite the summary HTML and JUnit XML"""
+    started = time.perf_counter()
+    paths = expand_inputs(inputs or DEFAULT_INPUTS)
+    aggregator = Aggregator(paths, state_path)
+    aggregator.update(paths)
+    if html_path:
+        os.makedirs(os.path.dirname(html_path) or '.', exist_ok=True)
+        with open(html_path, 'w', encoding='utf-8') as f:
+            f.write(summary_html(aggregator, refresh))
+    if junit_path:
+        os.makedirs(os.path.dirname(junit_path) or '.', exist_ok=True)
+        junit_xml(aggregator).write(junit_path, encoding='utf-8', xml_declaration=True)
+    aggregator.save_state()
+    counts = aggregator.counts()
+    if len(aggregator.browsers()) > 1:
+        comparison = browser_comparison(aggregator)
+        for browser, row in sorted(comparison['browsers'].items()):
+            print(f"  {browser:<10} {row['tests']:>4} tests  {row['failed']:>3} failed  "
+                  f"{row['test_seconds']:8.1f}s test time  {row['wall_seconds']:6.0f}s wall")
+        for test in [t for t in comparison['tests'] if t['gap_seconds'] >= 1][:5]:
+            print(f"  {test['slowest']} {test['ratio']:.1f}x slower: {test['nodeid']} (" + ', '.join(
+                f"{browser} {seconds:.1f}s" for browser, seconds in sorted(test['durations'].items())) + ')')
+    print(f"✓ Aggregated {len(aggregator.tests)} tests from {len(paths)} files "
+          f"({aggregator.new_lines} new lines) in {(time.perf_counter() - started) * 1000:.0f} ms: "
+          + ', '.join(f"{counts[o]} {o}" for o in sorted(counts, key=lambda o: -counts[o])))
+    return aggregator
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Build a summary HTML page and JUnit XML from streamed JSONL test results',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Summarize the current or last run
+  python aggregate_results.py
+
+  # Keep the summary current while a long run is going
+  python aggregate_results.py --watch 10
+
+  # Merge the results of sharded runs copied into one place
+  python aggregate_results.py shard-1/reports shard-2/reports --junit reports/junit-merged.xml
+        """
+    )
+    parser.add_argument('inputs', nargs='*', default=DEFAULT_INPUTS,
+                        help='JSONL files, directories or glob patterns (default: reports/results*.jsonl)')
+    parser.add_argument('--html', default=DEFAULT_HTML, help='Summary HTML page to write')
+    parser.add_argument('--junit', default=DEFAULT_JUNIT, help='JUnit XML file to write')
+    parser.add_argument('--state', default=DEFAULT_STATE,
+                        help='Read offsets and merged results from the previous pass')
+    parser.add_argument('--full', action='store_true', help='Ignore the previous pass and read every file again')
+    parser.add_argument('--watch', type=int, metavar='SECONDS',
+                        help='Re-aggregate every SECONDS until every run in the inputs finished')
+    args = parser.parse_args()
+
+    if args.full and os.path.exists(args.state):
+        os.remove(args.state)
+    aggregator = aggregate(args.inputs, args.html, args.junit, args.state, refresh=args.watch)
+    while args.watch and (aggregator.running() or not aggregator.sessions):
+        time.sleep(args.watch)
+        aggregator = aggregate(args.inputs, args.html, args.junit, args.state, refresh=args.watch)
+    return 1 if any(outcome in FAILED for outcome in aggregator.counts()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
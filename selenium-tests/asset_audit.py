@@ -0,0 +1,373 @@
+"""
+SmartHotel360 Static Asset Auditor
+Measures weight, compression and caching of the SPA bundle over plain HTTP
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+from urllib.parse import urljoin, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import brotli
+except ImportError:  # brotli sizes are reported as None without it
+    brotli = None
+
+
+AUDIT_ROUTES = ['/', '/Pets', '/SearchRooms', '/RoomDetail/1']
+
+ASSET_EXTENSIONS = {
+    'script': ('.js',),
+    'stylesheet': ('.css',),
+    'font': ('.woff', '.woff2', '.ttf', '.eot', '.otf'),
+    'image': ('.png', '.jpg', '.jpeg', '.gif', '.svg', '.ico', '.webp'),
+}
+
+# Asset paths referenced from CSS url(...) and string literals inside bundles
+CSS_URL_PATTERN = re.compile(r'url\(\s*[\'"]?([^\'")]+)[\'"]?\s*\)')
+BUNDLE_ASSET_PATTERN = re.compile(
+    r'["\'](/?(?:assets|static|lib)/[^"\'\s]+\.(?:png|jpe?g|gif|svg|ico|webp|woff2?|ttf|eot|otf|css|js))["\']'
+)
+SOURCE_MAP_PATTERN = re.compile(r'[#@]\s*sourceMappingURL=(\S+)')
+NODE_MODULE_PATTERN = re.compile(r'((?:node_modules/(?:@[^/]+/)?[^/]+/)+)')
+
+# Strips webpack content hashes so main.1a2b3c4d.js diffs against main.5e6f7a8b.js
+CONTENT_HASH_PATTERN = re.compile(r'\.[0-9a-f]{8,}(?=\.)')
+
+DEFAULT_BASELINE = os.path.join('.asset-audit', 'last-build.json')
+DEFAULT_REPORT = os.path.join('reports', 'asset-audit.json')
+
+
+class AssetReferenceParser(HTMLParser):
+    """Collects script, stylesheet, icon and image references from the HTML shell"""
+
+    def __init__(self):
+        super().__init__()
+        self.base_href = None
+        self.references = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'base' and attrs.get('href'):
+            self.base_href = attrs['href']
+        elif tag == 'script' and attrs.get('src'):
+            self.references.append(attrs['src'])
+        elif tag == 'link' and attrs.get('href'):
+            rel = (attrs.get('rel') or '').lower()
+            if any(kind in rel for kind in ('stylesheet', 'icon', 'preload', 'prefetch')):
+                self.references.append(attrs['href'])
+        elif tag in ('img', 'source') and (attrs.get('src') or attrs.get('srcset')):
+            for candidate in (attrs.get('srcset') or attrs['src']).split(','):
+                self.references.append(candidate.strip().split(' ')[0])
+
+
+def classify(url: str) -> Optional[str]:
+    """Return the asset kind for a URL based on its extension"""
+    path = urlparse(url).path.lower()
+    for kind, extensions in ASSET_EXTENSIONS.items():
+        if path.endswith(extensions):
+            return kind
+    return None
+
+
+def stable_name(url: str) -> str:
+    """Asset path with build content hashes removed, used as the diff key"""
+    return CONTENT_HASH_PATTERN.sub('', urlparse(url).path)
+
+
+def create_session(pool_size: int) -> requests.Session:
+    """HTTP session with a connection pool sized for the worker count"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    # Without the brotli module a br body could not be measured
+    session.headers['Accept-Encoding'] = 'gzip, deflate, br' if brotli is not None else 'gzip, deflate'
+    return session
+
+
+# Corrupt or truncated bodies raise these from the decompressors
+DECODE_ERRORS = (OSError, EOFError, zlib.error) + ((brotli.error,) if brotli is not None else ())
+
+
+def decode_body(wire_body: bytes, encoding: str) -> Optional[bytes]:
+    """Body as the browser sees it; None for brotli when the brotli module is missing"""
+    if encoding == 'gzip':
+        return gzip.decompress(wire_body)
+    if encoding == 'deflate':
+        # The spec says zlib-wrapped, but many servers send raw deflate
+        try:
+            return zlib.decompress(wire_body)
+        except zlib.error:
+            return zlib.decompress(wire_body, -15)
+    if encoding == 'br':
+        return brotli.decompress(wire_body) if brotli is not None else None
+    return wire_body
+
+
+def fetch_asset(session: requests.Session, url: str) -> Dict:
+    """Fetch one asset and measure its raw, wire and recompressed sizes"""
+    start = time.time()
+    try:
+        response = session.get(url, timeout=30, stream=True)
+        wire_body = response.raw.read(decode_content=False)
+    except requests.exceptions.RequestException as e:
+        return {'url': url, 'error': str(e)}
+
+    encoding = response.headers.get('Content-Encoding', 'identity')
+    try:
+        body = decode_body(wire_body, encoding)
+    except DECODE_ERRORS as e:
+        return {'url': url, 'error': f"could not decode {encoding} body ({len(wire_body)} B): {e}"}
+
+    asset = {
+        'url': url,
+        'name': stable_name(url),
+        'kind': classify(url),
+        'status': response.status_code,
+        'elapsed_ms': round((time.time() - start) * 1000, 1),
+        'raw_bytes': None,
+        'transfer_bytes': len(wire_body),
+        'gzip_bytes': None,
+        'brotli_bytes': None,
+        'content_encoding': encoding,
+        'cache_control': response.headers.get('Cache-Control'),
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        # Still tells identical files apart when the body could not be decoded
+        'sha256': hashlib.sha256(wire_body if body is None else body).hexdigest(),
+    }
+    if body is not None:
+        asset.update({
+            'raw_bytes': len(body),
+            'gzip_bytes': len(gzip.compress(body, compresslevel=9)),
+            'brotli_bytes': len(brotli.compress(body)) if brotli is not None else None,
+            'body': body,
+        })
+    return asset
+
+
+def discover_shell_assets(session: requests.Session, base_url: str, routes: List[str]) -> List[str]:
+    """Collect asset URLs referenced by the HTML shell of every route"""
+    urls = []
+    for route in routes:
+        page_url = base_url.rstrip('/') + route
+        try:
+            response = session.get(page_url, timeout=30)
+        except requests.exceptions.RequestException as e:
+            print(f"⚠ Could not fetch {page_url}: {e}")
+            continue
+
+        parser = AssetReferenceParser()
+        parser.feed(response.text)
+        page_base = urljoin(page_url, parser.base_href) if parser.base_href else page_url
+        for reference in parser.references:
+            url = urljoin(page_base, reference)
+            if classify(url) and url not in urls:
+                urls.append(url)
+    return urls
+
+
+def nested_references(asset: Dict) -> List[str]:
+    """Asset URLs referenced from inside a stylesheet or script"""
+    if asset.get('kind') not in ('stylesheet', 'script') or 'body' not in asset:
+        return []
+    text = asset['body'].decode('utf-8', errors='replace')
+    pattern = CSS_URL_PATTERN if asset['kind'] == 'stylesheet' else BUNDLE_ASSET_PATTERN
+    urls = []
+    for reference in pattern.findall(text):
+        if reference.startswith('data:'):
+            continue
+        url = urljoin(asset['url'], reference.split('#')[0].split('?')[0])
+        if classify(url):
+            urls.append(url)
+    return urls
+
+
+def find_duplicate_modules(session: requests.Session, assets: List[Dict]) -> Dict:
+    """Report identical files served under different URLs and npm packages bundled more than once"""
+    by_hash = {}
+    for asset in assets:
+        if 'sha256' in asset:
+            by_hash.setdefault(asset['sha256'], []).append(asset['url'])
+    identical = [urls for urls in by_hash.values() if len(urls) > 1]
+
+    # Source maps list every bundled module; a package that shows up under more than
+    # one node_modules path was bundled twice (e.g. two versions of the same library)
+    package_paths = {}
+    for asset in assets:
+        if asset.get('kind') != 'script' or 'body' not in asset:
+            continue
+        match = SOURCE_MAP_PATTERN.search(asset['body'][-512:].decode('utf-8', errors='replace'))
+        if not match or match.group(1).startswith('data:'):
+            continue
+        try:
+            source_map = session.get(urljoin(asset['url'], match.group(1)), timeout=30).json()
+        except (requests.exceptions.RequestException, ValueError):
+            continue
+        for source in source_map.get('sources', []):
+            found = NODE_MODULE_PATTERN.search(source)
+            if not found:
+                continue
+            path = found.group(1)
+            package = path.rstrip('/').split('node_modules/')[-1]
+            package_paths.setdefault(package, set()).add(path)
+
+    packages = {package: sorted(paths) for package, paths in package_paths.items() if len(paths) > 1}
+    return {'identical_files': identical, 'packages': packages}
+
+
+def diff_against_baseline(assets: List[Dict], baseline: Optional[Dict]) -> Dict:
+    """Per-asset and per-kind size changes against the previous build"""
+    if not baseline:
+        return {}
+
+    def measured(entries):
+        # Fetch errors have no name; undecoded bodies have no raw size
+        return {a['name']: a['raw_bytes'] for a in entries if a.get('name') and a.get('raw_bytes') is not None}
+
+    previous, current = measured(baseline.get('assets', [])), measured(assets)
+    unmeasured = {a['name'] for a in baseline.get('assets', []) + assets
+                  if a.get('name') and a.get('raw_bytes') is None}
+    changes = []
+    for name in sorted((set(previous) | set(current)) - unmeasured):
+        before = previous.get(name, 0)
+        after = current.get(name, 0)
+        if before != after:
+            changes.append({'name': name, 'before': before, 'after': after, 'delta': after - before})
+
+    totals = {}
+    for kind in ASSET_EXTENSIONS:
+        before = baseline.get('totals', {}).get(kind, {}).get('raw_bytes', 0)
+        after = sum(a['raw_bytes'] for a in assets if a.get('kind') == kind and a.get('raw_bytes') is not None)
+        totals[kind] = {
+            'before': before,
+            'after': after,
+            'delta': after - before,
+            'percent': round((after - before) * 100.0 / before, 1) if before else None,
+        }
+    return {'baseline_build': baseline.get('build'), 'assets': changes, 'totals': totals}
+
+
+def audit_assets(base_url: str, routes: Optional[List[str]] = None, workers: int = 8,
+                 baseline_path: str = DEFAULT_BASELINE, report_path: str = DEFAULT_REPORT) -> Dict:
+    """Discover, fetch and measure every asset the SPA references, then diff against the last build"""
+    routes = routes or AUDIT_ROUTES
+    session = create_session(workers)
+    print(f"Auditing static assets at {base_url} ({len(routes)} routes, {workers} workers)")
+
+    pending = discover_shell_assets(session, base_url, routes)
+    seen = set(pending)
+    assets = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while pending:
+            fetched = list(executor.map(lambda url: fetch_asset(session, url), pending))
+            assets.extend(fetched)
+            pending = []
+            for asset in fetched:
+                for url in nested_references(asset):
+                    if url not in seen:
+                        seen.add(url)
+                        pending.append(url)
+
+    duplicates = find_duplicate_modules(session, assets)
+
+    totals = {}
+    for kind in ASSET_EXTENSIONS:
+        of_kind = [a for a in assets if a.get('kind') == kind and 'error' not in a]
+        decoded = [a for a in of_kind if a['raw_bytes'] is not None]
+        totals[kind] = {
+            'count': len(of_kind),
+            'raw_bytes': sum(a['raw_bytes'] for a in decoded),
+            'transfer_bytes': sum(a['transfer_bytes'] for a in of_kind),
+            'gzip_bytes': sum(a['gzip_bytes'] for a in decoded),
+            'brotli_bytes': sum(a['brotli_bytes'] for a in decoded) if brotli is not None else None,
+        }
+
+    baseline = None
+    if os.path.exists(baseline_path):
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+
+    for asset in assets:
+        asset.pop('body', None)
+
+    result = {
+        'build': os.getenv('BUILD_NUMBER'),
+        'base_url': base_url,
+        'timestamp': time.time(),
+        'assets': assets,
+        'totals': totals,
+        'duplicates': duplicates,
+        'diff': diff_against_baseline(assets, baseline),
+    }
+
+    print_audit_summary(result)
+
+    for path in (report_path, baseline_path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(result, f, indent=2)
+    print(f"✓ Asset audit written to {report_path}")
+
+    return result
+
+
+def print_audit_summary(result: Dict):
+    """Print per-asset findings, totals and the size diff"""
+    for asset in result['assets']:
+        if 'error' in asset:
+            print(f"✗ {asset['url']}: {asset['error']}")
+            continue
+        issues = []
+        if asset['status'] != 200:
+            issues.append(f"HTTP {asset['status']}")
+        if asset['kind'] in ('script', 'stylesheet') and asset['content_encoding'] == 'identity':
+            issues.append('served uncompressed')
+        if not asset['cache_control']:
+            issues.append('no Cache-Control')
+        if not asset['etag'] and not asset['last_modified']:
+            issues.append('no validator')
+        if asset['raw_bytes'] is None:
+            issues.append(f"{asset['content_encoding']} body not decoded, sizes unknown")
+        marker = '⚠' if issues else '✓'
+        print(f"{marker} {asset['name']}: {asset['raw_bytes']} B raw, {asset['transfer_bytes']} B "
+              f"{asset['content_encoding']}, gzip {asset['gzip_bytes']} B, brotli {asset['brotli_bytes']} B"
+              + (f" ({', '.join(issues)})" if issues else ''))
+
+    for kind, total in result['totals'].items():
+        print(f"ℹ {kind}: {total['count']} files, {total['raw_bytes']} B raw, "
+              f"{total['transfer_bytes']} B transferred, {total['gzip_bytes']} B gzip")
+
+    for urls in result['duplicates']['identical_files']:
+        print(f"⚠ Identical content served at {len(urls)} URLs: {', '.join(urls)}")
+    for package, paths in result['duplicates']['packages'].items():
+        print(f"⚠ Package {package} bundled {len(paths)} times: {', '.join(paths)}")
+
+    diff = result['diff']
+    if not diff:
+        print("ℹ No previous build to diff against")
+        return
+    print(f"Size diff against build {diff['baseline_build']}:")
+    for kind, total in diff['totals'].items():
+        if total['delta']:
+            percent = f" ({total['percent']:+}%)" if total['percent'] is not None else ''
+            print(f"  {kind}: {total['before']} B -> {total['after']} B{percent}")
+    for change in diff['assets']:
+        print(f"  {change['name']}: {change['delta']:+} B")
+
+
+def max_growth_percent(result: Dict) -> float:
+    """Largest per-kind size growth against the previous build"""
+    growths = [t['percent'] for t in result.get('diff', {}).get('totals', {}).values() if t['percent'] is not None]
+    return max(growths, default=0.0)
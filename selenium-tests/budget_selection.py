@@ -0,0 +1,202 @@
+"""
+Time-budgeted test selection
+Picks the tests that cover the most routes, sh- selectors and API endpoints within a wall-clock
+budget, from each test's coverage in the impact map and its historical duration
+"""
+
+import glob
+import json
+import os
+import re
+import sqlite3
+import statistics
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from change_impact import ALL_ROUTES, ImpactAnalyzer
+from results_store import DEFAULT_DB
+
+
+REPORT_PATH = os.path.join('reports', 'budget.json')
+
+# Value of covering one element; a page exercises more of the app than one class or endpoint
+WEIGHTS = {'route': 3, 'api': 2, 'selector': 1}
+
+# Builds of history the duration estimate looks at
+HISTORY_BUILDS = 10
+
+# Assumed duration of a test with no history at all
+DEFAULT_DURATION = 15.0
+
+# Streamed outcomes whose duration says nothing about a real run
+SKIPPED_OUTCOMES = {'skipped', 'cached-pass', 'xfailed', 'deselected'}
+
+BUDGET_RE = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*(s|sec|m|min|h)?\s*$', re.IGNORECASE)
+UNIT_SECONDS = {None: 1, 's': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600}
+
+
+def parse_budget(value: str) -> float:
+    """'90', '60s', '1.5m' or '2min' in seconds"""
+    match = BUDGET_RE.match(value)
+    if not match or float(match.group(1)) <= 0:
+        raise ValueError(f"invalid budget {value!r}, expected e.g. 60s or 2m")
+    return float(match.group(1)) * UNIT_SECONDS[(match.group(2) or '').lower() or None]
+
+
+def function_id(nodeid: str) -> str:
+    """Parametrized ids run together when their function is selected"""
+    return nodeid.split('[', 1)[0]
+
+
+def stored_durations(db_path: str = DEFAULT_DB, builds: int = HISTORY_BUILDS) -> Dict[str, List[float]]:
+    """Per-build test durations from the cross-build results store"""
+    if not os.path.exists(db_path):
+        return {}
+    totals = defaultdict(lambda: defaultdict(float))
+    try:
+        with sqlite3.connect(db_path) as conn:
+            build_ids = [row[0] for row in conn.execute('SELECT id FROM builds ORDER BY id DESC LIMIT ?', (builds,))]
+            if not build_ids:
+                return {}
+            placeholders = ','.join('?' * len(build_ids))
+            for build_id, series, value in conn.execute(
+                    f"SELECT build_id, series, value FROM samples WHERE build_id IN ({placeholders}) "
+                    f"AND series LIKE 'test:%'", build_ids):
+                totals[function_id(series[len('test:'):])][build_id] += value
+    except sqlite3.Error as e:
+        print(f"⚠ Could not read durations from {db_path}: {e}")
+        return {}
+    return {nodeid: list(per_build.values()) for nodeid, per_build in totals.items()}
+
+
+def streamed_durations(report_dir: str = 'reports') -> Dict[str, List[float]]:
+    """Test durations from the last run's streamed results, for suites without a results store"""
+    totals = defaultdict(lambda: defaultdict(float))
+    for path in glob.glob(os.path.join(report_dir, 'results*.jsonl')):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get('event') == 'test' and record.get('outcome') not in SKIPPED_OUTCOMES:
+                    totals[function_id(record['nodeid'])][(record.get('run_id'), record.get('browser'))] += \
+                        record['duration']
+    return {nodeid: list(per_run.values()) for nodeid, per_run in totals.items()}
+
+
+def expected_durations(nodeids: Iterable[str], db_path: str = DEFAULT_DB,
+                       report_dir: str = 'reports') -> Dict[str, Tuple[float, str]]:
+    """Median historical duration per test and where it came from; tests without history get an estimate"""
+    stored = stored_durations(db_path) if db_path != 'none' else {}
+    streamed = streamed_durations(report_dir)
+    durations = {}
+    for nodeid in nodeids:
+        if stored.get(nodeid):
+            durations[nodeid] = (statistics.median(stored[nodeid]), 'results store')
+        elif streamed.get(nodeid):
+            durations[nodeid] = (statistics.median(streamed[nodeid]), 'last run')
+    known = [seconds for seconds, _ in durations.values()]
+    estimate = statistics.median(known) if known else DEFAULT_DURATION
+    for nodeid in nodeids:
+        durations.setdefault(nodeid, (estimate, 'estimated'))
+    return durations
+
+
+def coverage_elements(usage: Dict) -> Set[Tuple[str, str]]:
+    elements = {('route', route) for route in usage['routes'] if route != ALL_ROUTES}
+    elements.update(('selector', selector) for selector in usage['selectors'])
+    elements.update(('api', api) for api in usage['apis'])
+    return elements
+
+
+def value_of(elements: Iterable[Tuple[str, str]]) -> int:
+    return sum(WEIGHTS[kind] for kind, _ in elements)
+
+
+def greedy_fill(tests: Dict[str, Dict], budget: float, chosen: List[str]) -> Tuple[List[str], Set, float]:
+    """Add the test with the best new coverage per second until nothing affordable adds coverage"""
+    chosen = list(chosen)
+    covered = set().union(*(tests[nodeid]['elements'] for nodeid in chosen)) if chosen else set()
+    spent = sum(tests[nodeid]['duration'] for nodeid in chosen)
+    while True:
+        best, best_key = None, None
+        for nodeid, test in tests.items():
+            if nodeid in chosen or spent + test['duration'] > budget:
+                continue
+            gain = value_of(test['elements'] - covered)
+            if not gain:
+                continue
+            key = (gain / max(test['duration'], 0.01), -test['duration'], nodeid)
+            if best_key is None or key > best_key:
+                best, best_key = nodeid, key
+        if best is None:
+            return chosen, covered, spent
+        chosen.append(best)
+        covered |= tests[best]['elements']
+        spent += tests[best]['duration']
+
+
+def select_within_budget(tests: Dict[str, Dict], budget: float) -> Tuple[List[str], Set, float]:
+    """Budgeted maximum coverage: 0/1 knapsack whose item values shrink as overlapping tests are picked.
+
+    Greedy by coverage per second can be starved by one cheap test, so it is also run seeded with the
+    single most valuable affordable test and the better of the two kept.
+    """
+    candidates = [greedy_fill(tests, budget, [])]
+    affordable = [nodeid for nodeid, test in tests.items() if test['duration'] <= budget]
+    if affordable:
+        richest = max(affordable, key=lambda n: (value_of(tests[n]['elements']), -tests[n]['duration'], n))
+        candidates.append(greedy_fill(tests, budget, [richest]))
+    return max(candidates, key=lambda result: (value_of(result[1]), -result[2]))
+
+
+def select_for_budget(budget: float, candidates: Optional[List[str]] = None, test_file: Optional[str] = None,
+                      db_path: str = DEFAULT_DB, report_path: str = REPORT_PATH) -> Dict:
+    """Tests (out of candidates, default all) that cover the most within budget seconds; prints the plan"""
+    analyzer = ImpactAnalyzer()
+    nodeids = sorted(candidates if candidates is not None else analyzer.suite.tests)
+    nodeids = [nodeid for nodeid in nodeids if nodeid in analyzer.suite.tests
+               and (not test_file or nodeid.startswith(f"{test_file}::"))]
+    durations = expected_durations(nodeids, db_path)
+    tests = {nodeid: {
+        'duration': durations[nodeid][0],
+        'source': durations[nodeid][1],
+        'elements': coverage_elements(analyzer.usage(nodeid)),
+    } for nodeid in nodeids}
+
+    chosen, covered, expected = select_within_budget(tests, budget)
+    universe = set().union(*(test['elements'] for test in tests.values())) if tests else set()
+    coverage = {kind: {'covered': sum(1 for k, _ in covered if k == kind),
+                       'total': sum(1 for k, _ in universe if k == kind)} for kind in WEIGHTS}
+    selection = {
+        'budget_seconds': budget,
+        'expected_seconds': round(expected, 1),
+        'full_suite_seconds': round(sum(test['duration'] for test in tests.values()), 1),
+        'coverage': coverage,
+        'weights': WEIGHTS,
+        'selected': {nodeid: {
+            'duration': round(tests[nodeid]['duration'], 2),
+            'duration_source': tests[nodeid]['source'],
+            'covers': sorted(f"{kind}:{name}" for kind, name in tests[nodeid]['elements']),
+        } for nodeid in chosen},
+        'dropped': sorted(set(nodeids) - set(chosen)),
+        'impact_map_tests': len(analyzer.coverage),
+    }
+    os.makedirs(os.path.dirname(report_path) or '.', exist_ok=True)
+    with open(report_path, 'w') as f:
+        json.dump(selection, f, indent=2)
+
+    print(f"✓ Budget {budget:.0f}s: {len(chosen)} of {len(nodeids)} tests, expected runtime {expected:.0f}s "
+          f"(full selection {selection['full_suite_seconds']:.0f}s)")
+    print("  covers " + ', '.join(f"{c['covered']}/{c['total']} {kind}s" for kind, c in coverage.items()))
+    for nodeid in chosen:
+        test = tests[nodeid]
+        print(f"  {test['duration']:6.1f}s  {nodeid}" + ('  (estimated)' if test['source'] == 'estimated' else ''))
+    estimated = sum(1 for nodeid in nodeids if tests[nodeid]['source'] == 'estimated')
+    if estimated:
+        print(f"ℹ {estimated} tests have no recorded duration and were estimated; "
+              f"a full run fills in the history")
+    if not analyzer.coverage:
+        print("ℹ No recorded impact map, coverage comes from the test source only (see --record-impact)")
+    return selection
@@ -0,0 +1,597 @@
+"""
+Test impact analysis
+Maps ClientApp source files and backend controllers to the Selenium tests that cover them,
+from the routes and selectors every test uses plus coverage recorded in earlier runs, and
+selects the tests a git diff affects together with the smoke core
+"""
+
+import ast
+import glob
+import json
+import os
+import re
+import subprocess
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+import pytest
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from json_state import load_json, updated_json
+
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(TESTS_DIR)
+TESTS_PREFIX = os.path.basename(TESTS_DIR) + '/'
+
+WEBSITE = 'Source/SmartHotel360.Website/'
+CLIENT_SRC = WEBSITE + 'ClientApp/src/'
+CONTROLLERS = WEBSITE + 'Controllers/'
+
+COVERAGE_PATH = os.path.join('.impact-map', 'coverage.json')
+REPORT_PATH = os.path.join('reports', 'impact.json')
+
+# Route set meaning "every page"
+ALL_ROUTES = '*'
+
+# Suite files whose change can affect any test
+SUITE_WIDE = {'conftest.py', 'pytest.ini', 'requirements.txt'}
+
+# Fixtures that open a route before the test body runs
+FIXTURE_ROUTES = {'home_page': '/'}
+
+# String constants passed to these methods are separators, not routes or selectors
+STRING_METHODS = {'strip', 'rstrip', 'lstrip', 'split', 'rsplit', 'join', 'replace', 'startswith', 'endswith'}
+
+IMPORT_RE = re.compile(r"""(?:\bimport\s[^'";]*?\bfrom\s*|\bimport\s*|\brequire\(\s*)['"](\.[^'"]+)['"]""")
+APP_IMPORT_RE = re.compile(r"""\bimport\s+(\w+)\s+from\s+['"](\.[^'"]+)['"]""")
+ROUTE_RE = re.compile(r"<Route\b([^>]*?)component=\{(\w+)\}")
+ROUTE_PATH_RE = re.compile(r"""path=['"]([^'"]+)['"]""")
+SH_CLASS_RE = re.compile(r"\bsh-[\w-]+")
+SCSS_CLASS_RE = re.compile(r"\.(sh-[\w-]+)")
+API_RE = re.compile(r"/api/[\w-]+", re.IGNORECASE)
+CS_ROUTE_RE = re.compile(r"""\[Route\("([^"]+)"\)\]""")
+CS_CLASS_RE = re.compile(r"\bclass\s+(\w+)")
+
+# Lists every sh- class rendered on the current page and the API calls the page made
+COVERAGE_SCRIPT = """
+var classes = {};
+document.querySelectorAll('[class*="sh-"]').forEach(function (el) {
+    el.classList.forEach(function (c) { if (c.indexOf('sh-') === 0) { classes[c] = true; } });
+});
+var api = performance.getEntriesByType('resource').map(function (entry) {
+    try { return new URL(entry.name).pathname; } catch (e) { return ''; }
+}).filter(function (path) { return path.toLowerCase().indexOf('/api/') === 0; });
+return {path: location.pathname, classes: Object.keys(classes), api: api};
+"""
+
+
+def read_text(path: str) -> str:
+    with open(path, encoding='utf-8-sig', errors='replace') as f:
+        return f.read()
+
+
+def class_matches(selector: str, defined: str) -> bool:
+    """SCSS nests BEM children (&-title, &_item), so a selector also matches its block's class"""
+    return selector == defined or selector.startswith(defined + '-') or selector.startswith(defined + '_')
+
+
+class FrontendMap:
+    """ClientApp import graph, routes and the sh- classes each file renders or styles"""
+
+    def __init__(self, root: str = REPO_ROOT):
+        self.root = root
+        self.files: Dict[str, str] = {}
+        for path in glob.glob(os.path.join(root, CLIENT_SRC, '**', '*.*'), recursive=True):
+            rel = os.path.relpath(path, root).replace(os.sep, '/')
+            if rel.endswith(('.js', '.scss', '.css')):
+                self.files[rel] = read_text(path)
+        self.imports = {rel: self.resolve_imports(rel, text) for rel, text in self.files.items() if rel.endswith('.js')}
+        self.routes = self.read_routes()
+        entry = [CLIENT_SRC + 'index.js', CLIENT_SRC + 'App.js']
+        route_components = {component for _, component in self.routes}
+        # Files the entry point loads outside any routed component render on every page
+        self.shell = set(entry) | {f for e in entry for f in self.imports.get(e, ()) if f not in route_components}
+        self.closures = {component: self.closure(component) for component in route_components}
+
+    def resolve_imports(self, rel: str, text: str) -> Set[str]:
+        resolved = set()
+        for spec in IMPORT_RE.findall(text):
+            base = os.path.normpath(os.path.join(os.path.dirname(rel), spec)).replace(os.sep, '/')
+            for candidate in (base, base + '.js', base + '/index.js'):
+                if candidate in self.files:
+                    resolved.add(candidate)
+                    break
+        return resolved
+
+    def read_routes(self) -> List[tuple]:
+        """(route, component file) pairs from App.js; a Route without a path renders everywhere"""
+        app = self.files.get(CLIENT_SRC + 'App.js', '')
+        names = {name: self.resolve_imports(CLIENT_SRC + 'App.js', f"import x from '{spec}'")
+                 for name, spec in APP_IMPORT_RE.findall(app)}
+        routes = []
+        for attributes, name in ROUTE_RE.findall(app):
+            for component in names.get(name, ()):
+                path = ROUTE_PATH_RE.search(attributes)
+                routes.append((self.route_prefix(path.group(1)) if path else ALL_ROUTES, component))
+        return routes
+
+    @staticmethod
+    def route_prefix(path: str) -> str:
+        """/RoomDetail/:hotelId is matched as /RoomDetail"""
+        prefix = path.split('/:')[0]
+        return prefix or '/'
+
+    def route_names(self) -> List[str]:
+        return sorted({route for route, _ in self.routes if route != ALL_ROUTES}, key=len, reverse=True)
+
+    def closure(self, start: str) -> Set[str]:
+        seen, pending = set(), [start]
+        while pending:
+            current = pending.pop()
+            if current not in seen:
+                seen.add(current)
+                pending.extend(self.imports.get(current, ()))
+        return seen
+
+    def routes_of(self, rel: str) -> Set[str]:
+        """Routes whose page loads this file; files the map cannot place count as every route"""
+        if rel in self.shell:
+            return {ALL_ROUTES}
+        routes = {route for route, component in self.routes if rel in self.closures[component]}
+        return routes or {ALL_ROUTES}
+
+    def classes_used(self, rel: str) -> Set[str]:
+        return set(SH_CLASS_RE.findall(self.files.get(rel, '')))
+
+    def classes_defined(self, rel: str) -> Set[str]:
+        return set(SCSS_CLASS_RE.findall(self.files.get(rel, '')))
+
+    def files_using(self, needle: str) -> List[str]:
+        needle = needle.lower()
+        return [rel for rel, text in self.files.items() if rel.endswith('.js') and needle in text.lower()]
+
+    def files_rendering(self, classes: Set[str]) -> List[str]:
+        return [rel for rel in self.imports
+                if any(class_matches(used, defined) for used in self.classes_used(rel) for defined in classes)]
+
+    def normalize_path(self, path: str) -> Optional[str]:
+        """Map a visited URL path onto the route that renders it"""
+        for route in self.route_names():
+            if route == '/':
+                continue
+            if path.lower() == route.lower() or path.lower().startswith(route.lower() + '/'):
+                return route
+        return '/' if path in ('', '/') else None
+
+
+class BackendMap:
+    """API paths served by each controller file"""
+
+    def __init__(self, root: str = REPO_ROOT):
+        self.routes: Dict[str, Set[str]] = {}
+        self.classes: Dict[str, Set[str]] = {}
+        self.text: Dict[str, str] = {}
+        for path in glob.glob(os.path.join(root, CONTROLLERS, '*.cs')):
+            rel = os.path.relpath(path, root).replace(os.sep, '/')
+            text = self.text[rel] = read_text(path)
+            self.routes[rel] = {'/' + route.strip('/').lower() for route in CS_ROUTE_RE.findall(text)}
+            self.classes[rel] = set(CS_CLASS_RE.findall(text))
+
+    def apis_of(self, rel: str) -> Set[str]:
+        """Routes of the controller itself, or of the controllers using a model class it declares"""
+        if self.routes.get(rel):
+            return self.routes[rel]
+        declared = self.classes.get(rel, set())
+        return {api for other, text in self.text.items() if other != rel and self.routes[other]
+                and any(re.search(rf"\b{name}\b", text) for name in declared) for api in self.routes[other]}
+
+
+class ModuleGraph:
+    """Parsed suite modules and the suite modules each one imports"""
+
+    def __init__(self, tests_dir: str = TESTS_DIR):
+        self.tests_dir = tests_dir
+        self.modules: Dict[str, ast.Module] = {}
+
+    def module(self, name: str) -> Optional[ast.Module]:
+        if name not in self.modules:
+            path = os.path.join(self.tests_dir, name)
+            self.modules[name] = ast.parse(read_text(path)) if os.path.exists(path) else None
+        return self.modules[name]
+
+    def local_imports(self, name: str) -> Dict[str, str]:
+        """Imported name -> suite module that defines it"""
+        imported = {}
+        for node in ast.walk(self.module(name) or ast.Module(body=[], type_ignores=[])):
+            if isinstance(node, ast.ImportFrom) and node.module and self.module(f"{node.module}.py"):
+                for alias in node.names:
+                    imported[alias.asname or alias.name] = f"{node.module}.py"
+            elif isinstance(node, ast.Import):
+                for alias in node.names:
+                    if self.module(f"{alias.name}.py"):
+                        imported[alias.asname or alias.name] = f"{alias.name}.py"
+        return imported
+
+    def module_dependencies(self, name: str) -> Set[str]:
+        """Suite modules a module imports, directly or through other suite modules"""
+        seen, pending = set(), [name]
+        while pending:
+            for dependency in set(self.local_imports(pending.pop()).values()):
+                if dependency not in seen:
+                    seen.add(dependency)
+                    pending.append(dependency)
+        return seen
+
+
+class SuiteIndex(ModuleGraph):
+    """Routes, selectors, API paths and markers each test uses, read from the test modules' source"""
+
+    def __init__(self, frontend: FrontendMap, tests_dir: str = TESTS_DIR):
+        super().__init__(tests_dir)
+        self.frontend = frontend
+        self.tests: Dict[str, Dict] = {}
+        for path in sorted(glob.glob(os.path.join(tests_dir, 'test_*.py'))):
+            self.index_module(os.path.basename(path))
+
+    @staticmethod
+    def definitions(tree: ast.Module) -> Dict[str, ast.AST]:
+        found = {}
+        for node in tree.body:
+            if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+                found[node.name] = node
+            elif isinstance(node, ast.Assign):
+                for target in node.targets:
+                    if isinstance(target, ast.Name):
+                        found[target.id] = node
+        return found
+
+    @staticmethod
+    def strings(node: ast.AST) -> List[str]:
+        skipped = set()
+        for call in ast.walk(node):
+            if isinstance(call, ast.Call) and isinstance(call.func, ast.Attribute) and call.func.attr in STRING_METHODS:
+                skipped.update(id(arg) for arg in call.args)
+        return [n.value for n in ast.walk(node)
+                if isinstance(n, ast.Constant) and isinstance(n.value, str) and id(n) not in skipped]
+
+    def reachable_strings(self, module_name: str, nodes: List[ast.AST]) -> List[str]:
+        """Strings in the nodes and in every definition they reference, following suite imports"""
+        collected, seen = [], set()
+        pending = [(module_name, node) for node in nodes]
+        while pending:
+            module_name, node = pending.pop()
+            if (module_name, id(node)) in seen:
+                continue
+            seen.add((module_name, id(node)))
+            collected.extend(self.strings(node))
+            definitions = self.definitions(self.module(module_name))
+            imports = self.local_imports(module_name)
+            for name in {n.id for n in ast.walk(node) if isinstance(n, ast.Name)}:
+                if name in definitions and not name.startswith('test_'):
+                    pending.append((module_name, definitions[name]))
+                elif name in imports:
+                    target = self.definitions(self.module(imports[name])).get(name)
+                    if target is not None:
+                        pending.append((imports[name], target))
+        return collected
+
+    def index_module(self, name: str):
+        tree = self.module(name)
+        for node in tree.body:
+            if isinstance(node, ast.FunctionDef) and node.name.startswith('test_'):
+                self.index_test(name, f"{name}::{node.name}", node, [])
+            elif isinstance(node, ast.ClassDef) and node.name.startswith('Test'):
+                for method in node.body:
+                    if isinstance(method, ast.FunctionDef) and method.name.startswith('test_'):
+                        self.index_test(name, f"{name}::{node.name}::{method.name}", method, node.decorator_list)
+
+    def index_test(self, module_name: str, nodeid: str, func: ast.FunctionDef, class_decorators: List[ast.AST]):
+        decorators = list(func.decorator_list) + list(class_decorators)
+        strings = self.reachable_strings(module_name, [func] + decorators)
+        routes = {FIXTURE_ROUTES[arg.arg] for arg in func.args.args if arg.arg in FIXTURE_ROUTES}
+        for node in ast.walk(func):
+            # driver.get(driver.base_url) opens the home page
+            if (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == 'get'
+                    and node.args and isinstance(node.args[0], ast.Attribute) and node.args[0].attr == 'base_url'):
+                routes.add('/')
+        for value in strings:
+            if value == '/':
+                routes.add('/')
+            elif value.startswith('/') and not value.lower().startswith('/api/'):
+                route = self.frontend.normalize_path(value)
+                if route and route != '/':
+                    routes.add(route)
+        markers = {n.attr for d in decorators for n in ast.walk(d)
+                   if isinstance(n, ast.Attribute) and isinstance(n.value, ast.Attribute) and n.value.attr == 'mark'}
+        self.tests[nodeid] = {
+            'file': module_name,
+            'routes': routes or {ALL_ROUTES},
+            'selectors': {c for value in strings for c in SH_CLASS_RE.findall(value)},
+            'apis': {api.lower() for value in strings for api in API_RE.findall(value)},
+            'markers': markers,
+        }
+
+
+def load_coverage(path: str = COVERAGE_PATH) -> Dict[str, Dict]:
+    return load_json(path)
+
+
+class Impact:
+    """What a set of changed files touches"""
+
+    def __init__(self):
+        self.full_reasons: List[str] = []
+        self.routes: Dict[str, Set[str]] = defaultdict(set)
+        self.classes: Dict[str, Set[str]] = defaultdict(set)
+        self.apis: Dict[str, Set[str]] = defaultdict(set)
+        self.test_files: Dict[str, Set[str]] = defaultdict(set)
+        self.ignored: List[str] = []
+
+    def as_dict(self) -> Dict:
+        def listed(mapping):
+            return {key: sorted(files) for key, files in sorted(mapping.items())}
+        return {
+            'full_reasons': self.full_reasons,
+            'routes': listed(self.routes),
+            'classes': listed(self.classes),
+            'apis': listed(self.apis),
+            'test_files': listed(self.test_files),
+            'ignored': self.ignored,
+        }
+
+
+class ImpactAnalyzer:
+    """Turns changed repository paths into the set of tests to run"""
+
+    def __init__(self, root: str = REPO_ROOT, coverage_path: str = COVERAGE_PATH):
+        self.frontend = FrontendMap(root)
+        self.backend = BackendMap(root)
+        self.suite = SuiteIndex(self.frontend)
+        self.coverage = load_coverage(coverage_path)
+
+    def analyze(self, changed: List[str]) -> Impact:
+        impact = Impact()
+        conftest_dependencies = self.suite.module_dependencies('conftest.py')
+        for path in changed:
+            if path.startswith(CLIENT_SRC):
+                self.frontend_change(path, path, impact)
+            elif path.startswith(CONTROLLERS) and path.endswith('.cs'):
+                apis = self.backend.apis_of(path)
+                if not apis:
+                    impact.full_reasons.append(f"{path}: controller file without an API route or known user")
+                for api in apis:
+                    impact.apis[api].add(path)
+                    for user in self.frontend.files_using(api):
+                        for route in self.frontend.routes_of(user):
+                            impact.routes[route].add(path)
+            elif path.startswith('Source/'):
+                impact.full_reasons.append(f"{path}: server, build or shared application file")
+            elif path.startswith(TESTS_PREFIX):
+                self.suite_change(path[len(TESTS_PREFIX):], path, impact, conftest_dependencies)
+            else:
+                impact.ignored.append(path)
+        if ALL_ROUTES in impact.routes:
+            impact.full_reasons.append(
+                f"{', '.join(sorted(impact.routes[ALL_ROUTES]))}: loaded on every page")
+        return impact
+
+    def frontend_change(self, rel: str, source: str, impact: Impact):
+        if rel.endswith('.js'):
+            if rel not in self.frontend.files:
+                # Deleted or renamed; whatever imported it changed as well or the build breaks
+                impact.full_reasons.append(f"{source}: removed frontend module")
+                return
+            for route in self.frontend.routes_of(rel):
+                impact.routes[route].add(source)
+            for name in self.frontend.classes_used(rel):
+                impact.classes[name].add(source)
+        elif rel.endswith(('.scss', '.css')):
+            defined = self.frontend.classes_defined(rel)
+            if not defined or rel.endswith('site.css') or rel.endswith('site.scss'):
+                impact.full_reasons.append(f"{source}: shared styles")
+                return
+            for name in defined:
+                impact.classes[name].add(source)
+            for user in self.frontend.files_rendering(defined):
+                for route in self.frontend.routes_of(user):
+                    impact.routes[route].add(source)
+        else:
+            impact.full_reasons.append(f"{source}: frontend asset the map does not follow")
+
+    def suite_change(self, rel: str, source: str, impact: Impact, conftest_dependencies: Set[str]):
+        if rel in SUITE_WIDE or rel in conftest_dependencies:
+            impact.full_reasons.append(f"{source}: used by every test")
+        elif rel.startswith('test_') and rel.endswith('.py'):
+            impact.test_files[rel].add(source)
+        elif rel.endswith('.py'):
+            for module in {t['file'] for t in self.suite.tests.values()}:
+                if rel in self.suite.module_dependencies(module):
+                    impact.test_files[module].add(source)
+        elif rel.startswith('visual-baselines/'):
+            impact.test_files['test_visual.py'].add(source)
+        else:
+            impact.ignored.append(source)
+
+    def usage(self, nodeid: str) -> Dict:
+        """Static usage merged with what coverage runs saw the test render and request"""
+        static = self.suite.tests[nodeid]
+        recorded = self.coverage.get(nodeid, {})
+        routes = set(static['routes'])
+        for path in recorded.get('paths', []):
+            route = self.frontend.normalize_path(path)
+            if route:
+                routes.add(route)
+        if recorded.get('paths') and ALL_ROUTES in routes and len(routes) > 1:
+            # Coverage knows the pages this test actually visits
+            routes.discard(ALL_ROUTES)
+        return {
+            'routes': routes,
+            'selectors': static['selectors'] | set(recorded.get('classes', [])),
+            'apis': static['apis'] | {api.lower() for api in recorded.get('apis', [])},
+        }
+
+    def reasons(self, nodeid: str, impact: Impact) -> List[str]:
+        test = self.suite.tests[nodeid]
+        reasons = []
+        if 'smoke' in test['markers']:
+            reasons.append('smoke core')
+        if test['file'] in impact.test_files:
+            reasons.append(f"changed: {', '.join(sorted(impact.test_files[test['file']]))}")
+        if not (impact.routes or impact.classes or impact.apis):
+            return reasons
+        usage = self.usage(nodeid)
+        routes = usage['routes'] & set(impact.routes) if ALL_ROUTES not in usage['routes'] else set(impact.routes)
+        for route in sorted(routes):
+            reasons.append(f"route {route} via {', '.join(sorted(impact.routes[route]))}")
+        classes = {defined for defined in impact.classes
+                   if any(class_matches(selector, defined) for selector in usage['selectors'])}
+        for name in sorted(classes):
+            reasons.append(f"selector .{name} via {', '.join(sorted(impact.classes[name]))}")
+        for api in sorted(usage['apis'] & set(impact.apis)):
+            reasons.append(f"API {api} via {', '.join(sorted(impact.apis[api]))}")
+        return reasons
+
+    def select(self, changed: List[str]) -> Dict:
+        impact = self.analyze(changed)
+        selected = {}
+        if not impact.full_reasons:
+            for nodeid in sorted(self.suite.tests):
+                reasons = self.reasons(nodeid, impact)
+                if reasons:
+                    selected[nodeid] = reasons
+        return {
+            'changed': changed,
+            'full': bool(impact.full_reasons),
+            'impact': impact.as_dict(),
+            'selected': selected,
+            'total_tests': len(self.suite.tests),
+            'coverage_tests': len(self.coverage),
+        }
+
+
+def changed_files(base: str, root: str = REPO_ROOT) -> List[str]:
+    """Paths changed between base and the working tree, plus untracked files"""
+    diff = subprocess.run(['git', 'diff', '--name-only', base], cwd=root, capture_output=True, text=True, check=True)
+    untracked = subprocess.run(['git', 'ls-files', '--others', '--exclude-standard'], cwd=root,
+                               capture_output=True, text=True, check=True)
+    return sorted({line.strip() for line in (diff.stdout + untracked.stdout).splitlines() if line.strip()})
+
+
+def select_tests(base: str, report_path: str = REPORT_PATH) -> Dict:
+    """Tests affected by the changes since base; 'full' means the whole suite has to run"""
+    started = time.perf_counter()
+    try:
+        changed = changed_files(base)
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"⚠ Could not diff against {base}, running everything: {e}")
+        return {'base': base, 'full': True, 'selected': {}, 'impact': {'full_reasons': [f"git diff failed: {e}"]}}
+
+    selection = dict(ImpactAnalyzer().select(changed), base=base,
+                     analysis_ms=round((time.perf_counter() - started) * 1000, 1))
+    os.makedirs(os.path.dirname(report_path) or '.', exist_ok=True)
+    with open(report_path, 'w') as f:
+        json.dump(selection, f, indent=2)
+
+    if selection['full']:
+        print(f"ℹ Change impact: running the full suite ({len(changed)} files changed since {base})")
+        for reason in selection['impact']['full_reasons'][:10]:
+            print(f"  {reason}")
+    else:
+        print(f"✓ Change impact: {len(selection['selected'])} of {selection['total_tests']} tests affected by "
+              f"{len(changed)} files changed since {base} ({selection['analysis_ms']:.0f} ms)")
+    return selection
+
+
+def impact_recording_enabled() -> bool:
+    return os.getenv('IMPACT_RECORD', 'false').lower() == 'true'
+
+
+class CoverageRecorder:
+    """Pages, rendered sh- classes and API calls seen per test, merged into the coverage map"""
+
+    def __init__(self, path: str = COVERAGE_PATH):
+        self.path = path
+        self.results: Dict[str, Dict[str, Set[str]]] = {}
+        self.visited: List[str] = []
+        self.original_get = None
+
+    def install(self):
+        recorder = self
+        original_get = self.original_get = WebDriver.get
+
+        def get(driver, url):
+            recorder.visited.append(url)
+            return original_get(driver, url)
+
+        WebDriver.get = get
+
+    def uninstall(self):
+        if self.original_get is not None:
+            WebDriver.get = self.original_get
+            self.original_get = None
+
+    def record(self, item):
+        # Parametrized copies share one entry, matching the ids the static index uses
+        nodeid = item.nodeid.split('[')[0]
+        entry = self.results.setdefault(nodeid, {'paths': set(), 'classes': set(), 'apis': set()})
+        for url in self.visited:
+            match = re.match(r'[a-z]+://[^/]+(/[^?#]*)?', url)
+            if match:
+                entry['paths'].add(match.group(1) or '/')
+        self.visited = []
+        for driver in {id(v): v for v in item.funcargs.values() if isinstance(v, WebDriver)}.values():
+            try:
+                seen = driver.execute_script(COVERAGE_SCRIPT)
+            except Exception as e:
+                print(f"⚠ Could not record impact coverage for {nodeid}: {e}")
+                continue
+            entry['paths'].add(seen['path'])
+            entry['classes'].update(seen['classes'])
+            entry['apis'].update(seen['api'])
+
+    def save(self):
+        """Merge this session's tests into the map; other workers or browsers may be saving theirs"""
+        with updated_json(self.path, indent=2, sort_keys=True) as stored:
+            for nodeid, entry in self.results.items():
+                stored[nodeid] = {
+                    'paths': sorted(entry['paths']),
+                    'classes': sorted(entry['classes']),
+                    'apis': sorted(entry['apis']),
+                    'build': os.getenv('BUILD_NUMBER'),
+                    'recorded_at': time.time(),
+                }
+        print(f"✓ Impact coverage of {len(self.results)} tests saved to {self.path}")
+
+
+recorder: Optional[CoverageRecorder] = None
+
+
+def pytest_configure(config):
+    global recorder
+    if impact_recording_enabled():
+        recorder = CoverageRecorder()
+        recorder.install()
+
+
+def pytest_unconfigure(config):
+    if recorder is not None:
+        recorder.uninstall()
+
+
+def pytest_runtest_setup(item):
+    if recorder is not None:
+        recorder.visited = []
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    yield
+    if recorder is not None:
+        recorder.record(item)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if recorder is not None and recorder.results:
+        recorder.save()
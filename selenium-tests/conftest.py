@@ -1,5 +1,7 @@
 import pytest
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.firefox.options import Options as FirefoxOptions
@@ -9,20 +11,106 @@ from selenium.webdriver.firefox.service import Service as FirefoxService
 from webdriver_manager.chrome import ChromeDriverManager
 from webdriver_manager.firefox import GeckoDriverManager
 
+from emulation import requested_profiles, apply_profile
+from perf_metrics import PageMetricsRecorder
+from tracing import trace_threshold, trace_buffer_events, configure_tracing, TraceRecorder
+from local_proxy import LocalProxy, configure_browser_proxy, DEFAULT_ARCHIVE, DEFAULT_API_PATTERN
+from failure_artifacts import failure_artifacts_enabled, configure_console_log, FailureArtifacts
+from resource_sampler import resource_sampling_enabled, local_driver_pid, ResourceSampler
 
-@pytest.fixture(scope="session")
-def driver_init(request):
-    """Initialize WebDriver with Selenium Grid or local browser"""
+try:
+    import pytest_html
+except ImportError:  # report links are skipped without pytest-html
+    pytest_html = None
+
+
+pytest_plugins = ["phase_timing", "result_cache", "results_stream", "change_impact", "flake_tracker", "route_affinity"]
+
+
+# Budget violations from every profile's metrics record, checked at session end
+perf_budget_violations = []
+
+
+def pytest_generate_tests(metafunc):
+    """Run the suite once per emulation profile listed in EMULATION_PROFILES"""
+    profiles = requested_profiles()
+    if profiles and "emulation_profile" in metafunc.fixturenames:
+        metafunc.parametrize("emulation_profile", profiles, indirect=True, scope="session")
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Fail the run on performance budget violations when PERF_BUDGET_STRICT is set"""
+    strict = os.getenv('PERF_BUDGET_STRICT', 'false').lower() == 'true'
+    if strict and perf_budget_violations and session.exitstatus == 0:
+        print(f"✗ {len(perf_budget_violations)} performance budget violations")
+        session.exitstatus = 1
+
+
+def report_link(config, path):
+    """Path of an artifact relative to the HTML report, for links in the report"""
+    html_path = config.getoption("htmlpath", None) or os.path.join("reports", "report.html")
+    return os.path.relpath(path, os.path.dirname(os.path.abspath(html_path)))
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    """Keep the Chrome trace of slow or failing tests and failure artifacts, linked from the HTML report"""
+    outcome = yield
+    report = outcome.get_result()
+    if report.when != "call" and not (report.when == "setup" and report.failed):
+        return
     
-    # Get test configuration from environment variables
-    base_url = os.getenv('APP_BASE_URL', 'http://192.168.1.137:30080')  # NodePort URL
-    selenium_hub = os.getenv('SELENIUM_HUB_URL', 'http://localhost:4444/wd/hub')
-    browser = os.getenv('BROWSER', 'chrome').lower()
-    headless = os.getenv('HEADLESS', 'true').lower() == 'true'
+    driver = item.funcargs.get("driver_init")
+    links = {}
+    recorder = getattr(driver, "trace_recorder", None)
+    if recorder is not None:
+        path = recorder.finish_test(item.nodeid, report.duration, report.failed)
+        if path:
+            links["Chrome trace"] = path
     
-    print(f"Starting {browser} browser for testing {base_url}")
-    print(f"Using Selenium Hub: {selenium_hub}")
+    # Only the in-memory snapshot happens here; files are written in the background
+    artifacts = getattr(driver, "failure_artifacts", None)
+    if report.failed and artifacts is not None:
+        links.update(artifacts.capture(item.nodeid))
+    
+    if links and pytest_html is not None:
+        report.extras = getattr(report, "extras", []) + [
+            pytest_html.extras.url(report_link(item.config, path), name=name) for name, path in links.items()
+        ]
+
+
+@pytest.fixture(scope="session")
+def emulation_profile(request):
+    """Emulation profile for this pass over the suite (None when unthrottled)"""
+    return getattr(request, "param", None)
+
+
+@pytest.fixture(scope="session")
+def local_proxy(request):
+    """Route the browser through the local proxy for API record/replay or fault scenarios"""
+    mode = os.getenv('API_PROXY_MODE', '').lower()
+    if not mode and any(item.get_closest_marker("faults") for item in request.session.items):
+        mode = 'passthrough'
+    if not mode:
+        yield None
+        return
     
+    proxy = LocalProxy(
+        mode,
+        archive_path=os.getenv('HAR_ARCHIVE', DEFAULT_ARCHIVE),
+        api_pattern=os.getenv('API_PROXY_PATTERN', DEFAULT_API_PATTERN),
+        replay_latency=os.getenv('HAR_REPLAY_LATENCY', 'false').lower() == 'true',
+        # The proxy tunnels CONNECT to any host; only listen beyond loopback when Grid nodes need it
+        bind_host=os.getenv('API_PROXY_BIND', '127.0.0.1'),
+        port=int(os.getenv('API_PROXY_PORT', '0'))
+    )
+    proxy.start()
+    yield proxy
+    proxy.stop()
+
+
+def launch_browser(browser, headless, selenium_hub, tracing, local_proxy, proxy_host):
+    """Start a browser on Selenium Grid, falling back to a local driver"""
     if browser == 'chrome':
         chrome_options = ChromeOptions()
         if headless:
@@ -31,6 +119,11 @@ def driver_init(request):
         chrome_options.add_argument("--disable-dev-shm-usage")
         chrome_options.add_argument("--disable-gpu")
         chrome_options.add_argument("--window-size=1920,1080")
+        configure_console_log(chrome_options)
+        if tracing:
+            configure_tracing(chrome_options)
+        if local_proxy is not None:
+            configure_browser_proxy(chrome_options, browser, proxy_host, local_proxy.port)
         
         # Try Selenium Grid first, fallback to local
         try:
@@ -47,6 +140,8 @@ def driver_init(request):
         firefox_options = FirefoxOptions()
         if headless:
             firefox_options.add_argument("--headless")
+        if local_proxy is not None:
+            configure_browser_proxy(firefox_options, browser, proxy_host, local_proxy.port)
         
         try:
             driver = webdriver.Remote(
@@ -62,14 +157,195 @@ def driver_init(request):
     
     driver.maximize_window()
     driver.implicitly_wait(10)
+    return driver
+
+
+def recycle_browser(driver, launch):
+    """Replace the browser behind driver with a fresh session, keeping the object tests and recorders hold"""
+    fresh = launch()
+    try:
+        driver.quit()
+    except Exception as e:
+        print(f"⚠ Could not quit the old browser session: {e}")
+    # Suite attributes and the navigation wrappers (which call back into this object) stay;
+    # cached elements belong to the old session
+    kept = {name: value for name, value in driver.__dict__.items()
+            if name not in fresh.__dict__ and name != 'element_cache'}
+    driver.__dict__.clear()
+    driver.__dict__.update(fresh.__dict__)
+    driver.__dict__.update(kept)
+    apply_profile(driver, driver.emulation_profile)
+    return driver
+
+
+@pytest.fixture(scope="session")
+def driver_init(request, emulation_profile, local_proxy):
+    """Initialize WebDriver with Selenium Grid or local browser"""
+    
+    # Get test configuration from environment variables
+    base_url = os.getenv('APP_BASE_URL', 'http://192.168.1.137:30080')  # NodePort URL
+    selenium_hub = os.getenv('SELENIUM_HUB_URL', 'http://localhost:4444/wd/hub')
+    browser = os.getenv('BROWSER', 'chrome').lower()
+    headless = os.getenv('HEADLESS', 'true').lower() == 'true'
+    # Address the browser uses to reach the local proxy (the agent's IP when on Grid)
+    proxy_host = os.getenv('API_PROXY_HOST', 'localhost')
+    tracing = trace_threshold() is not None
+    
+    print(f"Starting {browser} browser for testing {base_url}")
+    print(f"Using Selenium Hub: {selenium_hub}")
+    
+    def launch():
+        return launch_browser(browser, headless, selenium_hub, tracing, local_proxy, proxy_host)
+    
+    # The watch daemon keeps browsers alive between runs; a proxied browser is tied to this run's proxy port
+    warm_browsers = getattr(request.config, "warm_browsers", None)
+    if warm_browsers is not None and local_proxy is None:
+        driver = warm_browsers.checkout((browser, headless, selenium_hub, tracing), launch)
+    else:
+        warm_browsers = None
+        driver = launch()
     
     # Store base URL in driver for tests to use
     driver.base_url = base_url
     
+    # Apply network/CPU throttling and record page-load metrics for this profile
+    driver.emulation_profile = apply_profile(driver, emulation_profile)
+    metrics = PageMetricsRecorder(driver.emulation_profile)
+    metrics.attach(driver)
+    
+    # Always-on tracing, written to disk only for slow or failing tests
+    driver.trace_recorder = None
+    if tracing:
+        driver.trace_recorder = TraceRecorder(driver, trace_threshold(), trace_buffer_events())
+        driver.trace_recorder.attach(driver)
+    
+    # Screenshot, DOM, console and network snapshots of failing tests
+    driver.failure_artifacts = None
+    if failure_artifacts_enabled():
+        driver.failure_artifacts = FailureArtifacts(
+            driver,
+            console_lines=int(os.getenv('FAILURE_CONSOLE_LINES', '200')),
+            workers=int(os.getenv('FAILURE_ARTIFACT_WORKERS', '2'))
+        )
+    
+    # RSS, CPU, threads and open files of a local browser, restarted before it exhausts the agent
+    driver.resource_sampler = None
+    driver.relaunch = launch
+    if resource_sampling_enabled():
+        pid = local_driver_pid(driver)
+        if pid is not None:
+            driver.resource_sampler = ResourceSampler(pid)
+            driver.resource_sampler.start()
+        else:
+            print("ℹ Browser resource sampling covers local drivers only")
+    
     yield driver
     
     # Teardown
-    driver.quit()
+    if driver.resource_sampler is not None:
+        driver.resource_sampler.close()
+        driver.resource_sampler.write_report()
+    perf_budget_violations.extend(metrics.write()['violations'])
+    if driver.failure_artifacts is not None:
+        driver.failure_artifacts.close()
+    if getattr(driver, "element_cache", None) is not None:
+        print(f"ℹ Page object element cache: {driver.element_cache.stats}")
+    if warm_browsers is None:
+        driver.quit()
+
+
+@pytest.fixture(scope="module")
+def browser_pool(driver_init, emulation_profile, local_proxy):
+    """The main browser plus BROWSER_POOL_SIZE - 1 extra sessions for tests that run work concurrently"""
+    size = int(os.getenv('BROWSER_POOL_SIZE', '2'))
+    extra = []
+    
+    def launch():
+        driver = launch_browser(
+            os.getenv('BROWSER', 'chrome').lower(),
+            os.getenv('HEADLESS', 'true').lower() == 'true',
+            os.getenv('SELENIUM_HUB_URL', 'http://localhost:4444/wd/hub'),
+            False,
+            local_proxy,
+            os.getenv('API_PROXY_HOST', 'localhost')
+        )
+        driver.base_url = driver_init.base_url
+        apply_profile(driver, emulation_profile)
+        return driver
+    
+    # Sessions start in parallel; Grid launches dominate the setup time
+    with ThreadPoolExecutor(max_workers=max(1, size - 1)) as executor:
+        futures = [executor.submit(launch) for _ in range(size - 1)]
+        for future in futures:
+            try:
+                extra.append(future.result())
+            except Exception as e:
+                print(f"⚠ Could not start an extra browser session: {e}")
+    print(f"✓ Browser pool ready with {1 + len(extra)} sessions")
+    
+    yield [driver_init] + extra
+    
+    for driver in extra:
+        driver.quit()
+
+
+@pytest.fixture(autouse=True)
+def chrome_trace(request):
+    """Start each test with an empty trace buffer"""
+    if "driver_init" in request.fixturenames:
+        recorder = getattr(request.getfixturevalue("driver_init"), "trace_recorder", None)
+        if recorder is not None:
+            recorder.start_test()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def console_buffer(request):
+    """Start each test with an empty console ring buffer"""
+    if "driver_init" in request.fixturenames:
+        artifacts = getattr(request.getfixturevalue("driver_init"), "failure_artifacts", None)
+        if artifacts is not None:
+            artifacts.start_test()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def browser_resources(request):
+    """Attribute browser resource growth to each test and recycle the session at the memory ceiling"""
+    sampler = None
+    if "driver_init" in request.fixturenames:
+        driver = request.getfixturevalue("driver_init")
+        sampler = getattr(driver, "resource_sampler", None)
+    if sampler is None:
+        yield
+        return
+    nodeid = request.node.nodeid
+    sampler.start_test(nodeid)
+    yield
+    usage = sampler.finish_test(nodeid)
+    for name in ('pss_delta_mb', 'pss_peak_mb', 'cpu_seconds', 'fds_delta', 'threads_delta'):
+        request.node.user_properties.append((f"browser_{name}", usage[name]))
+    reason = sampler.recycle_reason(usage)
+    if reason:
+        print(f"⚠ Recycling the browser session after {nodeid}: {reason}")
+        started = time.monotonic()
+        try:
+            recycle_browser(driver, driver.relaunch)
+        except Exception as e:
+            print(f"⚠ Could not start a new browser session, keeping the old one: {e}")
+            return
+        sampler.recycled(local_driver_pid(driver), nodeid, reason, time.monotonic() - started)
+
+
+@pytest.fixture
+def fault_scenario(request, local_proxy):
+    """Apply the test's @pytest.mark.faults rules to the proxy for the duration of the test"""
+    if local_proxy is None:
+        pytest.skip("Fault scenarios need the local proxy")
+    marker = request.node.get_closest_marker("faults")
+    local_proxy.set_faults(list(marker.args) if marker else [])
+    yield local_proxy
+    local_proxy.clear_faults()
 
 
 @pytest.fixture
@@ -0,0 +1,103 @@
+"""
+Chrome DevTools Protocol helpers
+Work the same against local ChromeDriver and Chrome nodes on Selenium Grid
+"""
+
+from typing import Dict, List, Optional
+
+
+CDP_BROWSERS = ('chrome', 'chromium', 'msedge', 'MicrosoftEdge')
+
+# Resource Timing for every subresource plus the navigation entry, in one round trip
+RESOURCE_TIMING_SCRIPT = """
+var nav = performance.getEntriesByType('navigation')[0];
+return {
+    navigation: nav ? {
+        duration: nav.duration,
+        domContentLoaded: nav.domContentLoadedEventEnd,
+        load: nav.loadEventEnd,
+        responseStart: nav.responseStart,
+        transferSize: nav.transferSize
+    } : null,
+    resources: performance.getEntriesByType('resource').map(function (r) {
+        return {
+            name: r.name,
+            initiatorType: r.initiatorType,
+            startTime: r.startTime,
+            duration: r.duration,
+            transferSize: r.transferSize,
+            encodedBodySize: r.encodedBodySize,
+            decodedBodySize: r.decodedBodySize,
+            responseStatus: r.responseStatus
+        };
+    })
+};
+"""
+
+
+def supports_cdp(driver) -> bool:
+    """Whether the session's browser speaks the Chrome DevTools Protocol"""
+    return driver.capabilities.get('browserName') in CDP_BROWSERS
+
+
+def execute_cdp(driver, cmd: str, params: Optional[Dict] = None) -> Dict:
+    """Run a DevTools command; uses the goog/cdp endpoint so Grid sessions work too"""
+    return driver.execute('executeCdpCommand', {'cmd': cmd, 'params': params or {}})['value']
+
+
+def set_cache_disabled(driver, disabled: bool):
+    """Toggle the browser HTTP cache the way the DevTools "Disable cache" box does"""
+    execute_cdp(driver, 'Network.enable')
+    execute_cdp(driver, 'Network.setCacheDisabled', {'cacheDisabled': disabled})
+
+
+def clear_browser_cache(driver):
+    """Drop everything in the HTTP cache so the next load is cold"""
+    execute_cdp(driver, 'Network.enable')
+    execute_cdp(driver, 'Network.clearBrowserCache')
+
+
+def resource_timings(driver) -> Dict:
+    """Navigation and resource timing entries for the current document"""
+    return driver.execute_script(RESOURCE_TIMING_SCRIPT)
+
+
+def classify_resource(entry: Dict) -> str:
+    """Where a resource came from: cache, revalidated (304), network or opaque (cross-origin)"""
+    if entry.get('responseStatus') == 304:
+        return 'revalidated'
+    if entry['transferSize'] == 0:
+        if entry['decodedBodySize'] > 0:
+            return 'cache'
+        return 'opaque'
+    if entry['encodedBodySize'] > 0 and entry['transferSize'] < entry['encodedBodySize']:
+        # Only headers crossed the wire, the body came from cache after a 304
+        return 'revalidated'
+    return 'network'
+
+
+def summarize_sources(resources: List[Dict]) -> Dict:
+    """Request and byte counts per resource source"""
+    summary = {}
+    for entry in resources:
+        source = classify_resource(entry)
+        bucket = summary.setdefault(source, {'requests': 0, 'bytes': 0})
+        bucket['requests'] += 1
+        bucket['bytes'] += entry['transferSize'] if source == 'network' else entry['decodedBodySize']
+    return summary
+
+
+def emulate_network(driver, latency_ms: float, download_kbps: float, upload_kbps: float, offline: bool = False):
+    """Throttle the network; throughput is given in kilobits per second (-1 disables)"""
+    execute_cdp(driver, 'Network.enable')
+    execute_cdp(driver, 'Network.emulateNetworkConditions', {
+        'offline': offline,
+        'latency': latency_ms,
+        'downloadThroughput': download_kbps * 1024 / 8 if download_kbps > 0 else -1,
+        'uploadThroughput': upload_kbps * 1024 / 8 if upload_kbps > 0 else -1,
+    })
+
+
+def set_cpu_throttling(driver, rate: float):
+    """Slow the renderer down by the given factor (1 means no throttling)"""
+    execute_cdp(driver, 'Emulation.setCPUThrottlingRate', {'rate': rate})
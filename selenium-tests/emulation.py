@@ -0,0 +1,77 @@
+"""
+Named network and CPU emulation profiles
+Each profile carries the page-load budget its performance metrics are held to
+"""
+
+import os
+from typing import Dict, List, Optional
+
+from devtools import supports_cdp, emulate_network, set_cpu_throttling
+
+
+# Name used for the metrics record when no profile is applied
+UNTHROTTLED = 'unthrottled'
+
+# Throughput in kbit/s, latency in ms, budgets in ms
+PROFILES = {
+    UNTHROTTLED: {
+        'latency_ms': 0,
+        'download_kbps': -1,
+        'upload_kbps': -1,
+        'cpu_slowdown': 1,
+        'budget': {'ttfb_ms': 500, 'first_contentful_paint_ms': 1500, 'dom_content_loaded_ms': 2000, 'load_ms': 3000},
+    },
+    'hotel-wifi': {
+        'latency_ms': 120,
+        'download_kbps': 2000,
+        'upload_kbps': 500,
+        'cpu_slowdown': 1,
+        'budget': {'ttfb_ms': 800, 'first_contentful_paint_ms': 3000, 'dom_content_loaded_ms': 4000, 'load_ms': 6000},
+    },
+    'slow-4g': {
+        'latency_ms': 150,
+        'download_kbps': 1600,
+        'upload_kbps': 750,
+        'cpu_slowdown': 4,
+        'budget': {'ttfb_ms': 1000, 'first_contentful_paint_ms': 5000, 'dom_content_loaded_ms': 7000, 'load_ms': 10000},
+    },
+    'low-end-mobile': {
+        'latency_ms': 300,
+        'download_kbps': 400,
+        'upload_kbps': 400,
+        'cpu_slowdown': 6,
+        'budget': {'ttfb_ms': 1500, 'first_contentful_paint_ms': 8000, 'dom_content_loaded_ms': 12000, 'load_ms': 18000},
+    },
+}
+
+
+def requested_profiles() -> List[str]:
+    """Profiles listed in EMULATION_PROFILES, validated against the known names"""
+    names = [n.strip() for n in os.getenv('EMULATION_PROFILES', '').split(',') if n.strip()]
+    unknown = [n for n in names if n not in PROFILES]
+    if unknown:
+        raise ValueError(f"Unknown emulation profile(s): {', '.join(unknown)} "
+                         f"(available: {', '.join(PROFILES)})")
+    return names
+
+
+def apply_profile(driver, name: Optional[str]) -> str:
+    """Apply a profile's throttling to a session and return the profile name in effect"""
+    if not name or name == UNTHROTTLED:
+        return UNTHROTTLED
+
+    if not supports_cdp(driver):
+        print(f"⚠ Emulation profile '{name}' needs DevTools throttling (Chrome only), running unthrottled")
+        return UNTHROTTLED
+
+    profile = PROFILES[name]
+    emulate_network(driver, profile['latency_ms'], profile['download_kbps'], profile['upload_kbps'])
+    set_cpu_throttling(driver, profile['cpu_slowdown'])
+    print(f"✓ Applied emulation profile '{name}': {profile['latency_ms']} ms latency, "
+          f"{profile['download_kbps']} kbit/s down, {profile['cpu_slowdown']}x CPU slowdown")
+    return name
+
+
+def profile_budget(name: str) -> Dict:
+    """Page-load budget for a profile"""
+    return PROFILES.get(name, PROFILES[UNTHROTTLED])['budget']
@@ -0,0 +1,127 @@
+"""
+Failure artifacts
+Snapshots the screenshot, DOM, recent console lines and network waterfall into memory when a
+test fails; a background pool compresses and writes them so the run never waits on disk
+"""
+
+import gzip
+import json
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+from devtools import resource_timings
+
+
+ARTIFACT_DIR = os.path.join('reports', 'failures')
+
+
+def failure_artifacts_enabled() -> bool:
+    return os.getenv('FAILURE_ARTIFACTS', 'true').lower() == 'true'
+
+
+def configure_console_log(options):
+    """Ask ChromeDriver to keep every console level, not just errors"""
+    prefs = dict(options.capabilities.get('goog:loggingPrefs', {}), browser='ALL')
+    options.set_capability('goog:loggingPrefs', prefs)
+
+
+def write_artifact(path: str, data, compress: bool):
+    """Runs on the writer pool: encode and write one artifact"""
+    if isinstance(data, (dict, list)):
+        data = json.dumps(data, indent=2)
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if compress:
+        with gzip.open(path, 'wb', compresslevel=6) as f:
+            f.write(data)
+    else:
+        with open(path, 'wb') as f:
+            f.write(data)
+
+
+class FailureArtifacts:
+    """Per-session console ring buffer and failure snapshots handed to a writer pool"""
+
+    def __init__(self, driver, console_lines: int = 200, workers: int = 2):
+        self.driver = driver
+        self.console = deque(maxlen=console_lines)
+        self.console_dropped = 0
+        self.console_supported = True
+        self.writer = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='failure-artifacts')
+        self.pending = []
+
+    def drain_console(self):
+        """Move the browser's pending console entries into the ring buffer"""
+        if not self.console_supported:
+            return
+        try:
+            entries = self.driver.get_log('browser')
+        except Exception:
+            # geckodriver has no log endpoint; keep going without console lines
+            self.console_supported = False
+            return
+        for entry in entries:
+            if len(self.console) == self.console.maxlen:
+                self.console_dropped += 1
+            self.console.append(entry)
+
+    def start_test(self):
+        """Discard console lines logged before the test"""
+        self.drain_console()
+        self.console.clear()
+        self.console_dropped = 0
+
+    def capture(self, nodeid: str) -> Dict[str, str]:
+        """Snapshot the failing page into memory and queue the writes; returns artifact paths by name"""
+        started = time.perf_counter()
+        snapshot = {}
+        for name, grab in (
+            ('screenshot', self.driver.get_screenshot_as_png),
+            ('dom', lambda: self.driver.page_source),
+            ('network', lambda: resource_timings(self.driver)),
+            ('page', lambda: {'url': self.driver.current_url, 'title': self.driver.title}),
+        ):
+            try:
+                snapshot[name] = grab()
+            except Exception as e:
+                print(f"⚠ Could not capture {name} after failure: {e}")
+        self.drain_console()
+        snapshot['console'] = {'dropped': self.console_dropped, 'entries': list(self.console)}
+
+        # Concurrent browser runs share the reports directory; each shard gets its own folder
+        directory = os.path.join(ARTIFACT_DIR, os.getenv('RESULTS_SHARD', ''),
+                                 re.sub(r'[^A-Za-z0-9_.-]+', '_', nodeid).strip('_'))
+        files = {
+            'screenshot': ('Screenshot', 'screenshot.png', False),
+            'dom': ('DOM', 'dom.html.gz', True),
+            'console': ('Console log', 'console.json.gz', True),
+            'network': ('Network waterfall', 'network.json.gz', True),
+        }
+        if snapshot.get('network') is not None and 'page' in snapshot:
+            snapshot['network']['page'] = snapshot['page']
+
+        paths = {}
+        for key, (label, filename, compress) in files.items():
+            if snapshot.get(key) is None:
+                continue
+            path = os.path.join(directory, filename)
+            self.pending.append(self.writer.submit(write_artifact, path, snapshot[key], compress))
+            paths[label] = path
+        print(f"ℹ Failure artifacts snapshotted in {(time.perf_counter() - started) * 1000:.0f} ms, "
+              f"writing {len(paths)} files to {directory} in the background")
+        self.console.clear()
+        self.console_dropped = 0
+        return paths
+
+    def close(self):
+        """Wait for queued writes so the report's links resolve before the run ends"""
+        self.writer.shutdown(wait=True)
+        failed = [f.exception() for f in self.pending if f.exception() is not None]
+        for error in failed:
+            print(f"⚠ Could not write a failure artifact: {error}")
+        self.pending = []
@@ -0,0 +1,235 @@
+"""
+Flake tracker
+Keeps pass/fail history per test, reruns failed tests straight away in the same warm browser
+session with backoff, and moves tests whose history flips too often into a non-blocking
+quarantine lane
+"""
+
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+import pytest
+from _pytest.runner import runtestprotocol
+
+from json_state import load_json, sharded_path, updated_json
+
+
+HISTORY_DIR = '.flake-history'
+DEFAULT_REPORT = os.path.join('reports', 'flakes.json')
+
+# Runs kept per test, and the most recent ones the score looks at
+HISTORY_LENGTH = 50
+SCORE_WINDOW = 20
+
+QUARANTINE_PREFIX = 'quarantined'
+
+
+def flake_settings() -> Dict:
+    return {
+        'reruns': int(os.getenv('FLAKE_RERUNS', '2')),
+        'delay': float(os.getenv('FLAKE_RERUN_DELAY', '1')),
+        'quarantine': os.getenv('FLAKE_QUARANTINE', 'true').lower() == 'true',
+        'threshold': float(os.getenv('FLAKE_QUARANTINE_SCORE', '0.3')),
+        'min_runs': int(os.getenv('FLAKE_MIN_RUNS', '5')),
+    }
+
+
+def browser_history_path(browser: Optional[str] = None) -> str:
+    """One history per browser: a test failing only on firefox is broken there, not flaky"""
+    browser = browser or os.getenv('BROWSER', 'chrome').lower()
+    return os.path.join(HISTORY_DIR, f"history-{browser}.json")
+
+
+def flake_score(runs: List[Dict], min_runs: int) -> Optional[float]:
+    """Share of recent runs that needed a rerun or flipped between pass and fail; None until enough history"""
+    recent = [run for run in runs if run['outcome'] in ('passed', 'flaky', 'failed')][-SCORE_WINDOW:]
+    if len(recent) < min_runs:
+        return None
+    green = [run['outcome'] != 'failed' for run in recent]
+    flips = sum(1 for before, after in zip(green, green[1:]) if before != after)
+    flaky = sum(1 for run in recent if run['outcome'] == 'flaky')
+    # Consistently failing tests score 0: they are broken, not flaky
+    return round(min(1.0, (flaky + flips) / float(len(recent))), 3)
+
+
+def remove_failed_fixture_results(item):
+    """A failed fixture caches its exception; clear it so the rerun sets the fixture up again"""
+    for fixturedefs in item._fixtureinfo.name2fixturedefs.values():
+        for fixturedef in fixturedefs:
+            cached = getattr(fixturedef, 'cached_result', None)
+            if cached is not None and cached[2] is not None:
+                fixturedef.cached_result = None
+
+
+class FlakeTracker:
+    """History store, rerun bookkeeping and quarantine decisions for one session"""
+
+    def __init__(self, history_path: Optional[str] = None, report_path: str = DEFAULT_REPORT,
+                 settings: Optional[Dict] = None):
+        self.history_path = history_path or browser_history_path()
+        self.report_path = report_path
+        self.settings = settings or flake_settings()
+        self.history: Dict[str, List[Dict]] = load_json(self.history_path)
+        self.quarantined: Dict[str, float] = {}
+        self.session_runs: Dict[str, Dict] = {}
+        self.started = time.time()
+        self.rerun_seconds = 0.0
+        self.backoff_seconds = 0.0
+        self.report_written = None
+
+    def score(self, nodeid: str) -> Optional[float]:
+        return flake_score(self.history.get(nodeid, []), self.settings['min_runs'])
+
+    def decide_quarantine(self, items):
+        if not self.settings['quarantine']:
+            return
+        for item in items:
+            score = self.score(item.nodeid)
+            if score is not None and score >= self.settings['threshold']:
+                self.quarantined[item.nodeid] = score
+
+    def run_item(self, item, nextitem) -> List:
+        """Run the test, rerunning failures with exponential backoff; returns every attempt's reports"""
+        attempts = []
+        quarantined = item.nodeid in self.quarantined
+        reruns = 0 if quarantined else self.settings['reruns']
+        for attempt in range(reruns + 1):
+            started = time.perf_counter()
+            reports = runtestprotocol(item, nextitem=nextitem, log=False)
+            if attempt:
+                self.rerun_seconds += time.perf_counter() - started
+            attempts.append(reports)
+            if not any(report.failed for report in reports) or attempt == reruns:
+                break
+            for report in reports:
+                if report.failed:
+                    report.outcome = 'rerun'
+            remove_failed_fixture_results(item)
+            delay = self.settings['delay'] * (2 ** attempt)
+            self.backoff_seconds += delay
+            time.sleep(delay)
+
+        final = attempts[-1]
+        if quarantined and any(report.failed for report in final):
+            for report in final:
+                if report.failed:
+                    # Reported like a non-strict xfail, so the failure is visible but does not fail the run
+                    report.outcome = 'skipped'
+                    report.wasxfail = f"{QUARANTINE_PREFIX} (flake score {self.quarantined[item.nodeid]})"
+        self.record(item.nodeid, attempts, quarantined)
+        return [report for reports in attempts for report in reports]
+
+    def record(self, nodeid: str, attempts: List[List], quarantined: bool):
+        final = attempts[-1]
+        if any(report.failed or getattr(report, 'wasxfail', '').startswith(QUARANTINE_PREFIX) for report in final):
+            outcome = 'failed'
+        elif any(report.skipped for report in final):
+            outcome = 'skipped'
+        else:
+            outcome = 'flaky' if len(attempts) > 1 else 'passed'
+        self.session_runs[nodeid] = {
+            'outcome': outcome,
+            'attempts': len(attempts),
+            'quarantined': quarantined,
+            'duration': round(sum(report.duration for reports in attempts for report in reports), 3),
+        }
+
+    def save(self):
+        """Append this session's runs; other xdist workers may be saving theirs at the same time"""
+        build = os.getenv('BUILD_NUMBER')
+        with updated_json(self.history_path, indent=2, sort_keys=True) as stored:
+            for nodeid, run in self.session_runs.items():
+                if run['outcome'] == 'skipped':
+                    continue
+                runs = stored.setdefault(nodeid, [])
+                runs.append({'outcome': run['outcome'], 'attempts': run['attempts'], 'build': build, 'at': time.time()})
+                del runs[:-HISTORY_LENGTH]
+        self.history = stored
+
+    def summary(self) -> Dict:
+        runs = self.session_runs
+        recovered = sorted(n for n, run in runs.items() if run['outcome'] == 'flaky')
+        still_failing = sorted(n for n, run in runs.items() if run['outcome'] == 'failed' and not run['quarantined'])
+        session_seconds = time.time() - self.started
+        targeted_seconds = self.rerun_seconds + self.backoff_seconds
+        # Without reruns, a recovered flake fails the job and the whole session runs again
+        full_rerun_seconds = session_seconds - targeted_seconds if recovered and not still_failing else 0.0
+        return {
+            'build': os.getenv('BUILD_NUMBER'),
+            'settings': self.settings,
+            'tests': len(runs),
+            'reruns': sum(run['attempts'] - 1 for run in runs.values()),
+            'recovered': recovered,
+            'still_failing': still_failing,
+            'quarantined': {nodeid: {'score': score, 'outcome': runs.get(nodeid, {}).get('outcome')}
+                            for nodeid, score in sorted(self.quarantined.items())},
+            'scores': {nodeid: self.score(nodeid) for nodeid in sorted(runs) if self.score(nodeid)},
+            'targeted_rerun_seconds': round(targeted_seconds, 1),
+            'full_rerun_seconds': round(full_rerun_seconds, 1),
+            'time_saved_seconds': round(max(0.0, full_rerun_seconds - targeted_seconds), 1),
+        }
+
+    def write_report(self) -> str:
+        path = sharded_path(self.report_path)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+        return path
+
+
+tracker: Optional[FlakeTracker] = None
+
+
+def pytest_configure(config):
+    global tracker
+    tracker = None if config.getoption('collectonly') else FlakeTracker()
+
+
+def pytest_collection_modifyitems(session, config, items):
+    if tracker is not None:
+        tracker.decide_quarantine(items)
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_protocol(item, nextitem):
+    if tracker is None:
+        return None
+    item.ihook.pytest_runtest_logstart(nodeid=item.nodeid, location=item.location)
+    for report in tracker.run_item(item, nextitem):
+        item.ihook.pytest_runtest_logreport(report=report)
+    item.ihook.pytest_runtest_logfinish(nodeid=item.nodeid, location=item.location)
+    return True
+
+
+def pytest_report_teststatus(report, config):
+    if report.outcome == 'rerun':
+        return 'rerun', 'R', ('RERUN', {'yellow': True})
+    if report.skipped and getattr(report, 'wasxfail', '').startswith(QUARANTINE_PREFIX):
+        return 'quarantined', 'Q', ('QUARANTINED', {'yellow': True})
+
+
+def pytest_sessionfinish(session, exitstatus):
+    # Under xdist each worker reruns and records its own tests
+    if tracker is not None and tracker.session_runs:
+        tracker.save()
+        tracker.report_written = tracker.write_report()
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    if tracker is None or not tracker.session_runs:
+        return
+    summary = tracker.summary()
+    terminalreporter.write_line(f"ℹ Flakes: {summary['reruns']} reruns, {len(summary['recovered'])} recovered, "
+                                f"{len(summary['still_failing'])} still failing, "
+                                f"{len(summary['quarantined'])} quarantined")
+    for nodeid in summary['recovered']:
+        terminalreporter.write_line(f"  ⚠ flaky: {nodeid} ({tracker.session_runs[nodeid]['attempts']} attempts)")
+    for nodeid, quarantined in summary['quarantined'].items():
+        terminalreporter.write_line(f"  ⚠ quarantined: {nodeid} (score {quarantined['score']}, {quarantined['outcome']})")
+    if summary['full_rerun_seconds']:
+        terminalreporter.write_line(f"✓ Targeted reruns took {summary['targeted_rerun_seconds']:.0f}s instead of "
+                                    f"a {summary['full_rerun_seconds']:.0f}s full rerun "
+                                    f"(saved {summary['time_saved_seconds']:.0f}s)")
+    terminalreporter.write_line(f"✓ Flake report written to {tracker.report_written}")
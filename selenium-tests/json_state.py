@@ -0,0 +1,64 @@
+"""
+Shared JSON state files
+Read-merge-write of the caches that several pytest processes (xdist workers, matrix browsers)
+update at the end of a session, under a file lock and replaced atomically so that readers never
+see half a file, and per-process names for the reports each of them writes
+"""
+
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Dict
+
+try:
+    import fcntl
+except ImportError:  # Windows: no lock, the atomic replace still keeps the file whole
+    fcntl = None
+
+
+# Set by run_tests.py for each matrix browser and by pytest-xdist for each worker
+SHARD_VARIABLES = ('RESULTS_SHARD', 'PYTEST_XDIST_WORKER')
+
+
+def load_json(path: str) -> Dict:
+    """Stored state, or an empty dict when the file is missing or unreadable"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠ Ignoring unreadable {path}: {e}")
+        return {}
+
+
+def sharded_path(path: str) -> str:
+    """path with this process's browser shard and xdist worker, e.g. reports/flakes-firefox-gw1.json"""
+    suffix = ''.join(f"-{os.environ[name]}" for name in SHARD_VARIABLES if os.getenv(name))
+    root, extension = os.path.splitext(path)
+    return f"{root}{suffix}{extension}"
+
+
+@contextmanager
+def updated_json(path: str, **dump_options):
+    """Yield the stored dict under an exclusive lock, then write it back with an atomic replace"""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    with open(f"{path}.lock", 'a') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            stored = load_json(path)
+            yield stored
+            descriptor, temporary = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.")
+            try:
+                with os.fdopen(descriptor, 'w') as f:
+                    json.dump(stored, f, **dump_options)
+                os.replace(temporary, path)
+            except BaseException:
+                os.remove(temporary)
+                raise
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
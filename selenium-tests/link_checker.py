@@ -0,0 +1,186 @@
+"""
+SmartHotel360 link and asset checker
+Collects every href/src the rendered routes reference and checks them concurrently over
+pooled connections, with per-host limits and an on-disk TTL cache of healthy links.
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import urldefrag, urlparse
+
+import requests
+
+from selenium.webdriver.support.ui import WebDriverWait
+
+from asset_audit import create_session
+from json_state import load_json, sharded_path, updated_json
+
+
+DEFAULT_CACHE = os.path.join('.link-cache', 'links.json')
+DEFAULT_REPORT = os.path.join('reports', 'link-check.json')
+
+# Every link-like attribute in the rendered DOM, resolved to absolute URLs by the browser
+LINK_SNAPSHOT_SCRIPT = """
+var urls = [];
+document.querySelectorAll('[href], [src], [srcset]').forEach(function (el) {
+    if (el.href && typeof el.href === 'string') { urls.push(el.href); }
+    if (el.src && typeof el.src === 'string') { urls.push(el.src); }
+    if (el.srcset) {
+        el.srcset.split(',').forEach(function (candidate) {
+            var url = candidate.trim().split(/\\s+/)[0];
+            if (url) { urls.push(new URL(url, document.baseURI).href); }
+        });
+    }
+});
+return urls;
+"""
+
+LINK_COUNT_SCRIPT = "return document.readyState === 'complete' ? document.querySelectorAll('[href], [src]').length : -1;"
+
+CHECKED_SCHEMES = ('http', 'https')
+
+# Servers that reject HEAD answer with one of these; retry with a one-byte ranged GET
+HEAD_UNSUPPORTED = {403, 405, 501}
+
+
+def link_cache_ttl() -> float:
+    """Seconds a healthy link stays cached"""
+    return float(os.getenv('LINK_CACHE_TTL_HOURS', '24')) * 3600
+
+
+def wait_for_rendered_links(driver, timeout: float = 15):
+    """Wait until the document loaded and the SPA stopped adding link-bearing elements"""
+    counts = []
+
+    def settled(d):
+        counts.append(d.execute_script(LINK_COUNT_SCRIPT))
+        return len(counts) > 1 and counts[-1] > 0 and counts[-1] == counts[-2]
+
+    WebDriverWait(driver, timeout, poll_frequency=0.5).until(settled)
+
+
+def snapshot_links(driver, base_url: str, routes: List[str]) -> Dict[str, List[str]]:
+    """Unique checkable URLs mapped to the routes that reference them"""
+    links: Dict[str, List[str]] = {}
+    for route in routes:
+        driver.get(f"{base_url}{route}" if route != '/' else base_url)
+        wait_for_rendered_links(driver)
+        for url in driver.execute_script(LINK_SNAPSHOT_SCRIPT):
+            url = urldefrag(url)[0]
+            if urlparse(url).scheme not in CHECKED_SCHEMES:
+                continue
+            pages = links.setdefault(url, [])
+            if route not in pages:
+                pages.append(route)
+    return links
+
+
+class LinkChecker:
+    """HEAD-first link checks with a global worker pool and per-host concurrency limits"""
+
+    def __init__(self, workers: int = 16, per_host: int = 4, timeout: float = 15):
+        self.session = create_session(workers)
+        self.workers = workers
+        self.per_host = per_host
+        self.timeout = timeout
+        self.host_slots: Dict[str, threading.Semaphore] = {}
+        self.lock = threading.Lock()
+
+    def slot(self, url: str) -> threading.Semaphore:
+        host = urlparse(url).netloc
+        with self.lock:
+            if host not in self.host_slots:
+                self.host_slots[host] = threading.Semaphore(self.per_host)
+            return self.host_slots[host]
+
+    def check(self, url: str) -> Dict:
+        with self.slot(url):
+            start = time.time()
+            method = 'HEAD'
+            try:
+                response = self.session.head(url, timeout=self.timeout, allow_redirects=True)
+                if response.status_code in HEAD_UNSUPPORTED:
+                    method = 'GET'
+                    response = self.session.get(url, timeout=self.timeout, allow_redirects=True,
+                                                headers={'Range': 'bytes=0-0'}, stream=True)
+                    response.close()
+            except requests.exceptions.RequestException as e:
+                return {'url': url, 'ok': False, 'error': str(e), 'method': method,
+                        'latency_ms': round((time.time() - start) * 1000, 1)}
+
+        return {
+            'url': url,
+            'ok': response.status_code < 400,
+            'status': response.status_code,
+            'method': method,
+            'final_url': response.url if response.url != url else None,
+            'latency_ms': round((time.time() - start) * 1000, 1),
+        }
+
+    def check_all(self, urls: List[str]) -> List[Dict]:
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(self.check, urls))
+
+
+def check_links(driver, base_url: str, routes: List[str], cache_path: str = DEFAULT_CACHE,
+                report_path: str = DEFAULT_REPORT, workers: int = 16, per_host: int = 4,
+                slow_ms: float = 2000, ttl: Optional[float] = None) -> Dict:
+    """Snapshot links on every route, check the ones not cached as healthy, and write the report"""
+    ttl = link_cache_ttl() if ttl is None else ttl
+    links = snapshot_links(driver, base_url, routes)
+
+    now = time.time()
+    cache = {url: entry for url, entry in load_json(cache_path).items() if now - entry['checked_at'] < ttl}
+    pending = [url for url in links if url not in cache]
+    print(f"ℹ {len(links)} unique links on {len(routes)} routes, "
+          f"{len(links) - len(pending)} cached as healthy, checking {len(pending)}")
+
+    checked = LinkChecker(workers, per_host).check_all(pending)
+    for result in checked:
+        result['checked_at'] = now
+
+    results = [dict(r, cached=False) for r in checked] + \
+              [dict(cache[url], cached=True) for url in links if url not in pending]
+    for result in results:
+        result['pages'] = links[result['url']]
+    results.sort(key=lambda r: r['url'])
+
+    broken = [r for r in results if not r['ok']]
+    slow = [r for r in results if r['ok'] and not r['cached'] and r['latency_ms'] > slow_ms]
+
+    report = {
+        'build': os.getenv('BUILD_NUMBER'),
+        'base_url': base_url,
+        'routes': routes,
+        'checked': len(checked),
+        'cached': len(results) - len(checked),
+        'broken': broken,
+        'slow': slow,
+        'slow_threshold_ms': slow_ms,
+        'links': results,
+    }
+    report_path = sharded_path(report_path)
+    os.makedirs(os.path.dirname(report_path) or '.', exist_ok=True)
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    with updated_json(cache_path, indent=2) as stored:
+        # Other processes may have cached links since this one read the file; keep their fresh entries
+        for url in [url for url, entry in stored.items() if now - entry['checked_at'] >= ttl]:
+            del stored[url]
+        for result in checked:
+            # Only healthy links are cached, so broken ones are rechecked every build
+            if result['ok']:
+                stored[result['url']] = result
+            else:
+                stored.pop(result['url'], None)
+
+    for r in broken:
+        print(f"✗ {r['url']} ({r.get('status') or r.get('error')}, {r['latency_ms']:.0f} ms) on {', '.join(r['pages'])}")
+    for r in slow:
+        print(f"⚠ {r['url']} took {r['latency_ms']:.0f} ms (threshold {slow_ms:.0f} ms)")
+    print(f"✓ Link check written to {report_path}: {len(broken)} broken, {len(slow)} slow")
+    return report
@@ -0,0 +1,336 @@
+"""
+Local HTTP proxy that browser sessions can be routed through
+Records backend API traffic to a HAR archive, or replays it so UI runs do not
+depend on live backend latency, and injects latency, bandwidth caps, dropped
+connections and error codes per URL pattern for resilience tests.
+"""
+
+import base64
+import json
+import os
+import re
+import select
+import socket
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+
+PROXY_MODES = ('passthrough', 'record', 'replay')
+
+# Requests to the SmartHotel360 backend; everything else is passed through untouched
+DEFAULT_API_PATTERN = r'/api/'
+
+DEFAULT_ARCHIVE = os.path.join('recordings', 'api.har')
+
+HOP_BY_HOP_HEADERS = {
+    'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization', 'proxy-connection',
+    'te', 'trailers', 'transfer-encoding', 'upgrade', 'content-length',
+}
+
+
+def har_headers(headers) -> List[Dict]:
+    """Headers as a HAR name/value list"""
+    return [{'name': k, 'value': v} for k, v in headers.items()]
+
+
+class FaultRule:
+    """A fault applied to requests whose URL matches a pattern"""
+
+    def __init__(self, pattern: str, latency_ms: float = 0, bandwidth_kbps: Optional[float] = None,
+                 status: Optional[int] = None, drop: bool = False, hang: bool = False,
+                 methods: Optional[List[str]] = None, hang_timeout: float = 120):
+        self.pattern = re.compile(pattern, re.IGNORECASE)
+        self.latency_ms = latency_ms
+        self.bandwidth_kbps = bandwidth_kbps
+        self.status = status
+        self.drop = drop
+        self.hang = hang
+        self.methods = [m.upper() for m in methods] if methods else None
+        self.hang_timeout = hang_timeout
+        self.released = threading.Event()
+        self.hits = 0
+
+    def matches(self, method: str, url: str) -> bool:
+        return (self.methods is None or method in self.methods) and bool(self.pattern.search(url))
+
+    def __repr__(self):
+        effects = [f"{k}={v}" for k, v in (
+            ('latency_ms', self.latency_ms), ('bandwidth_kbps', self.bandwidth_kbps),
+            ('status', self.status), ('drop', self.drop), ('hang', self.hang)) if v]
+        return f"FaultRule({self.pattern.pattern!r}, {', '.join(effects)})"
+
+
+def load_archive(path: str) -> Dict[Tuple[str, str], deque]:
+    """Recorded responses keyed by method and URL, in recording order"""
+    with open(path) as f:
+        har = json.load(f)
+    responses = {}
+    for entry in har['log']['entries']:
+        key = (entry['request']['method'], entry['request']['url'])
+        responses.setdefault(key, deque()).append(entry)
+    return responses
+
+
+class ProxyRequestHandler(BaseHTTPRequestHandler):
+    """Forwards plain HTTP requests through the proxy's pipeline and tunnels CONNECT"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_CONNECT(self):
+        """Tunnel HTTPS untouched; only plain HTTP traffic is recorded or replayed"""
+        host, _, port = self.path.partition(':')
+        try:
+            upstream = socket.create_connection((host, int(port or 443)), timeout=30)
+        except OSError:
+            self.send_error(502)
+            return
+        self.send_response(200, 'Connection Established')
+        self.end_headers()
+
+        sockets = [self.connection, upstream]
+        try:
+            while True:
+                readable, _, errored = select.select(sockets, [], sockets, 30)
+                if errored or not readable:
+                    break
+                for sock in readable:
+                    data = sock.recv(65536)
+                    if not data:
+                        return
+                    (upstream if sock is self.connection else self.connection).sendall(data)
+        finally:
+            upstream.close()
+
+    def handle_proxied(self):
+        url = self.path
+        if not url.startswith('http'):
+            url = f"http://{self.headers['Host']}{self.path}"
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+
+        status, headers, payload, bandwidth_kbps = self.server.proxy.handle(self.command, url, dict(self.headers), body)
+        if status is None:
+            # Dropped connection: close the socket without answering
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)
+            return
+
+        self.send_response_only(status)
+        for name, value in headers:
+            if name.lower() not in HOP_BY_HOP_HEADERS:
+                self.send_header(name, value)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        if self.command == 'HEAD':
+            return
+        if not bandwidth_kbps:
+            self.wfile.write(payload)
+            return
+
+        # Bandwidth cap: write in 100 ms slices of the allowed byte rate
+        chunk = max(1, int(bandwidth_kbps * 1024 / 8 / 10))
+        for offset in range(0, len(payload), chunk):
+            self.wfile.write(payload[offset:offset + chunk])
+            self.wfile.flush()
+            time.sleep(0.1)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_HEAD = do_OPTIONS = handle_proxied
+
+
+class LocalProxy:
+    """Threaded local proxy with HAR record/replay of backend API calls and fault injection"""
+
+    def __init__(self, mode: str, archive_path: str = DEFAULT_ARCHIVE, api_pattern: str = DEFAULT_API_PATTERN,
+                 replay_latency: bool = False, bind_host: str = '127.0.0.1', port: int = 0):
+        if mode not in PROXY_MODES:
+            raise ValueError(f"Unsupported proxy mode: {mode}")
+        self.mode = mode
+        self.archive_path = archive_path
+        self.api_pattern = re.compile(api_pattern)
+        self.replay_latency = replay_latency
+        self.entries: List[Dict] = []
+        self.misses: List[str] = []
+        self.faults: List[FaultRule] = []
+        self.lock = threading.Lock()
+
+        self.session = requests.Session()
+        self.session.trust_env = False
+
+        self.recorded = {}
+        if mode == 'replay':
+            if not os.path.exists(archive_path):
+                raise FileNotFoundError(f"No API recording at {archive_path}; run once with record mode first")
+            self.recorded = load_archive(archive_path)
+
+        self.server = ThreadingHTTPServer((bind_host, port), ProxyRequestHandler)
+        self.server.daemon_threads = True
+        self.server.proxy = self
+        self.thread = None
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        print(f"✓ Local proxy listening on port {self.port} ({self.mode} mode, API pattern '{self.api_pattern.pattern}')")
+
+    def stop(self):
+        self.clear_faults()
+        self.server.shutdown()
+        self.server.server_close()
+        if self.mode == 'record':
+            self.save()
+        elif self.misses:
+            print(f"⚠ {len(self.misses)} API requests had no recording, e.g. {self.misses[0]}")
+
+    def set_faults(self, rules: List[FaultRule]):
+        """Replace the active fault rules; the first matching rule wins"""
+        self.clear_faults()
+        # Rules live in marker args and come back for reruns and parametrized runs of the same test
+        for rule in rules:
+            rule.released.clear()
+            rule.hits = 0
+        with self.lock:
+            self.faults = list(rules)
+        if rules:
+            print(f"ℹ Fault scenario active: {', '.join(repr(r) for r in rules)}")
+
+    def clear_faults(self):
+        """Remove all fault rules and release any requests they keep hanging"""
+        with self.lock:
+            rules, self.faults = self.faults, []
+        for rule in rules:
+            rule.released.set()
+
+    def match_fault(self, method: str, url: str) -> Optional[FaultRule]:
+        with self.lock:
+            for rule in self.faults:
+                if rule.matches(method, url):
+                    rule.hits += 1
+                    return rule
+        return None
+
+    def handle(self, method: str, url: str, headers: Dict, body: bytes):
+        """Answer one proxied request; returns status (None to drop), header list, body and bandwidth cap"""
+        rule = self.match_fault(method, url)
+        if rule is not None:
+            if rule.hang:
+                # Hold the request open until the scenario ends, then drop it
+                rule.released.wait(rule.hang_timeout)
+                return None, [], b'', None
+            if rule.drop:
+                return None, [], b'', None
+            if rule.latency_ms:
+                time.sleep(rule.latency_ms / 1000.0)
+            if rule.status:
+                payload = json.dumps({'error': f"Injected fault {rule.status}"}).encode()
+                return rule.status, [('Content-Type', 'application/json')], payload, rule.bandwidth_kbps
+
+        is_api = bool(self.api_pattern.search(url))
+        if is_api and self.mode == 'replay':
+            status, response_headers, payload = self.replay(method, url)
+        else:
+            status, response_headers, payload = self.forward(method, url, headers, body,
+                                                             record=is_api and self.mode == 'record')
+        return status, response_headers, payload, rule.bandwidth_kbps if rule else None
+
+    def forward(self, method: str, url: str, headers: Dict, body: bytes, record: bool = False):
+        """Send the request upstream and optionally record the exchange"""
+        headers = {k: v for k, v in headers.items() if k.lower() not in HOP_BY_HOP_HEADERS}
+        if record:
+            # Plain bodies keep the archive readable and replayable without decoding
+            headers['Accept-Encoding'] = 'identity'
+
+        started = time.time()
+        try:
+            response = self.session.request(method, url, headers=headers, data=body or None,
+                                            stream=True, allow_redirects=False, timeout=60)
+            payload = response.raw.read(decode_content=False)
+        except requests.exceptions.RequestException as e:
+            return 502, [('Content-Type', 'text/plain')], f"Proxy upstream error: {e}".encode()
+        elapsed_ms = (time.time() - started) * 1000
+
+        response_headers = list(response.raw.headers.items())
+        if record:
+            self.record(method, url, headers, body, response.status_code, response_headers, payload, started, elapsed_ms)
+        return response.status_code, response_headers, payload
+
+    def record(self, method, url, request_headers, request_body, status, response_headers, payload, started, elapsed_ms):
+        content_type = dict((k.lower(), v) for k, v in response_headers).get('content-type', '')
+        entry = {
+            'startedDateTime': datetime.fromtimestamp(started, timezone.utc).isoformat(),
+            'time': round(elapsed_ms, 1),
+            'request': {
+                'method': method,
+                'url': url,
+                'headers': har_headers(request_headers),
+                'bodySize': len(request_body),
+            },
+            'response': {
+                'status': status,
+                'headers': [{'name': k, 'value': v} for k, v in response_headers],
+                'content': {
+                    'size': len(payload),
+                    'mimeType': content_type,
+                    'text': base64.b64encode(payload).decode('ascii'),
+                    'encoding': 'base64',
+                },
+            },
+            'timings': {'send': 0, 'wait': round(elapsed_ms, 1), 'receive': 0},
+        }
+        with self.lock:
+            self.entries.append(entry)
+
+    def replay(self, method: str, url: str):
+        """Serve a recorded response, cycling through repeats of the same request"""
+        with self.lock:
+            candidates = self.recorded.get((method, url))
+            if not candidates:
+                self.misses.append(f"{method} {url}")
+                return 504, [('Content-Type', 'text/plain')], f"No recording for {method} {url}".encode()
+            entry = candidates[0]
+            candidates.rotate(-1)
+
+        if self.replay_latency:
+            time.sleep(entry['time'] / 1000.0)
+
+        content = entry['response']['content']
+        payload = base64.b64decode(content['text']) if content.get('encoding') == 'base64' else content.get('text', '').encode()
+        headers = [(h['name'], h['value']) for h in entry['response']['headers']]
+        return entry['response']['status'], headers, payload
+
+    def save(self):
+        """Write recorded API exchanges as a HAR 1.2 archive"""
+        os.makedirs(os.path.dirname(self.archive_path) or '.', exist_ok=True)
+        with open(self.archive_path, 'w') as f:
+            json.dump({'log': {
+                'version': '1.2',
+                'creator': {'name': 'smarthotel360-selenium-tests', 'version': '1.0'},
+                'entries': self.entries,
+            }}, f, indent=2)
+        print(f"✓ Recorded {len(self.entries)} API responses to {self.archive_path}")
+
+
+def configure_browser_proxy(options, browser: str, host: str, port: int):
+    """Route a browser's HTTP(S) traffic, including localhost, through the proxy"""
+    if browser == 'chrome':
+        options.add_argument(f"--proxy-server=http://{host}:{port}")
+        options.add_argument("--proxy-bypass-list=<-loopback>")
+    elif browser == 'firefox':
+        options.set_preference('network.proxy.type', 1)
+        options.set_preference('network.proxy.http', host)
+        options.set_preference('network.proxy.http_port', port)
+        options.set_preference('network.proxy.ssl', host)
+        options.set_preference('network.proxy.ssl_port', port)
+        options.set_preference('network.proxy.allow_hijacking_localhost', True)
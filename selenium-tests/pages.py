@@ -0,0 +1,337 @@
+"""
+SmartHotel360 page objects
+Lazily resolved element handles, cached per DOM version and re-resolved on stale references
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
+from selenium.webdriver.common.by import By
+
+
+NAVIGATION_METHODS = ('get', 'back', 'forward', 'refresh')
+
+# Element interactions that may move the SPA to another route without a driver navigation
+ROUTING_INTERACTIONS = ('click', 'submit', 'send_keys')
+
+
+class LookupStats:
+    """Counts element lookups against the ones the cache answered, and the URL reads it cost"""
+
+    def __init__(self):
+        self.lookups = 0
+        self.cache_hits = 0
+        self.avoided = 0
+        self.url_checks = 0
+        self.stale_refreshes = 0
+
+    @property
+    def commands_saved(self) -> int:
+        return self.avoided - self.url_checks
+
+    def as_dict(self) -> Dict:
+        return {
+            'lookups': self.lookups,
+            'cache_hits': self.cache_hits,
+            'lookups_avoided': self.avoided,
+            'url_checks': self.url_checks,
+            'commands_saved': self.commands_saved,
+            'stale_refreshes': self.stale_refreshes,
+        }
+
+    def __repr__(self):
+        return (f"{self.lookups} lookups, {self.cache_hits} cache hits ({self.avoided} lookups avoided, "
+                f"{self.url_checks} URL checks, {self.commands_saved} commands saved), "
+                f"{self.stale_refreshes} stale refreshes")
+
+
+class ElementCache:
+    """Resolved elements of one browser session, dropped whenever the page or in-app route changes"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.dom_version = 0
+        self.url = None
+        # The URL is read once after a navigation or interaction, not on every lookup
+        self.url_unknown = True
+        self.entries: Dict[Tuple, Tuple[int, List, int]] = {}
+        self.stats = LookupStats()
+
+    def resolve(self, locators: Tuple, refresh: bool = False) -> List:
+        """Elements matched by the first locator that matches anything"""
+        if self.url_unknown:
+            self.check_route()
+        entry = self.entries.get(locators)
+        if entry and entry[0] == self.dom_version and not refresh:
+            self.stats.cache_hits += 1
+            self.stats.avoided += entry[2]
+            return entry[1]
+
+        elements, attempts = [], 0
+        for locator in locators:
+            attempts += 1
+            self.stats.lookups += 1
+            elements = self.driver.find_elements(*locator) if attempts == 1 else self.probe(locator)
+            if elements:
+                break
+        # Empty results are not cached: the SPA may still render the element
+        if elements:
+            self.entries[locators] = (self.dom_version, elements, attempts)
+        else:
+            self.entries.pop(locators, None)
+        return elements
+
+    def probe(self, locator: Tuple) -> List:
+        """Fallback lookup without the implicit wait; the first locator already waited for the view to render"""
+        implicit_wait = self.driver.timeouts.implicit_wait
+        self.driver.implicitly_wait(0)
+        try:
+            return self.driver.find_elements(*locator)
+        finally:
+            self.driver.implicitly_wait(implicit_wait)
+
+    def check_route(self):
+        """Drop the cache when in-app navigation (link clicks, pushState) rendered a new view"""
+        self.stats.url_checks += 1
+        url = self.driver.current_url
+        if url != self.url:
+            self.invalidate()
+            self.url = url
+        self.url_unknown = False
+
+    def interacted(self):
+        """An element action may have changed the route; check it before the next lookup"""
+        self.url_unknown = True
+
+    def invalidate(self):
+        self.dom_version += 1
+        self.entries.clear()
+        self.url_unknown = True
+
+
+def element_cache(driver) -> ElementCache:
+    """The session's element cache, bumping its DOM version on every navigation"""
+    cache = getattr(driver, 'element_cache', None)
+    if cache is not None:
+        return cache
+
+    cache = ElementCache(driver)
+    for name in NAVIGATION_METHODS:
+        original = getattr(driver, name)
+
+        def navigate(*args, _original=original, **kwargs):
+            cache.invalidate()
+            return _original(*args, **kwargs)
+
+        setattr(driver, name, navigate)
+    driver.element_cache = cache
+    return cache
+
+
+class CachedElement:
+    """WebElement proxy that re-resolves its locators once when the element has gone stale"""
+
+    def __init__(self, cache: ElementCache, locators: Tuple, index: int, element):
+        self._cache = cache
+        self._locators = locators
+        self._index = index
+        self._element = element
+
+    def _refresh(self):
+        entry = self._cache.entries.get(self._locators)
+        if (entry and entry[0] == self._cache.dom_version and len(entry[1]) > self._index
+                and entry[1][self._index] is not self._element):
+            # A sibling handle from the same list already re-resolved it
+            elements = entry[1]
+        else:
+            self._cache.stats.stale_refreshes += 1
+            elements = self._cache.resolve(self._locators, refresh=True)
+        if len(elements) <= self._index:
+            raise NoSuchElementException(f"{self._locators[0][1]} disappeared after the DOM changed")
+        self._element = elements[self._index]
+
+    def __getattr__(self, name):
+        try:
+            attribute = getattr(self._element, name)
+        except StaleElementReferenceException:
+            self._refresh()
+            attribute = getattr(self._element, name)
+        if not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            if name in ROUTING_INTERACTIONS:
+                self._cache.interacted()
+            try:
+                return getattr(self._element, name)(*args, **kwargs)
+            except StaleElementReferenceException:
+                self._refresh()
+                return getattr(self._element, name)(*args, **kwargs)
+
+        return call
+
+    @property
+    def web_element(self):
+        """The underlying WebElement, e.g. for expected conditions"""
+        return self._element
+
+
+class Element:
+    """Page object attribute resolving to the first match of its fallback locators"""
+
+    def __init__(self, *locators: Tuple[str, str], cached: bool = True):
+        self.locators = locators
+        # Lists that change without a navigation (suggestions, date cells) are looked up every time
+        self.cached = cached
+
+    def __get__(self, page, owner=None):
+        if page is None:
+            return self
+        elements = page.cache.resolve(self.locators, refresh=not self.cached)
+        if not elements:
+            raise NoSuchElementException(f"No element matches {self.locators}")
+        return CachedElement(page.cache, self.locators, 0, elements[0])
+
+
+class Elements(Element):
+    """Page object attribute resolving to every match of its fallback locators (possibly none)"""
+
+    def __get__(self, page, owner=None):
+        if page is None:
+            return self
+        return [CachedElement(page.cache, self.locators, i, element)
+                for i, element in enumerate(page.cache.resolve(self.locators, refresh=not self.cached))]
+
+
+class Page:
+    """Base page object: a route plus element descriptors sharing the session cache"""
+
+    path = '/'
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.cache = element_cache(driver)
+
+    @property
+    def stats(self) -> LookupStats:
+        return self.cache.stats
+
+    @property
+    def url(self) -> str:
+        return f"{self.driver.base_url}{self.path}" if self.path != '/' else self.driver.base_url
+
+    def open(self):
+        self.driver.get(self.url)
+        return self
+
+    def has(self, name: str) -> bool:
+        """Whether the named element is on the page, without raising"""
+        descriptor = getattr(type(self), name)
+        return bool(self.cache.resolve(descriptor.locators, refresh=not descriptor.cached))
+
+    @staticmethod
+    def visible(elements: List) -> Optional[CachedElement]:
+        """First displayed element of a list"""
+        for element in elements:
+            if element.is_displayed():
+                return element
+        return None
+
+
+class NavMenu(Page):
+    """Top navigation bar shared by every route"""
+
+    container = Element((By.CLASS_NAME, "sh-nav_menu"))
+    logo = Element(
+        (By.CLASS_NAME, "sh-nav_menu-logo"),
+        (By.CSS_SELECTOR, "img[src*='logo']"),
+        (By.CSS_SELECTOR, ".sh-nav_menu-container img"),
+    )
+    pets_links = Elements((By.CSS_SELECTOR, "a[href*='Pets']"), cached=False)
+
+
+class SearchWidget(Page):
+    """Smart Room / Conference Room search form"""
+
+    root = Element((By.CLASS_NAME, "sh-search"))
+    tabs = Elements((By.CLASS_NAME, "sh-search-tab"))
+    groups = Elements((By.CLASS_NAME, "sh-search-group"))
+    where_input = Element(
+        (By.CSS_SELECTOR, "input[placeholder*='Where']"),
+        (By.CSS_SELECTOR, "[ref='whereinput']"),
+        (By.CSS_SELECTOR, ".sh-search-input"),
+    )
+    options = Elements((By.CLASS_NAME, "sh-search-option"), cached=False)
+    available_days = Elements(
+        (By.CSS_SELECTOR, ".react-datepicker__day:not(.react-datepicker__day--disabled)"
+                          ":not(.react-datepicker__day--outside-month)"),
+        cached=False,
+    )
+    find_button = Element(
+        (By.CLASS_NAME, "sh-search-button"),
+        (By.CSS_SELECTOR, "a[href*='SearchRooms']"),
+        (By.PARTIAL_LINK_TEXT, "Find"),
+    )
+    guests_panel = Element((By.CLASS_NAME, "sh-guests"))
+    guest_room_buttons = Elements((By.CSS_SELECTOR, "button[class*='increment'], .sh-guests-room_button"))
+    guest_rooms = Elements((By.CLASS_NAME, "sh-guests-room"))
+    guest_extra_buttons = Elements((By.CSS_SELECTOR, "button[class*='guest'][class*='extra'], .sh-guests-extra_button"))
+    pets_links = Elements((By.CSS_SELECTOR, "a[href*='Pets'], .sh-guests-pets_link"), cached=False)
+
+    def tab(self, label: str) -> Optional[CachedElement]:
+        """Search tab whose text contains label"""
+        for tab in self.tabs:
+            if label.lower() in tab.text.lower():
+                return tab
+        return None
+
+    def open_group(self, index: int) -> bool:
+        """Click the where/when/guests group at index; False when the widget has fewer groups"""
+        groups = self.groups
+        if len(groups) <= index:
+            return False
+        groups[index].click()
+        return True
+
+    def find_button_disabled(self) -> bool:
+        return "disabled" in (self.find_button.get_attribute("class") or "").lower()
+
+
+class HomePage(Page):
+    """Landing page with hero, search widget and feature sections"""
+
+    path = '/'
+    hero_title = Element((By.CLASS_NAME, "sh-hero-title"))
+    hero_buttons = Elements((By.CLASS_NAME, "sh-hero-button"))
+
+    def __init__(self, driver):
+        super().__init__(driver)
+        self.nav = NavMenu(driver)
+        self.search = SearchWidget(driver)
+
+
+class PetsPage(Page):
+    """Pet photo upload and approval page"""
+
+    path = '/Pets'
+    uploader = Element((By.CLASS_NAME, "sh-uploader"))
+    file_inputs = Elements((By.CSS_SELECTOR, "input[type='file']"))
+    name_inputs = Elements((By.CSS_SELECTOR, "input[placeholder*='name'], input[name*='name'], input[id*='name']"))
+
+    def __init__(self, driver):
+        super().__init__(driver)
+        self.nav = NavMenu(driver)
+
+
+class SearchRoomsPage(Page):
+    """Room search results"""
+
+    path = '/SearchRooms'
+    root = Element((By.CLASS_NAME, "sh-search_rooms"))
+    title = Element((By.CLASS_NAME, "sh-rooms-title"))
+    rooms = Elements((By.CLASS_NAME, "sh-rooms-item"))
+
+    def __init__(self, driver):
+        super().__init__(driver)
+        self.nav = NavMenu(driver)
+        self.search = SearchWidget(driver)
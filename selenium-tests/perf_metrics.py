@@ -0,0 +1,118 @@
+"""
+Page-load performance metrics per emulation profile
+Records navigation timing after every driver.get and checks it against the profile budget
+"""
+
+import json
+import os
+import statistics
+import time
+from typing import Dict, List
+from urllib.parse import urlparse
+
+from emulation import profile_budget
+
+
+PAGE_METRICS_SCRIPT = """
+var nav = performance.getEntriesByType('navigation')[0];
+var fcp = performance.getEntriesByName('first-contentful-paint')[0];
+if (!nav) { return null; }
+return {
+    ttfb_ms: nav.responseStart,
+    first_contentful_paint_ms: fcp ? fcp.startTime : null,
+    dom_content_loaded_ms: nav.domContentLoadedEventEnd,
+    load_ms: nav.loadEventEnd,
+    transfer_bytes: nav.transferSize,
+    time_origin: performance.timeOrigin
+};
+"""
+
+METRICS_DIR = 'reports'
+
+
+class PageMetricsRecorder:
+    """Collects navigation timings for one emulation profile and writes its record"""
+
+    def __init__(self, profile: str):
+        self.profile = profile
+        self.budget = profile_budget(profile)
+        self.samples: List[Dict] = []
+        self.last_origin = None
+
+    def record(self, driver, url: str):
+        """Capture timing for the document that the last navigation loaded"""
+        try:
+            metrics = driver.execute_script(PAGE_METRICS_SCRIPT)
+        except Exception as e:
+            print(f"⚠ Could not read page metrics for {url}: {e}")
+            return
+        if not metrics:
+            return
+        # Same document as the last sample: the navigation was answered without a page load (soft reset)
+        origin = metrics.pop('time_origin', None)
+        if origin is not None and origin == self.last_origin:
+            return
+        self.last_origin = origin
+
+        sample = {
+            'test': os.getenv('PYTEST_CURRENT_TEST', '').split(' ')[0],
+            'route': urlparse(url).path or '/',
+            'timestamp': time.time(),
+        }
+        sample.update({k: round(v, 1) if isinstance(v, float) else v for k, v in metrics.items()})
+        sample['over_budget'] = [
+            metric for metric, limit in self.budget.items()
+            if sample.get(metric) is not None and sample[metric] > limit
+        ]
+        self.samples.append(sample)
+
+    def attach(self, driver):
+        """Record metrics after every driver.get on this session"""
+        original_get = driver.get
+
+        def get(url):
+            original_get(url)
+            self.record(driver, url)
+
+        driver.get = get
+
+    def summary(self) -> Dict:
+        """Median and worst value per route and metric, plus budget violations"""
+        routes = {}
+        for route in sorted({s['route'] for s in self.samples}):
+            samples = [s for s in self.samples if s['route'] == route]
+            routes[route] = {'loads': len(samples)}
+            for metric in self.budget:
+                values = [s[metric] for s in samples if s.get(metric) is not None]
+                if values:
+                    routes[route][metric] = {'median': round(statistics.median(values), 1), 'max': max(values)}
+
+        violations = [
+            {'route': route, 'metric': metric, 'median': values[metric]['median'], 'budget': limit}
+            for route, values in routes.items()
+            for metric, limit in self.budget.items()
+            if metric in values and values[metric]['median'] > limit
+        ]
+        return {'routes': routes, 'violations': violations}
+
+    def write(self) -> Dict:
+        """Write reports/perf-metrics-<profile>[-<shard>].json and print budget violations"""
+        summary = self.summary()
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        shard = f"-{os.environ['RESULTS_SHARD']}" if os.getenv('RESULTS_SHARD') else ''
+        path = os.path.join(METRICS_DIR, f"perf-metrics-{self.profile}{shard}.json")
+        with open(path, 'w') as f:
+            json.dump({
+                'profile': self.profile,
+                'build': os.getenv('BUILD_NUMBER'),
+                'budget': self.budget,
+                'summary': summary,
+                'samples': self.samples,
+            }, f, indent=2)
+
+        for violation in summary['violations']:
+            print(f"⚠ [{self.profile}] {violation['route']} {violation['metric']} median "
+                  f"{violation['median']} ms over budget {violation['budget']} ms")
+        print(f"✓ Performance metrics for '{self.profile}' written to {path} "
+              f"({len(self.samples)} page loads, {len(summary['violations'])} budget violations)")
+        return summary
@@ -0,0 +1,228 @@
+"""
+Per-test phase timing plugin
+Splits every test into setup, navigation, explicit waits, implicit-wait stalls,
+sleeps, WebDriver commands and the test's own logic, and exports the result as an
+OpenMetrics/Prometheus textfile and JSON at the end of the run.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+import pytest
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.support.wait import WebDriverWait
+
+from json_state import sharded_path
+
+
+PHASES = (
+    'setup', 'navigation', 'explicit_wait', 'implicit_wait_stall',
+    'sleep', 'webdriver_command', 'test_logic', 'teardown',
+)
+
+NAVIGATION_COMMANDS = {'get', 'goBack', 'goForward', 'refresh'}
+FIND_COMMANDS = {'findElement', 'findElements', 'findChildElement', 'findChildElements'}
+
+# Unattributed time in each pytest phase is charged to this bucket
+REMAINDER_PHASE = {'setup': 'setup', 'call': 'test_logic', 'teardown': 'teardown'}
+
+REPORT_DIR = 'reports'
+
+
+class PhaseTimer:
+    """Accumulates time per phase for the running test; nested regions count once, outermost wins"""
+
+    def __init__(self):
+        self.results = {}
+        self.current = None
+        self.thread = None
+        self.baseline = 0.0
+        self.depth = 0
+        self.originals = {}
+
+    def active(self) -> bool:
+        return self.current is not None and self.depth == 0 and threading.current_thread() is self.thread
+
+    def timed(self, phase, func, *args, classify=None, **kwargs):
+        """Run func, charging its wall time to phase (or to classify(result, error) if given)"""
+        if not self.active():
+            return func(*args, **kwargs)
+        self.depth += 1
+        start = time.perf_counter()
+        result, error = None, None
+        try:
+            result = func(*args, **kwargs)
+            return result
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.depth -= 1
+            charged = classify(result, error) if classify else phase
+            self.current['phases'][charged] += time.perf_counter() - start
+            self.current['calls'][charged] += 1
+
+    def install(self):
+        timer = self
+        self.originals = {
+            'sleep': time.sleep,
+            'execute': WebDriver.execute,
+            'until': WebDriverWait.until,
+            'until_not': WebDriverWait.until_not,
+        }
+        original_sleep = self.originals['sleep']
+        original_execute = self.originals['execute']
+        original_until = self.originals['until']
+        original_until_not = self.originals['until_not']
+
+        def sleep(seconds):
+            return timer.timed('sleep', original_sleep, seconds)
+
+        def execute(driver, driver_command, params=None):
+            def classify(result, error):
+                if driver_command in NAVIGATION_COMMANDS:
+                    return 'navigation'
+                if driver_command in FIND_COMMANDS:
+                    # An empty or missing match only returns after the whole implicit wait
+                    if isinstance(error, NoSuchElementException):
+                        return 'implicit_wait_stall'
+                    if result is not None and result.get('value') == []:
+                        return 'implicit_wait_stall'
+                return 'webdriver_command'
+            return timer.timed('webdriver_command', original_execute, driver, driver_command, params, classify=classify)
+
+        def until(wait, method, message=''):
+            return timer.timed('explicit_wait', original_until, wait, method, message)
+
+        def until_not(wait, method, message=''):
+            return timer.timed('explicit_wait', original_until_not, wait, method, message)
+
+        time.sleep = sleep
+        WebDriver.execute = execute
+        WebDriverWait.until = until
+        WebDriverWait.until_not = until_not
+
+    def uninstall(self):
+        if not self.originals:
+            return
+        time.sleep = self.originals['sleep']
+        WebDriver.execute = self.originals['execute']
+        WebDriverWait.until = self.originals['until']
+        WebDriverWait.until_not = self.originals['until_not']
+        self.originals = {}
+
+    def start(self, item):
+        if item.nodeid not in self.results:
+            self.results[item.nodeid] = {
+                'test': item.nodeid,
+                'module': item.module.__name__ if getattr(item, 'module', None) else item.nodeid.split('::')[0],
+                'phases': defaultdict(float),
+                'calls': defaultdict(int),
+            }
+        self.current = self.results[item.nodeid]
+        self.thread = threading.current_thread()
+        self.baseline = sum(self.current['phases'].values())
+
+    def stop(self, when, duration):
+        """Charge the part of a pytest phase not spent in instrumented calls to its remainder bucket"""
+        if self.current is None:
+            return
+        attributed = sum(self.current['phases'].values()) - self.baseline
+        self.current['phases'][REMAINDER_PHASE[when]] += max(0.0, duration - attributed)
+        self.current = None
+
+
+def escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def write_reports(results, browser, build):
+    """Write phase timings as an OpenMetrics textfile and JSON"""
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    prom_path = sharded_path(os.path.join(REPORT_DIR, 'phase-timings.prom'))
+    json_path = sharded_path(os.path.join(REPORT_DIR, 'phase-timings.json'))
+
+    lines = [
+        '# HELP selenium_test_phase_seconds Wall time spent per test phase.',
+        '# TYPE selenium_test_phase_seconds gauge',
+    ]
+    call_lines = [
+        '# HELP selenium_test_phase_calls Instrumented calls per test phase.',
+        '# TYPE selenium_test_phase_calls gauge',
+    ]
+    for result in results:
+        base = (f'test="{escape_label(result["test"])}",module="{escape_label(result["module"])}",'
+                f'browser="{escape_label(browser)}",build="{escape_label(build)}"')
+        for phase in PHASES:
+            lines.append(f'selenium_test_phase_seconds{{{base},phase="{phase}"}} {result["phases"][phase]:.6f}')
+            call_lines.append(f'selenium_test_phase_calls{{{base},phase="{phase}"}} {result["calls"][phase]}')
+    with open(prom_path, 'w') as f:
+        f.write('\n'.join(lines + call_lines + ['# EOF']) + '\n')
+
+    with open(json_path, 'w') as f:
+        json.dump({
+            'browser': browser,
+            'build': build,
+            'tests': [{
+                'test': r['test'],
+                'module': r['module'],
+                'phases': {p: round(r['phases'][p], 6) for p in PHASES},
+                'calls': {p: r['calls'][p] for p in PHASES},
+            } for r in results],
+        }, f, indent=2)
+
+    totals = defaultdict(float)
+    for result in results:
+        for phase in PHASES:
+            totals[phase] += result['phases'][phase]
+    suite = sum(totals.values()) or 1.0
+    print("\nSuite time by phase:")
+    for phase in sorted(PHASES, key=lambda p: -totals[p]):
+        print(f"  {phase:<20} {totals[phase]:>9.2f}s  {totals[phase] * 100 / suite:5.1f}%")
+    print(f"✓ Phase timings written to {prom_path} and {json_path}")
+
+
+timer = PhaseTimer()
+
+
+def pytest_configure(config):
+    timer.install()
+
+
+def pytest_unconfigure(config):
+    timer.uninstall()
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_setup(item):
+    timer.start(item)
+    start = time.perf_counter()
+    yield
+    timer.stop('setup', time.perf_counter() - start)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    timer.start(item)
+    start = time.perf_counter()
+    yield
+    timer.stop('call', time.perf_counter() - start)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_teardown(item, nextitem):
+    timer.start(item)
+    start = time.perf_counter()
+    yield
+    timer.stop('teardown', time.perf_counter() - start)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    # Under xdist each worker writes its own files; the controller runs no tests
+    if timer.results:
+        write_reports(list(timer.results.values()),
+                      os.getenv('BROWSER', 'chrome'), os.getenv('BUILD_NUMBER', 'local'))
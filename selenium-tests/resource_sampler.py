@@ -0,0 +1,266 @@
+"""
+Browser resource sampler
+Samples memory (PSS), CPU time, threads and open file descriptors of a local driver's process tree
+(chromedriver or geckodriver and the browser processes below it) from /proc, tags samples
+with the running test and flags tests that grow the tree a lot
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from json_state import sharded_path
+
+
+DEFAULT_REPORT = os.path.join('reports', 'resource-usage.json')
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+# Samples kept in the report; the per-test summaries are always complete
+MAX_SAMPLES = 5000
+
+
+def resource_sampling_enabled() -> bool:
+    return os.getenv('RESOURCE_SAMPLER', 'true').lower() == 'true' and os.path.isdir('/proc/self')
+
+
+def meminfo_mb(field: str) -> Optional[float]:
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return None
+
+
+def sampler_settings() -> Dict:
+    total = meminfo_mb('MemTotal')
+    return {
+        'interval': float(os.getenv('RESOURCE_SAMPLE_INTERVAL', '1')),
+        # Browser tree PSS that recycles the session; half the agent's memory unless set
+        'pss_ceiling_mb': float(os.getenv('RESOURCE_PSS_CEILING_MB') or (total / 2 if total else 0)),
+        'min_available_mb': float(os.getenv('RESOURCE_MIN_AVAILABLE_MB', '512')),
+        # Low agent memory only recycles the browser when the browser is this share of the used memory
+        'min_browser_share': float(os.getenv('RESOURCE_MIN_BROWSER_SHARE', '0.5')),
+        'pss_delta_mb': float(os.getenv('RESOURCE_PSS_DELTA_MB', '200')),
+        'fd_delta': int(os.getenv('RESOURCE_FD_DELTA', '200')),
+        'thread_delta': int(os.getenv('RESOURCE_THREAD_DELTA', '100')),
+    }
+
+
+def local_driver_pid(driver) -> Optional[int]:
+    """Process id of a local chromedriver/geckodriver; None for Grid sessions"""
+    process = getattr(getattr(driver, 'service', None), 'process', None)
+    return getattr(process, 'pid', None)
+
+
+def read_processes() -> Dict[int, Dict]:
+    """Parent, CPU ticks, threads and RSS of every process, from one pass over /proc/<pid>/stat"""
+    processes = {}
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/stat') as f:
+                text = f.read()
+        except OSError:
+            # Exited between listdir and open
+            continue
+        # comm may contain spaces and parentheses; the fields after the last ')' are fixed
+        fields = text[text.rindex(')') + 2:].split()
+        if fields[0] == 'Z':
+            continue
+        processes[int(name)] = {
+            'name': text[text.index('(') + 1:text.rindex(')')],
+            'ppid': int(fields[1]),
+            'cpu_ticks': int(fields[11]) + int(fields[12]),
+            'threads': int(fields[17]),
+            'rss_bytes': int(fields[21]) * PAGE_SIZE,
+        }
+    return processes
+
+
+def proportional_set_kb(pid: int) -> Optional[int]:
+    """Pss from smaps_rollup, which splits pages shared between processes instead of counting them in each"""
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                if line.startswith('Pss:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def open_fds(pid: int) -> int:
+    try:
+        return len(os.listdir(f'/proc/{pid}/fd'))
+    except OSError:
+        return 0
+
+
+def process_tree(processes: Dict[int, Dict], root: int) -> List[int]:
+    children = {}
+    for pid, info in processes.items():
+        children.setdefault(info['ppid'], []).append(pid)
+    tree, pending = [], [root] if root in processes else []
+    while pending:
+        pid = pending.pop()
+        tree.append(pid)
+        pending.extend(children.get(pid, []))
+    return tree
+
+
+class ResourceSampler:
+    """Background sampling of one driver's process tree, with per-test deltas and a memory ceiling"""
+
+    def __init__(self, root_pid: int, settings: Optional[Dict] = None, report_path: str = DEFAULT_REPORT):
+        self.root_pid = root_pid
+        self.settings = settings or sampler_settings()
+        self.report_path = report_path
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.samples: List[Dict] = []
+        self.sample_count = 0
+        self.peak_pss_mb = 0.0
+        self.cpu_seconds = 0.0
+        self.last_ticks: Dict[int, int] = {}
+        self.current_test = None
+        self.test_start: Optional[Dict] = None
+        self.test_peak_mb = 0.0
+        self.tests: Dict[str, Dict] = {}
+        self.recycles: List[Dict] = []
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.sample()
+        self.thread = threading.Thread(target=self.run, name='resource-sampler', daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while not self.stopping.wait(self.settings['interval']):
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"⚠ Resource sampling stopped: {e}")
+                return
+
+    def sample(self) -> Dict:
+        with self.lock:
+            processes = read_processes()
+            tree = process_tree(processes, self.root_pid)
+            # CPU of processes that exit between samples is lost; new ones count from zero
+            ticks = {pid: processes[pid]['cpu_ticks'] for pid in tree}
+            self.cpu_seconds += sum(max(0, count - self.last_ticks.get(pid, 0))
+                                    for pid, count in ticks.items()) / float(CLOCK_TICKS)
+            self.last_ticks = ticks
+            record = {
+                't': round(time.monotonic() - self.started, 2),
+                'test': self.current_test,
+                'processes': len(tree),
+                # RSS only for processes without smaps_rollup (kernels before 4.14)
+                'pss_mb': round(sum(proportional_set_kb(pid) or processes[pid]['rss_bytes'] // 1024
+                                    for pid in tree) / 1024.0, 1),
+                'cpu_seconds': round(self.cpu_seconds, 2),
+                'threads': sum(processes[pid]['threads'] for pid in tree),
+                'fds': sum(open_fds(pid) for pid in tree),
+            }
+            self.sample_count += 1
+            self.peak_pss_mb = max(self.peak_pss_mb, record['pss_mb'])
+            self.test_peak_mb = max(self.test_peak_mb, record['pss_mb'])
+            if len(self.samples) < MAX_SAMPLES:
+                self.samples.append(record)
+            return record
+
+    def start_test(self, nodeid: str):
+        self.current_test = nodeid
+        self.test_peak_mb = 0.0
+        self.test_start = self.sample()
+
+    def finish_test(self, nodeid: str) -> Dict:
+        """Deltas over the test, with the reasons it was flagged"""
+        end = self.sample()
+        self.current_test = None
+        start = self.test_start or end
+        usage = {
+            'pss_mb': end['pss_mb'],
+            'pss_delta_mb': round(end['pss_mb'] - start['pss_mb'], 1),
+            'pss_peak_mb': max(self.test_peak_mb, end['pss_mb']),
+            'cpu_seconds': round(end['cpu_seconds'] - start['cpu_seconds'], 2),
+            'threads_delta': end['threads'] - start['threads'],
+            'fds_delta': end['fds'] - start['fds'],
+            'processes_delta': end['processes'] - start['processes'],
+        }
+        flags = []
+        if usage['pss_delta_mb'] >= self.settings['pss_delta_mb']:
+            flags.append(f"memory +{usage['pss_delta_mb']:.0f} MB")
+        if usage['fds_delta'] >= self.settings['fd_delta']:
+            flags.append(f"+{usage['fds_delta']} open files")
+        if usage['threads_delta'] >= self.settings['thread_delta']:
+            flags.append(f"+{usage['threads_delta']} threads")
+        if flags:
+            usage['flags'] = flags
+        self.tests[nodeid] = usage
+        return usage
+
+    def recycle_reason(self, usage: Dict) -> Optional[str]:
+        """Why the browser should be restarted before the next test, if it should"""
+        ceiling = self.settings['pss_ceiling_mb']
+        if ceiling and usage['pss_mb'] >= ceiling:
+            return f"browser memory {usage['pss_mb']:.0f} MB reached the {ceiling:.0f} MB ceiling"
+        available, total = meminfo_mb('MemAvailable'), meminfo_mb('MemTotal')
+        if available is None or not total or available >= self.settings['min_available_mb']:
+            return None
+        # When something else is eating the memory, restarting the browser frees little and repeats every test
+        share = usage['pss_mb'] / max(total - available, 1.0)
+        if share < self.settings['min_browser_share']:
+            return None
+        return f"only {available:.0f} MB of memory left on the agent, {share:.0%} of the used memory is the browser"
+
+    def recycled(self, root_pid: int, after: str, reason: str, seconds: float):
+        """Follow the new driver process after the session was restarted"""
+        before = self.sample()
+        with self.lock:
+            self.root_pid = root_pid
+            self.last_ticks = {}
+        after_sample = self.sample()
+        # The new tree's CPU time so far is its startup, not a test's
+        with self.lock:
+            self.cpu_seconds = after_sample['cpu_seconds'] = before['cpu_seconds']
+        self.recycles.append({'after': after, 'reason': reason, 'pss_mb_before': before['pss_mb'],
+                              'pss_mb_after': after_sample['pss_mb'], 'seconds': round(seconds, 1)})
+
+    def close(self):
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+
+    def write_report(self) -> Dict:
+        path = sharded_path(self.report_path)
+        flagged = {nodeid: usage for nodeid, usage in self.tests.items() if usage.get('flags')}
+        report = {
+            'settings': self.settings,
+            'samples_taken': self.sample_count,
+            'peak_pss_mb': self.peak_pss_mb,
+            'cpu_seconds': round(self.cpu_seconds, 2),
+            'recycles': self.recycles,
+            'flagged': flagged,
+            'tests': self.tests,
+            'samples': self.samples,
+        }
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+        for nodeid, usage in flagged.items():
+            print(f"⚠ {nodeid}: {', '.join(usage['flags'])}")
+        print(f"ℹ Browser resources: peak {self.peak_pss_mb:.0f} MB PSS, {self.cpu_seconds:.0f}s CPU, "
+              f"{len(flagged)} tests flagged, {len(self.recycles)} session recycles "
+              f"({self.sample_count} samples written to {path})")
+        return report
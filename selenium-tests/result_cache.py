@@ -0,0 +1,263 @@
+"""
+Content-addressed test result cache
+Reuses green results of @pytest.mark.readonly tests while the served HTML shell, the bundle
+assets and the test source are unchanged, so those tests are reported cached-pass without
+launching a browser.
+"""
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import urljoin
+
+import pytest
+import requests
+
+from asset_audit import AUDIT_ROUTES, AssetReferenceParser, classify, create_session, stable_name
+from change_impact import ModuleGraph
+from json_state import load_json, sharded_path, updated_json
+
+
+CACHE_DIR = '.result-cache'
+DEFAULT_REPORT = os.path.join('reports', 'result-cache.json')
+
+CACHED_PASS = 'cached-pass'
+
+# Settings that change what a UI check observes without touching the bundle
+ENVIRONMENT_KEYS = ('APP_BASE_URL', 'BROWSER', 'HEADLESS', 'EMULATION_PROFILES', 'API_PROXY_MODE')
+
+# Fixtures and settings every test runs with, besides its own module
+SHARED_SOURCES = ('conftest.py', 'pytest.ini')
+
+
+def browser_cache_path(browser: Optional[str] = None) -> str:
+    """One store per browser, so the browsers of a matrix run do not overwrite each other's results"""
+    browser = browser or os.getenv('BROWSER', 'chrome').lower()
+    return os.path.join(CACHE_DIR, f"results-{browser}.json")
+
+
+def digest(data) -> str:
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+
+def bundle_fingerprint(base_url: str, routes: Optional[List[str]] = None, workers: int = 8) -> Dict[str, str]:
+    """Digest of every route's HTML shell and every asset it references, keyed by part name"""
+    routes = routes or AUDIT_ROUTES
+    session = create_session(workers)
+    parts, assets = {}, []
+    for route in routes:
+        page_url = base_url.rstrip('/') + route
+        response = session.get(page_url, timeout=30)
+        response.raise_for_status()
+        parts[f"shell:{route}"] = digest(response.content)
+
+        parser = AssetReferenceParser()
+        parser.feed(response.text)
+        page_base = urljoin(page_url, parser.base_href) if parser.base_href else page_url
+        for reference in parser.references:
+            url = urljoin(page_base, reference)
+            if classify(url) and url not in assets:
+                assets.append(url)
+
+    def fetch(url):
+        response = session.get(url, timeout=30)
+        response.raise_for_status()
+        return url, digest(response.content)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for url, asset_digest in executor.map(fetch, assets):
+            # Keyed without the content hash in the file name, so a rebuilt main.js is reported as changed
+            parts[f"asset:{stable_name(url)}"] = asset_digest
+    return parts
+
+
+def source_digest(item, graph: ModuleGraph) -> str:
+    """Digest of the test's module, the shared sources and every suite module they import"""
+    module = os.path.basename(str(item.fspath))
+    names = {module, *SHARED_SOURCES}
+    for name in (module, 'conftest.py'):
+        names |= graph.module_dependencies(name)
+    parts = []
+    for name in sorted(names):
+        path = os.path.join(graph.tests_dir, name)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                parts.append(f"{name}:{digest(f.read())}")
+    return digest('\n'.join(parts))
+
+
+def environment_digest() -> str:
+    return digest(json.dumps({key: os.getenv(key, '') for key in ENVIRONMENT_KEYS}, sort_keys=True))
+
+
+def changed_parts(previous: Dict[str, str], current: Dict[str, str]) -> List[str]:
+    return sorted(name for name in set(previous) | set(current) if previous.get(name) != current.get(name))
+
+
+class ResultCache:
+    """Decides per read-only test whether a stored green result still applies and records new results"""
+
+    def __init__(self, base_url: str, cache_path: Optional[str] = None, report_path: str = DEFAULT_REPORT):
+        self.base_url = base_url
+        self.cache_path = cache_path or browser_cache_path()
+        self.report_path = report_path
+        self.entries: Dict[str, Dict] = load_json(self.cache_path)
+        self.fingerprint: Optional[Dict[str, str]] = None
+        self.fingerprint_error = None
+        self.bundle = None
+        self.hits: Dict[str, Dict] = {}
+        self.misses: Dict[str, Dict] = {}
+        self.outcomes: Dict[str, bool] = {}
+        self.report_written = None
+        self.graph: Optional[ModuleGraph] = None
+        self.source_digests: Dict[str, str] = {}
+
+    def compute_fingerprint(self):
+        started = time.perf_counter()
+        try:
+            self.fingerprint = bundle_fingerprint(self.base_url)
+            self.bundle = digest(json.dumps(self.fingerprint, sort_keys=True))
+            print(f"ℹ Bundle fingerprint {self.bundle[:12]} from {len(self.fingerprint)} parts "
+                  f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+        except requests.exceptions.RequestException as e:
+            self.fingerprint_error = str(e)
+            print(f"⚠ Bundle fingerprint unavailable, running every read-only test: {e}")
+
+    def key(self, item) -> Dict:
+        module = str(item.fspath)
+        if module not in self.source_digests:
+            if self.graph is None:
+                self.graph = ModuleGraph(str(item.config.rootpath))
+            self.source_digests[module] = source_digest(item, self.graph)
+        return {'bundle': self.bundle, 'source': self.source_digests[module], 'environment': environment_digest()}
+
+    def decide(self, item):
+        """Classify a read-only test as a cache hit or a miss with the reason"""
+        entry = self.entries.get(item.nodeid)
+        key = self.key(item)
+        reasons = []
+        if self.bundle is None:
+            reasons.append(f"fingerprint unavailable: {self.fingerprint_error}")
+        elif entry is None:
+            reasons.append('no stored result')
+        else:
+            if not entry.get('passed'):
+                reasons.append('last result was not green')
+            if entry['key']['bundle'] != key['bundle']:
+                changed = changed_parts(entry.get('fingerprint', {}), self.fingerprint)
+                shown = ', '.join(changed[:5]) + (f" and {len(changed) - 5} more" if len(changed) > 5 else '')
+                reasons.append(f"bundle changed: {shown}")
+            if entry['key']['source'] != key['source']:
+                reasons.append('test source changed')
+            if entry['key']['environment'] != key['environment']:
+                reasons.append('environment changed')
+
+        if reasons:
+            self.misses[item.nodeid] = {'key': key, 'reasons': reasons}
+        else:
+            self.hits[item.nodeid] = {'key': key, 'recorded_at': entry['recorded_at'], 'build': entry.get('build')}
+
+    def record(self, nodeid: str, passed: bool):
+        if nodeid in self.misses:
+            self.outcomes[nodeid] = self.outcomes.get(nodeid, True) and passed
+
+    def save(self):
+        """Merge this session's results into the store; other xdist workers may have written theirs"""
+        if self.bundle is None:
+            return
+        with updated_json(self.cache_path, indent=2) as entries:
+            for nodeid, passed in self.outcomes.items():
+                entries[nodeid] = {
+                    'key': self.misses[nodeid]['key'],
+                    'fingerprint': self.fingerprint,
+                    'passed': passed,
+                    'recorded_at': time.time(),
+                    'build': os.getenv('BUILD_NUMBER'),
+                }
+
+    def write_report(self):
+        path = sharded_path(self.report_path)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({
+                'build': os.getenv('BUILD_NUMBER'),
+                'bundle': self.bundle,
+                'fingerprint': self.fingerprint,
+                'hits': self.hits,
+                'misses': {nodeid: dict(miss, outcome=self.outcomes.get(nodeid)) for nodeid, miss in self.misses.items()},
+            }, f, indent=2)
+        return path
+
+
+def result_cache_enabled() -> bool:
+    return os.getenv('RESULT_CACHE', 'false').lower() == 'true'
+
+
+result_cache: Optional[ResultCache] = None
+
+
+def pytest_configure(config):
+    global result_cache
+    if result_cache_enabled():
+        result_cache = ResultCache(os.getenv('APP_BASE_URL', 'http://192.168.1.137:30080'))
+
+
+def pytest_collection_modifyitems(session, config, items):
+    readonly = [item for item in items if item.get_closest_marker('readonly')]
+    if result_cache is None or not readonly:
+        return
+    result_cache.compute_fingerprint()
+    for item in readonly:
+        result_cache.decide(item)
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item):
+    # Skipping before fixture setup means no browser is launched for a fully cached selection
+    if result_cache is not None and item.nodeid in result_cache.hits:
+        hit = result_cache.hits[item.nodeid]
+        pytest.skip(f"{CACHED_PASS}: green with the same bundle and source in build {hit['build'] or 'local'}")
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    report = outcome.get_result()
+    if result_cache is None:
+        return
+    if report.when == 'call' or report.failed or report.skipped:
+        result_cache.record(item.nodeid, report.passed)
+    if report.when == 'call' and item.nodeid in result_cache.misses:
+        # Shown with the test's captured output in the HTML report
+        report.sections.append(('Result cache', 'miss: ' + '; '.join(result_cache.misses[item.nodeid]['reasons'])))
+
+
+def pytest_report_teststatus(report, config):
+    if result_cache is not None and report.skipped and report.nodeid in result_cache.hits:
+        return CACHED_PASS, 'c', 'CACHED-PASS'
+
+
+def pytest_sessionfinish(session, exitstatus):
+    # Under xdist each worker decides and records its own tests
+    if result_cache is not None and (result_cache.hits or result_cache.misses):
+        result_cache.report_written = result_cache.write_report()
+        result_cache.save()
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    if result_cache is None or not (result_cache.hits or result_cache.misses):
+        return
+    terminalreporter.write_line(f"ℹ Result cache: {len(result_cache.hits)} cached-pass, "
+                                f"{len(result_cache.misses)} run")
+    reasons = {}
+    for miss in result_cache.misses.values():
+        for reason in miss['reasons']:
+            reasons[reason] = reasons.get(reason, 0) + 1
+    for reason, count in sorted(reasons.items(), key=lambda r: -r[1]):
+        terminalreporter.write_line(f"  {count:>4} x {reason}")
+    terminalreporter.write_line(f"✓ Result cache report written to {result_cache.report_written}")
@@ -0,0 +1,263 @@
+"""
+Cross-build results store
+Appends per-test durations and per-route page-load metrics of every run to SQLite and
+flags latency regressions against recent builds with a Mann-Whitney U test, or a robust
+z-score when a build has a single value for a series.
+"""
+
+import glob
+import json
+import math
+import os
+import sqlite3
+import statistics
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+DEFAULT_DB = os.path.join('.results', 'results.db')
+DEFAULT_REPORT = os.path.join('reports', 'regressions.json')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    build TEXT NOT NULL,
+    browser TEXT,
+    recorded_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS samples (
+    build_id INTEGER NOT NULL REFERENCES builds(id),
+    series TEXT NOT NULL,
+    value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS samples_series ON samples (series, build_id);
+"""
+
+# Exact U distribution is enumerated up to this many pairs; larger samples use the normal approximation
+EXACT_PAIRS_LIMIT = 2500
+
+# A single candidate value is tested against the baseline's spread once there are this many baseline values
+MIN_SINGLE_SAMPLE_BASELINE = 5
+
+# Smallest baseline spread, relative to its median, so a near-constant series does not flag jitter
+NOISE_FLOOR = 0.02
+
+
+def connect(db_path: str = DEFAULT_DB) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def collect_samples(report_dir: str = 'reports', since: float = 0,
+                    shard: Optional[str] = None) -> List[Tuple[str, float]]:
+    """Series/value pairs from the phase timing and page metrics reports written after `since`,
+    only those of one shard (a browser of a matrix run) when given"""
+    samples = []
+    phase_pattern = f'phase-timings-{shard}*.json' if shard else 'phase-timings*.json'
+    for path in glob.glob(os.path.join(report_dir, phase_pattern)):
+        if os.path.getmtime(path) < since:
+            continue
+        with open(path) as f:
+            for test in json.load(f)['tests']:
+                samples.append((f"test:{test['test']}", sum(test['phases'].values())))
+
+    metrics_pattern = f'perf-metrics-*-{shard}.json' if shard else 'perf-metrics-*.json'
+    for path in glob.glob(os.path.join(report_dir, metrics_pattern)):
+        if os.path.getmtime(path) < since:
+            continue
+        with open(path) as f:
+            record = json.load(f)
+        for sample in record['samples']:
+            for metric in record['budget']:
+                if sample.get(metric) is not None:
+                    samples.append((f"route:{record['profile']}:{sample['route']}:{metric}", sample[metric]))
+    return samples
+
+
+def record_run(db_path: str = DEFAULT_DB, build: Optional[str] = None, browser: Optional[str] = None,
+               report_dir: str = 'reports', since: float = 0, shard: Optional[str] = None) -> Optional[int]:
+    """Append this run's samples as a new build; returns its id, or None when nothing was measured"""
+    samples = collect_samples(report_dir, since, shard)
+    if not samples:
+        print("⚠ No phase timings or page metrics found, nothing added to the results store")
+        return None
+
+    build = build or os.getenv('BUILD_NUMBER') or time.strftime('local-%Y%m%d-%H%M%S')
+    with connect(db_path) as conn:
+        cursor = conn.execute('INSERT INTO builds (build, browser, recorded_at) VALUES (?, ?, ?)',
+                              (build, browser or os.getenv('BROWSER', 'chrome'), time.time()))
+        build_id = cursor.lastrowid
+        conn.executemany('INSERT INTO samples (build_id, series, value) VALUES (?, ?, ?)',
+                         [(build_id, series, value) for series, value in samples])
+    print(f"✓ Stored {len(samples)} samples for build {build} in {db_path}")
+    return build_id
+
+
+def rank(values: List[float]) -> List[float]:
+    """Ranks starting at 1, ties sharing their average rank"""
+    order = sorted(range(len(values)), key=lambda i: values[i])
+    ranks = [0.0] * len(values)
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and values[order[j + 1]] == values[order[i]]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[order[k]] = (i + j) / 2 + 1
+        i = j + 1
+    return ranks
+
+
+def exact_u_upper_tail(u: float, n1: int, n2: int) -> float:
+    """P(U >= u) under H0 for untied samples, by counting rank arrangements"""
+    # counts[i][j][k]: arrangements of i + j values where i candidates beat k (candidate, baseline) pairs
+    counts = [[[1] for _ in range(n2 + 1)] for _ in range(n1 + 1)]
+    for i in range(n1 + 1):
+        for j in range(n2 + 1):
+            if i == 0 or j == 0:
+                continue
+            # Largest value is either a candidate (beating all j baselines) or a baseline
+            with_candidate = [0] * j + counts[i - 1][j]
+            with_baseline = counts[i][j - 1]
+            size = max(len(with_candidate), len(with_baseline))
+            counts[i][j] = [
+                (with_candidate[k] if k < len(with_candidate) else 0) +
+                (with_baseline[k] if k < len(with_baseline) else 0)
+                for k in range(size)
+            ]
+    distribution = counts[n1][n2]
+    return sum(distribution[math.ceil(u):]) / sum(distribution)
+
+
+def mann_whitney_greater(candidate: List[float], baseline: List[float]) -> Dict:
+    """One-sided Mann-Whitney U test that candidate values tend to be larger than baseline values"""
+    n1, n2 = len(candidate), len(baseline)
+    ranks = rank(candidate + baseline)
+    u = sum(ranks[:n1]) - n1 * (n1 + 1) / 2
+    tied = len(set(candidate + baseline)) < n1 + n2
+
+    if not tied and n1 * n2 <= EXACT_PAIRS_LIMIT:
+        p_value = exact_u_upper_tail(u, n1, n2)
+    else:
+        n = n1 + n2
+        tie_groups = {}
+        for r in ranks:
+            tie_groups[r] = tie_groups.get(r, 0) + 1
+        tie_term = sum(t ** 3 - t for t in tie_groups.values()) / (n * (n - 1))
+        sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term))
+        z = (u - n1 * n2 / 2 - 0.5) / sigma if sigma else 0.0
+        p_value = 0.5 * math.erfc(z / math.sqrt(2))
+
+    return {
+        'u': u,
+        'p_value': p_value,
+        # Cliff's delta: P(candidate > baseline) - P(candidate < baseline)
+        'effect_size': 2 * u / (n1 * n2) - 1,
+    }
+
+
+def robust_z_greater(value: float, baseline: List[float]) -> Dict:
+    """One-sided test that a single value lies above the baseline, from the baseline's median and MAD.
+
+    Rank tests cannot reach a useful p-value with one candidate sample (1 / (n2 + 1) at best),
+    which is what a per-test duration gives in every build.
+    """
+    median = statistics.median(baseline)
+    mad = statistics.median(abs(v - median) for v in baseline)
+    # 1.4826 * MAD estimates the standard deviation of normally distributed values
+    scale = max(1.4826 * mad, NOISE_FLOOR * abs(median), 1e-9)
+    z = (value - median) / scale
+    below = sum(1 for v in baseline if v < value)
+    above = sum(1 for v in baseline if v > value)
+    return {
+        'z': z,
+        'p_value': 0.5 * math.erfc(z / math.sqrt(2)),
+        # Cliff's delta of one value against the baseline
+        'effect_size': (below - above) / len(baseline),
+    }
+
+
+def load_series(conn: sqlite3.Connection, build_ids: List[int]) -> Dict[str, Dict[int, List[float]]]:
+    placeholders = ','.join('?' * len(build_ids))
+    series = {}
+    for build_id, name, value in conn.execute(
+            f'SELECT build_id, series, value FROM samples WHERE build_id IN ({placeholders})', build_ids):
+        series.setdefault(name, {}).setdefault(build_id, []).append(value)
+    return series
+
+
+def compare_builds(db_path: str = DEFAULT_DB, baseline_builds: int = 10, alpha: float = 0.05,
+                   min_effect: float = 0.33, report_path: str = DEFAULT_REPORT,
+                   browser: Optional[str] = None) -> Dict:
+    """Compare the latest build against the N builds before it and write the regression report;
+    with a browser, only that browser's builds are compared"""
+    with connect(db_path) as conn:
+        if browser:
+            builds = conn.execute('SELECT id, build FROM builds WHERE browser = ? ORDER BY id DESC LIMIT ?',
+                                  (browser, baseline_builds + 1)).fetchall()
+        else:
+            builds = conn.execute('SELECT id, build FROM builds ORDER BY id DESC LIMIT ?',
+                                  (baseline_builds + 1,)).fetchall()
+        if len(builds) < 2:
+            print("⚠ Results store needs at least two builds to compare")
+            return {'regressions': [], 'compared': 0, 'underpowered': 0}
+        (candidate_id, candidate_build), baseline = builds[0], builds[1:]
+        series = load_series(conn, [b[0] for b in builds])
+
+    regressions, compared, underpowered = [], 0, 0
+    for name, per_build in sorted(series.items()):
+        candidate = per_build.get(candidate_id, [])
+        reference = [v for build_id, _ in baseline for v in per_build.get(build_id, [])]
+        if not candidate or not reference:
+            continue
+        if len(candidate) == 1 and len(reference) >= MIN_SINGLE_SAMPLE_BASELINE:
+            method, result = 'robust-z', robust_z_greater(candidate[0], reference)
+        elif 1 / math.comb(len(candidate) + len(reference), len(candidate)) > alpha:
+            # The smallest reachable p-value is 1 / C(n1 + n2, n1); skip series that can never reach alpha
+            underpowered += 1
+            continue
+        else:
+            method, result = 'mann-whitney', mann_whitney_greater(candidate, reference)
+
+        compared += 1
+        if result['p_value'] < alpha and result['effect_size'] >= min_effect:
+            before, after = statistics.median(reference), statistics.median(candidate)
+            regressions.append({
+                'series': name,
+                'baseline_median': round(before, 3),
+                'candidate_median': round(after, 3),
+                'change_percent': round((after - before) * 100 / before, 1) if before else None,
+                'p_value': float(f"{result['p_value']:.3g}"),
+                'effect_size': round(result['effect_size'], 3),
+                'test': method,
+                'candidate_samples': len(candidate),
+                'baseline_samples': len(reference),
+            })
+
+    regressions.sort(key=lambda r: -r['effect_size'])
+    report = {
+        'candidate_build': candidate_build,
+        'browser': browser,
+        'baseline_builds': [b[1] for b in baseline],
+        'alpha': alpha,
+        'min_effect': min_effect,
+        'compared': compared,
+        'underpowered': underpowered,
+        'regressions': regressions,
+    }
+    os.makedirs(os.path.dirname(report_path) or '.', exist_ok=True)
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\nBuild {candidate_build}{f' ({browser})' if browser else ''} vs last {len(baseline)} builds "
+          f"({compared} series compared, {underpowered} with too few samples):")
+    for r in regressions:
+        change = f" ({r['change_percent']:+}%)" if r['change_percent'] is not None else ''
+        print(f"  ⚠ {r['series']}: median {r['baseline_median']} -> {r['candidate_median']}{change}, "
+              f"p={r['p_value']}, Cliff's delta={r['effect_size']}")
+    if not regressions:
+        print("  ✓ No significant latency regressions")
+    print(f"✓ Regression report written to {report_path}")
+    return report
@@ -0,0 +1,269 @@
+"""
+Streaming results log
+Appends one JSON line per finished test (outcome, phase durations, printed checks and warnings,
+metrics) to reports/results[-<shard>][-<worker>].jsonl while the run is still going
+"""
+
+import glob
+import json
+import os
+import socket
+import sys
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import pytest
+
+from phase_timing import timer
+
+
+STREAM_DIR = 'reports'
+
+# Printed lines are classified by the repo's message prefixes
+PREFIXES = {'✓': 'checks', 'ℹ': 'info', '⚠': 'warnings', '✗': 'errors'}
+
+# Printed lines kept per category and test; the rest are only counted
+MAX_LINES = 100
+
+# Failure text kept per test; the full traceback stays in the HTML report
+MAX_LONGREPR = 8000
+
+
+def stream_path(shard: Optional[str], worker: Optional[str], directory: str = STREAM_DIR) -> str:
+    parts = ['results'] + [part for part in (shard, worker) if part]
+    return os.path.join(directory, '-'.join(parts) + '.jsonl')
+
+
+class PrintedLines:
+    """Printed output of one test, bucketed by message prefix"""
+
+    def __init__(self):
+        self.lines = {category: [] for category in PREFIXES.values()}
+        self.counts = {category: 0 for category in PREFIXES.values()}
+        self.other = 0
+
+    def add(self, line: str):
+        line = line.strip()
+        if not line:
+            return
+        category = PREFIXES.get(line[0])
+        if category is None:
+            self.other += 1
+            return
+        self.counts[category] += 1
+        if len(self.lines[category]) < MAX_LINES:
+            self.lines[category].append(line)
+
+    def add_text(self, text: str):
+        for line in text.splitlines():
+            self.add(line)
+
+
+class OutputTee:
+    """Stands in for sys.stdout while a test runs uncaptured: writes pass through, complete lines are kept"""
+
+    def __init__(self, stream, printed: PrintedLines):
+        self.stream = stream
+        self.printed = printed
+        self.partial = ''
+
+    def write(self, text):
+        written = self.stream.write(text)
+        lines = (self.partial + text).split('\n')
+        self.partial = lines.pop()
+        for line in lines:
+            self.printed.add(line)
+        return written
+
+    def finish(self):
+        if self.partial:
+            self.printed.add(self.partial)
+            self.partial = ''
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class ResultsStream:
+    """One JSONL file per process that runs tests, flushed after every line"""
+
+    def __init__(self, config):
+        self.config = config
+        workerinput = getattr(config, 'workerinput', None)
+        self.worker = workerinput['workerid'] if workerinput else None
+        self.run_id = (workerinput or {}).get('results_run_id') or os.getenv('RESULTS_RUN_ID') or uuid.uuid4().hex[:12]
+        self.shard = os.getenv('RESULTS_SHARD') or None
+        self.path = stream_path(self.shard, self.worker)
+        self.file = None
+        self.started = time.time()
+        self.counts: Dict[str, int] = {}
+        self.tee_output = config.getoption('capture') == 'no'
+        self.current = None
+
+    def remove_stale(self):
+        """Drop this shard's files from the previous run, including workers this run may not start"""
+        base = stream_path(self.shard, None)
+        for path in [base] + glob.glob(base[:-len('.jsonl')] + '-gw*.jsonl'):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def write(self, record: Dict):
+        if self.file is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self.file = open(self.path, 'w', encoding='utf-8')
+            self.write_line({
+                'event': 'session',
+                'run_id': self.run_id,
+                'shard': self.shard,
+                'worker': self.worker,
+                'host': socket.gethostname(),
+                'browser': os.getenv('BROWSER', 'chrome'),
+                'build': os.getenv('BUILD_NUMBER'),
+                'started': self.started,
+            })
+        self.write_line(record)
+
+    def write_line(self, record: Dict):
+        # Readers tail the file mid-run, so every line has to land whole
+        self.file.write(json.dumps(record, default=str) + '\n')
+        self.file.flush()
+
+    def start_test(self, item):
+        self.current = {
+            'item': item,
+            'reports': [],
+            'printed': PrintedLines(),
+            'pytest_warnings': [],
+            'started': time.time(),
+            'tee': None,
+        }
+        if self.tee_output and not isinstance(sys.stdout, OutputTee):
+            self.current['tee'] = sys.stdout = OutputTee(sys.stdout, self.current['printed'])
+
+    def finish_test(self):
+        current, self.current = self.current, None
+        if current['tee'] is not None:
+            current['tee'].finish()
+            if sys.stdout is current['tee']:
+                sys.stdout = current['tee'].stream
+        if not current['reports']:
+            return
+        self.write(self.test_record(current))
+
+    def outcome(self, reports: List) -> tuple:
+        """Category from the report that decided the result, so plugins' statuses (cached-pass, xfailed) carry over"""
+        # Rerun tests log every attempt; the last one decides
+        reports = reports[max(i for i, r in enumerate(reports) if r.when == 'setup'):] \
+            if any(r.when == 'setup' for r in reports) else reports
+        decisive = next((r for r in reports if r.failed), None) \
+            or next((r for r in reports if r.when == 'setup' and r.skipped), None) \
+            or next((r for r in reports if r.when == 'call'), reports[0])
+        category = self.config.hook.pytest_report_teststatus(report=decisive, config=self.config)[0]
+        return category or decisive.outcome, decisive
+
+    def test_record(self, current: Dict) -> Dict:
+        item, reports, printed = current['item'], current['reports'], current['printed']
+        # Captured sections accumulate over the phases, so the last report holds all of them
+        if reports[-1].capstdout:
+            printed.add_text(reports[-1].capstdout)
+        outcome, decisive = self.outcome(reports)
+        self.counts[outcome] = self.counts.get(outcome, 0) + 1
+
+        record = {
+            'event': 'test',
+            'run_id': self.run_id,
+            'shard': self.shard,
+            'worker': self.worker,
+            'browser': os.getenv('BROWSER', 'chrome'),
+            'nodeid': item.nodeid,
+            'file': item.nodeid.split('::')[0],
+            'class': item.cls.__name__ if getattr(item, 'cls', None) else None,
+            'name': item.name,
+            'outcome': outcome,
+            'duration': round(sum(r.duration for r in reports), 4),
+            'phases': {r.when: round(r.duration, 4) for r in reports},
+            'started': current['started'],
+            'finished': time.time(),
+            'markers': sorted({m.name for m in item.iter_markers()}),
+        }
+        attempts = sum(1 for r in reports if r.when == 'setup')
+        if attempts > 1:
+            record['attempts'] = attempts
+        if decisive.failed or decisive.skipped:
+            record['failed_phase' if decisive.failed else 'skipped_phase'] = decisive.when
+            text = decisive.longreprtext if decisive.failed else (
+                decisive.longrepr[2] if isinstance(decisive.longrepr, tuple) else str(decisive.longrepr))
+            record['longrepr'] = text[-MAX_LONGREPR:]
+        if getattr(decisive, 'wasxfail', None):
+            # xfail reason, or the flake score of a quarantined test
+            record['reason'] = decisive.wasxfail
+        for category, lines in printed.lines.items():
+            if lines:
+                record[category] = lines
+        record['printed'] = dict(printed.counts, other=printed.other)
+        if current['pytest_warnings']:
+            record['pytest_warnings'] = current['pytest_warnings'][:MAX_LINES]
+        breakdown = timer.results.get(item.nodeid)
+        if breakdown:
+            record['breakdown'] = {phase: round(seconds, 4) for phase, seconds in breakdown['phases'].items() if seconds}
+        if item.user_properties:
+            record['metrics'] = {name: value for name, value in item.user_properties}
+        return record
+
+    def close(self, exitstatus):
+        if self.file is None:
+            return
+        self.write_line({
+            'event': 'session_finish',
+            'run_id': self.run_id,
+            'worker': self.worker,
+            'exitstatus': int(exitstatus),
+            'counts': self.counts,
+            'finished': time.time(),
+            'duration': round(time.time() - self.started, 3),
+        })
+        self.file.close()
+        self.file = None
+
+
+stream: Optional[ResultsStream] = None
+
+
+def pytest_configure(config):
+    global stream
+    stream = ResultsStream(config)
+    if not hasattr(config, 'workerinput') and not config.getoption('collectonly'):
+        stream.remove_stale()
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    # xdist controller: every worker tags its lines with the controller's run id
+    node.workerinput['results_run_id'] = stream.run_id
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    # Only runs where tests execute, so the xdist controller never opens a file
+    stream.start_test(item)
+    try:
+        yield
+    finally:
+        stream.finish_test()
+
+
+def pytest_runtest_logreport(report):
+    if stream is not None and stream.current is not None and report.nodeid == stream.current['item'].nodeid:
+        stream.current['reports'].append(report)
+
+
+def pytest_warning_recorded(warning_message, when, nodeid, location):
+    if stream is not None and stream.current is not None and nodeid == stream.current['item'].nodeid:
+        stream.current['pytest_warnings'].append(
+            f"{warning_message.category.__name__}: {warning_message.message}")
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if stream is not None:
+        stream.close(exitstatus)
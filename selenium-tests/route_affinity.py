@@ -0,0 +1,384 @@
+"""
+Route-affinity scheduling
+Orders tests at collection so consecutive tests start on the same page, and replaces a test's
+opening driver.get() of the page the browser already shows with a soft in-app reset when the
+previous test left the page in a compatible state
+"""
+
+import ast
+import inspect
+import json
+import os
+import textwrap
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import pytest
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from change_impact import FIXTURE_ROUTES, impact_recording_enabled
+from json_state import load_json, sharded_path, updated_json
+
+
+DEFAULT_CACHE = os.path.join('.route-affinity', 'routes.json')
+DEFAULT_REPORT = os.path.join('reports', 'route-affinity.json')
+
+# Tests using these need their page loaded from scratch, e.g. to pick up the proxy's fault rules
+FRESH_LOAD_FIXTURES = {'fault_scenario'}
+
+# Marker of tests that measure a real page load (cold cache, navigation timing, reveal on load)
+FRESH_LOAD_MARKER = 'fresh_load'
+
+# Fixture scopes that are set up again when their tests are split apart
+GROUPED_SCOPES = {'package', 'module', 'class'}
+
+# Back to the top of the page, no focused field, every form at its initial values
+SOFT_RESET_SCRIPT = """
+window.scrollTo(0, 0);
+if (document.activeElement && document.activeElement !== document.body) {
+    document.activeElement.blur();
+}
+document.querySelectorAll('form').forEach(function (form) { form.reset(); });
+return document.readyState;
+"""
+
+
+def route_affinity_enabled() -> bool:
+    return os.getenv('ROUTE_AFFINITY', 'true').lower() == 'true'
+
+
+def route_of(url: str) -> str:
+    """Path and query of a URL; React Router matches paths without case"""
+    parts = urlsplit(url)
+    path = parts.path.rstrip('/').lower() or '/'
+    return f"{path}?{parts.query}" if parts.query else path
+
+
+def url_path(node: ast.AST, assignments: Dict[str, ast.AST], params: Dict, depth: int = 0) -> Optional[str]:
+    """Text a driver.get() argument appends to the base URL, when it can be read from the source"""
+    if depth > 5:
+        return None
+    if isinstance(node, ast.Attribute) and node.attr == 'base_url':
+        return ''
+    if isinstance(node, ast.Name) and node.id in assignments:
+        return url_path(assignments[node.id], assignments, params, depth + 1)
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr in ('rstrip', 'strip'):
+        return url_path(node.func.value, assignments, params, depth + 1)
+    if isinstance(node, ast.IfExp):
+        return url_path(node.body, assignments, params, depth + 1)
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+        left = url_path(node.left, assignments, params, depth + 1)
+        right = node.right.value if isinstance(node.right, ast.Constant) and isinstance(node.right.value, str) \
+            else params.get(getattr(node.right, 'id', None))
+        return left + right if left is not None and isinstance(right, str) else None
+    if isinstance(node, ast.JoinedStr) and node.values and isinstance(node.values[0], ast.FormattedValue):
+        text = url_path(node.values[0].value, assignments, params, depth + 1)
+        for value in node.values[1:]:
+            if text is None:
+                return None
+            if isinstance(value, ast.Constant):
+                text += value.value
+            elif isinstance(value.value, ast.Name) and isinstance(params.get(value.value.id), str):
+                text += params[value.value.id]
+            else:
+                return None
+        return text
+    return None
+
+
+def static_start_route(item) -> Optional[str]:
+    """Route of the test's first driver.get(), or of the fixture that opens its page"""
+    for name in getattr(item, 'fixturenames', []):
+        if name in FIXTURE_ROUTES:
+            return FIXTURE_ROUTES[name]
+    try:
+        func = ast.parse(textwrap.dedent(inspect.getsource(item.function))).body[0]
+    except (AttributeError, OSError, TypeError, SyntaxError, IndexError):
+        return None
+    params = dict(getattr(getattr(item, 'callspec', None), 'params', {}))
+    assignments = {}
+    nodes = sorted((n for n in ast.walk(func) if hasattr(n, 'lineno')), key=lambda n: (n.lineno, n.col_offset))
+    for node in nodes:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            assignments[node.targets[0].id] = node.value
+        elif (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == 'get'
+                and node.args):
+            path = url_path(node.args[0], assignments, params)
+            if path is not None:
+                return route_of(path or '/')
+    return None
+
+
+def fixture_scope(item, name: str) -> str:
+    fixturedefs = getattr(item, '_fixtureinfo', None) and item._fixtureinfo.name2fixturedefs.get(name)
+    return fixturedefs[-1].scope if fixturedefs else 'function'
+
+
+def session_key(item) -> tuple:
+    """Session-scoped parameters (emulation profiles); tests sharing them have to stay together"""
+    params = getattr(getattr(item, 'callspec', None), 'params', {})
+    return tuple(sorted((name, repr(value)) for name, value in params.items()
+                        if fixture_scope(item, name) == 'session'))
+
+
+def pinned_to_module(item) -> bool:
+    return any(fixture_scope(item, name) in GROUPED_SCOPES for name in getattr(item, 'fixturenames', []))
+
+
+def needs_fresh_load(item) -> bool:
+    return (bool(FRESH_LOAD_FIXTURES & set(getattr(item, 'fixturenames', [])))
+            or item.get_closest_marker('faults') is not None or item.get_closest_marker(FRESH_LOAD_MARKER) is not None)
+
+
+def same_route_neighbours(items, routes: Dict[str, Optional[str]]) -> int:
+    return sum(1 for before, after in zip(items, items[1:])
+               if routes.get(before.nodeid) and routes.get(before.nodeid) == routes.get(after.nodeid))
+
+
+def affinity_order(items: List, routes: Dict[str, Optional[str]]) -> List:
+    """Group tests by starting route and preconditions, read-only tests first within a group.
+
+    Tests of a module that shares module or class fixtures move as one unit, and session
+    parameter groups keep their order, so no fixture is set up more often than before.
+    """
+    segments = OrderedDict()
+    for item in items:
+        segments.setdefault(session_key(item), []).append(item)
+
+    ordered = []
+    for segment in segments.values():
+        ranks = {}
+        for item in segment:
+            ranks.setdefault((bool(needs_fresh_load(item)), routes.get(item.nodeid)), len(ranks))
+
+        def rank(item):
+            # Tests with an unknown start route go last, where they cannot split a group
+            return routes.get(item.nodeid) is None, ranks[(bool(needs_fresh_load(item)), routes.get(item.nodeid))], \
+                item.get_closest_marker('readonly') is None
+
+        units = OrderedDict()
+        for item in segment:
+            key = item.nodeid.split('::')[0] if pinned_to_module(item) else item.nodeid
+            units.setdefault(key, []).append(item)
+        for unit in units.values():
+            unit.sort(key=rank)
+        for unit in sorted(units.values(), key=lambda unit: rank(unit[0])):
+            ordered.extend(unit)
+    return ordered
+
+
+class RouteAffinity:
+    """Start routes, the browser state one test leaves to the next, and navigations saved"""
+
+    def __init__(self, cache_path: str = DEFAULT_CACHE, report_path: str = DEFAULT_REPORT):
+        self.cache_path = cache_path
+        self.report_path = report_path
+        self.learned: Dict[str, str] = load_json(cache_path)
+        self.observed: Dict[str, str] = {}
+        self.routes: Dict[str, Optional[str]] = {}
+        self.neighbours = {'before': 0, 'after': 0}
+        self.soft_reset_allowed = not impact_recording_enabled()
+
+        # Browser state left by the previous test
+        self.driver_id = None
+        self.clean = False
+        self.test = None
+
+        self.originals = {}
+        self.navigations = 0
+        self.navigation_seconds = defaultdict(list)
+        self.soft_resets = defaultdict(int)
+        self.navigation_saved = 0.0
+        self.sleep_skipped = 0.0
+        self.report_written = None
+
+    def order(self, items: List) -> List:
+        for item in items:
+            self.routes[item.nodeid] = self.learned.get(item.nodeid) or static_start_route(item)
+        ordered = affinity_order(items, self.routes)
+        self.neighbours = {'before': same_route_neighbours(items, self.routes),
+                           'after': same_route_neighbours(ordered, self.routes)}
+        return ordered
+
+    def install(self):
+        affinity = self
+        self.originals = {'get': WebDriver.get, 'execute': WebDriver.execute, 'sleep': time.sleep}
+        original_get, original_execute, original_sleep = (
+            self.originals['get'], self.originals['execute'], self.originals['sleep'])
+
+        def get(driver, url):
+            if affinity.soft_reset(driver, url):
+                return None
+            started = time.perf_counter()
+            result = original_get(driver, url)
+            affinity.navigated(driver, url, time.perf_counter() - started)
+            return result
+
+        def execute(driver, driver_command, params=None):
+            if affinity.on_test_thread():
+                affinity.test['skip_sleep'] = False
+            return original_execute(driver, driver_command, params)
+
+        def sleep(seconds):
+            # The page is already loaded after a soft reset; the settle sleep that follows is not needed.
+            # time.sleep is patched process-wide, so other threads (proxy handlers, samplers) sleep as usual
+            if affinity.on_test_thread() and affinity.test['skip_sleep']:
+                affinity.test['skip_sleep'] = False
+                affinity.sleep_skipped += seconds
+                return None
+            return original_sleep(seconds)
+
+        WebDriver.get = get
+        WebDriver.execute = execute
+        time.sleep = sleep
+
+    def uninstall(self):
+        if not self.originals:
+            return
+        WebDriver.get = self.originals['get']
+        WebDriver.execute = self.originals['execute']
+        time.sleep = self.originals['sleep']
+        self.originals = {}
+
+    def start_test(self, item):
+        self.test = {
+            'nodeid': item.nodeid,
+            'thread': threading.get_ident(),
+            'first_get': True,
+            'skip_sleep': False,
+            'fresh': bool(needs_fresh_load(item)),
+            'readonly': item.get_closest_marker('readonly') is not None,
+            'failed': False,
+            'ran': False,
+        }
+
+    def on_test_thread(self) -> bool:
+        return self.test is not None and threading.get_ident() == self.test['thread']
+
+    def soft_reset(self, driver, url: str) -> bool:
+        """Reset the page in place when it is a read-only test's opening navigation to the page already shown"""
+        test = self.test
+        if (test is None or not test['first_get'] or test['fresh'] or not test['readonly']
+                or not self.soft_reset_allowed or not self.clean or id(driver) != self.driver_id):
+            return False
+        test['first_get'] = False
+        self.observed[test['nodeid']] = route_of(url)
+        started = time.perf_counter()
+        try:
+            if route_of(driver.current_url) != route_of(url) or len(driver.window_handles) != 1:
+                return False
+            if driver.execute_script(SOFT_RESET_SCRIPT) != 'complete':
+                return False
+        except Exception:
+            # An open alert or a lost window; a real navigation recovers from both
+            return False
+        route = route_of(url)
+        full = self.navigation_seconds.get(route) or [s for seconds in self.navigation_seconds.values() for s in seconds]
+        if full:
+            self.navigation_saved += max(0.0, sum(full) / len(full) - (time.perf_counter() - started))
+        self.soft_resets[route] += 1
+        test['skip_sleep'] = True
+        return True
+
+    def navigated(self, driver, url: str, seconds: float):
+        self.navigations += 1
+        self.navigation_seconds[route_of(url)].append(seconds)
+        self.driver_id = id(driver)
+        if self.test is not None:
+            if self.test['first_get']:
+                self.observed[self.test['nodeid']] = route_of(url)
+            self.test['first_get'] = False
+
+    def logreport(self, report):
+        if self.test is None or report.nodeid != self.test['nodeid']:
+            return
+        if report.when == 'call' or report.outcome in ('failed', 'rerun'):
+            self.test['ran'] = True
+        if report.outcome in ('failed', 'rerun'):
+            self.test['failed'] = True
+
+    def finish_test(self):
+        test, self.test = self.test, None
+        if test is None or not test['ran']:
+            # Skipped before the call (e.g. cached-pass); the browser was not touched
+            return
+        self.clean = test['readonly'] and not test['failed'] and not test['fresh']
+
+    def save(self):
+        """Merge observed start routes; other xdist workers or matrix browsers may be saving theirs"""
+        with updated_json(self.cache_path, indent=2, sort_keys=True) as stored:
+            stored.update(self.observed)
+
+    def summary(self) -> Dict:
+        return {
+            'same_route_neighbours': self.neighbours,
+            'navigations': self.navigations,
+            'navigations_avoided': sum(self.soft_resets.values()),
+            'soft_resets_by_route': dict(self.soft_resets),
+            'navigation_seconds_saved': round(self.navigation_saved, 2),
+            'sleep_seconds_skipped': round(self.sleep_skipped, 2),
+            'time_saved_seconds': round(self.navigation_saved + self.sleep_skipped, 2),
+            'start_routes': {nodeid: route for nodeid, route in self.routes.items()},
+        }
+
+    def write_report(self) -> str:
+        path = sharded_path(self.report_path)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+        return path
+
+
+affinity: Optional[RouteAffinity] = None
+
+
+def pytest_configure(config):
+    global affinity
+    affinity = RouteAffinity() if route_affinity_enabled() else None
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_collection_modifyitems(session, config, items):
+    if affinity is not None:
+        items[:] = affinity.order(items)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    if affinity is None:
+        yield
+        return
+    affinity.install()
+    affinity.start_test(item)
+    try:
+        yield
+    finally:
+        affinity.finish_test()
+        affinity.uninstall()
+
+
+def pytest_runtest_logreport(report):
+    if affinity is not None:
+        affinity.logreport(report)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    # Under xdist each worker runs, learns and reports its own tests
+    if affinity is not None and affinity.navigations:
+        affinity.save()
+        affinity.report_written = affinity.write_report()
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    if affinity is None or not affinity.navigations:
+        return
+    summary = affinity.summary()
+    terminalreporter.write_line(
+        f"ℹ Route affinity: {summary['same_route_neighbours']['after']} same-page neighbours "
+        f"(was {summary['same_route_neighbours']['before']}), {summary['navigations_avoided']} page loads "
+        f"replaced by soft resets, {summary['time_saved_seconds']:.1f}s saved "
+        f"({summary['navigation_seconds_saved']:.1f}s navigation, {summary['sleep_seconds_skipped']:.1f}s sleeps)")
+    terminalreporter.write_line(f"✓ Route affinity report written to {affinity.report_written}")
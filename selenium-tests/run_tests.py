@@ -8,9 +8,22 @@ import os
 import sys
 import subprocess
 import argparse
+import threading
 import time
+import uuid
 import requests
-from typing import Optional
+from typing import List, Optional
+
+from aggregate_results import aggregate as aggregate_results
+from asset_audit import audit_assets, max_growth_percent
+from budget_selection import parse_budget, select_for_budget
+from change_impact import select_tests
+from emulation import PROFILES
+from results_store import DEFAULT_DB, DEFAULT_REPORT, record_run, compare_builds
+from watch_daemon import run_daemon
+
+
+BROWSERS = ['chrome', 'firefox']
 
 
 def check_app_availability(base_url: str, timeout: int = 60) -> bool:
@@ -59,7 +72,19 @@ def setup_environment(args):
         'APP_BASE_URL': args.app_url,
         'SELENIUM_HUB_URL': args.selenium_hub,
         'BROWSER': args.browser,
-        'HEADLESS': str(args.headless).lower()
+        'HEADLESS': str(args.headless).lower(),
+        'EMULATION_PROFILES': args.profiles or '',
+        'PERF_BUDGET_STRICT': str(args.perf_budget_strict).lower(),
+        'TRACE_THRESHOLD': '' if args.trace_threshold is None else str(args.trace_threshold),
+        'API_PROXY_MODE': args.api_proxy or '',
+        'HAR_ARCHIVE': args.har_archive,
+        'HAR_REPLAY_LATENCY': str(args.replay_latency).lower(),
+        'RESULT_CACHE': str(args.result_cache).lower(),
+        'IMPACT_RECORD': str(args.record_impact).lower(),
+        'FLAKE_RERUNS': str(args.reruns),
+        'FLAKE_QUARANTINE': str(not args.no_quarantine).lower(),
+        'ROUTE_AFFINITY': str(not args.no_route_affinity).lower(),
+        'RESOURCE_PSS_CEILING_MB': '' if args.memory_ceiling is None else str(args.memory_ceiling)
     }
     
     for key, value in env_vars.items():
@@ -67,12 +92,32 @@ def setup_environment(args):
         print(f"Set {key}={value}")
 
 
+def pytest_filter_args(args) -> List[str]:
+    """Pattern, marker and custom pytest options"""
+    filter_args = []
+    if args.test_pattern and not args.test_file:
+        filter_args.extend(['-k', args.test_pattern])
+    
+    # Add markers
+    if args.markers:
+        filter_args.extend(['-m', args.markers])
+    
+    # Add custom pytest options
+    if args.pytest_args:
+        filter_args.extend(args.pytest_args.split())
+    return filter_args
+
+
 def run_tests(args) -> int:
     """Run the test suite"""
     
     # Setup environment
     setup_environment(args)
     
+    # Compare stored builds without running the suite
+    if args.compare_only:
+        return check_regressions(args)
+    
     # Check application availability
     if not args.skip_app_check:
         if not check_app_availability(args.app_url, args.app_timeout):
@@ -84,43 +129,160 @@ def run_tests(args) -> int:
         if not check_selenium_grid(args.selenium_hub):
             print("⚠ Selenium Grid not available, will try to fall back to local drivers")
     
+    # Audit static asset weight before the browser tests
+    if args.audit_assets:
+        audit = audit_assets(args.app_url, workers=args.audit_workers)
+        growth = max_growth_percent(audit)
+        if args.asset_growth_limit is not None and growth > args.asset_growth_limit:
+            print(f"✗ Bundle size grew {growth}% (limit {args.asset_growth_limit}%)")
+            return 1
+    
+    # Keep an interpreter and browser warm and rerun tests in-process as files change
+    if args.watch:
+        return run_daemon([args.test_file] if args.test_file else [], pytest_filter_args(args))
+    
     # Prepare pytest command
     pytest_cmd = ['python', '-m', 'pytest']
     
     # Add test selection
-    if args.test_file:
-        pytest_cmd.append(args.test_file)
-    elif args.test_pattern:
-        pytest_cmd.extend(['-k', args.test_pattern])
+    targets = [args.test_file] if args.test_file else []
     
-    # Add markers
-    if args.markers:
-        pytest_cmd.extend(['-m', args.markers])
+    # Narrow the selection to the tests the diff affects plus the smoke core
+    if args.changed_since:
+        selection = select_tests(args.changed_since)
+        if not selection['full']:
+            targets = [nodeid for nodeid in selection['selected']
+                       if not args.test_file or nodeid.startswith(f"{args.test_file}::")]
+            if not targets:
+                print("✓ No affected tests to run")
+                return 0
+    
+    # Keep the tests that cover the most routes, selectors and APIs per second of the budget
+    if args.budget:
+        candidates = [t for t in targets if '::' in t] or None
+        selection = select_for_budget(args.budget, candidates, test_file=args.test_file, db_path=args.results_db)
+        targets = list(selection['selected'])
+        if not targets:
+            print("✗ No test fits the budget")
+            return 1
+    pytest_cmd.extend(targets)
+    pytest_cmd.extend(pytest_filter_args(args))
     
     # Add parallel execution
     if args.parallel and args.parallel > 1:
         pytest_cmd.extend(['-n', str(args.parallel)])
     
-    # Add custom pytest options
-    if args.pytest_args:
-        pytest_cmd.extend(args.pytest_args.split())
-    
     # Ensure reports directory exists
     os.makedirs('reports', exist_ok=True)
     
     print(f"Running command: {' '.join(pytest_cmd)}")
     print("=" * 50)
     
-    # Run tests
+    # Run tests, all browsers of a matrix at the same time
+    started = time.time()
+    matrix = args.browsers if args.browsers and len(args.browsers) > 1 else None
     try:
-        result = subprocess.run(pytest_cmd, cwd=os.path.dirname(os.path.abspath(__file__)))
-        return result.returncode
+        if matrix:
+            returncode = run_matrix(pytest_cmd, matrix)
+        else:
+            returncode = subprocess.run(pytest_cmd, cwd=os.path.dirname(os.path.abspath(__file__))).returncode
     except KeyboardInterrupt:
         print("\n✗ Tests interrupted by user")
         return 130
     except Exception as e:
         print(f"✗ Error running tests: {e}")
         return 1
+    
+    # Summary page and merged JUnit XML from the streamed per-test results
+    aggregate_results(html_path=args.summary_html, junit_path=args.summary_junit)
+    
+    # Append this run's timings to the cross-build results store, one build per browser
+    if args.results_db != 'none':
+        for browser in matrix or [args.browser]:
+            record_run(args.results_db, browser=browser, since=started, shard=browser if matrix else None)
+        if args.compare_builds:
+            regression_code = check_regressions(args)
+            if returncode == 0:
+                return regression_code
+    
+    return returncode
+
+
+def run_matrix(pytest_cmd: List[str], browsers: List[str]) -> int:
+    """Run one pytest process per browser concurrently, each on its own Grid slots, with labeled output"""
+    run_id = uuid.uuid4().hex[:12]
+    output_lock = threading.Lock()
+    durations = {}
+    started = time.time()
+    
+    def relay(browser, process):
+        for line in process.stdout:
+            with output_lock:
+                sys.stdout.write(f"[{browser}] {line}")
+                sys.stdout.flush()
+        process.wait()
+        durations[browser] = time.time() - started
+    
+    processes = {}
+    for browser in browsers:
+        # Each browser streams to its own results shard and writes its own HTML report
+        env = dict(os.environ, BROWSER=browser, RESULTS_SHARD=browser, RESULTS_RUN_ID=run_id)
+        command = pytest_cmd + [f"--html={os.path.join('reports', f'report-{browser}.html')}"]
+        processes[browser] = subprocess.Popen(
+            command, cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, encoding='utf-8', errors='replace'
+        )
+    threads = [threading.Thread(target=relay, args=(browser, process), daemon=True)
+               for browser, process in processes.items()]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            thread.join()
+    except KeyboardInterrupt:
+        for process in processes.values():
+            process.terminate()
+        raise
+    
+    print("=" * 50)
+    for browser, process in processes.items():
+        status = '✓' if process.returncode == 0 else '✗'
+        print(f"{status} {browser}: exit code {process.returncode} after {durations[browser]:.0f}s")
+    print(f"ℹ Browser matrix took {max(durations.values()):.0f}s; "
+          f"one browser after another would take about {sum(durations.values()):.0f}s")
+    return next((process.returncode for process in processes.values() if process.returncode), 0)
+
+
+def check_regressions(args) -> int:
+    """Compare the latest stored build with earlier builds; non-zero when regressions are fatal"""
+    regressions = 0
+    # Every build is stored per browser; compare each browser with its own history
+    matrix = args.browsers if args.browsers and len(args.browsers) > 1 else None
+    for browser in matrix or [args.browser]:
+        report_path = os.path.join('reports', f'regressions-{browser}.json') if matrix else DEFAULT_REPORT
+        report = compare_builds(args.results_db, baseline_builds=args.compare_builds or 10,
+                                alpha=args.regression_alpha, min_effect=args.regression_effect,
+                                report_path=report_path, browser=browser)
+        regressions += len(report['regressions'])
+    if regressions and args.fail_on_regression:
+        print(f"✗ {regressions} significant latency regressions")
+        return 1
+    return 0
+
+
+def browser_list(value: str) -> List[str]:
+    browsers = [b.strip().lower() for b in value.split(',') if b.strip()]
+    unknown = [b for b in browsers if b not in BROWSERS]
+    if not browsers or unknown:
+        raise argparse.ArgumentTypeError(f"expected a comma separated list of {', '.join(BROWSERS)}")
+    return list(dict.fromkeys(browsers))
+
+
+def budget_seconds(value: str) -> float:
+    try:
+        return parse_budget(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
 
 
 def main():
@@ -146,6 +308,46 @@ Examples:
   
   # Run tests in parallel
   python run_tests.py --parallel 2
+  
+  # Run navigation tests under hotel Wi-Fi and slow 4G throttling in one invocation
+  python run_tests.py --test-file test_navigation.py --profiles hotel-wifi,slow-4g
+  
+  # Keep Chrome traces of tests that fail or take longer than 30 seconds
+  python run_tests.py --trace-threshold 30
+  
+  # Record backend API responses once, then run UI tests against the recording
+  python run_tests.py --api-proxy record
+  python run_tests.py --api-proxy replay
+  
+  # Audit static asset weight and fail on more than 10% bundle growth
+  python run_tests.py --audit-assets --asset-growth-limit 10
+  
+  # Fail on latencies significantly slower than the last 10 stored builds
+  python run_tests.py --compare-builds 10 --fail-on-regression
+  
+  # Keep a warm browser and rerun home page tests whenever a file changes
+  python run_tests.py --watch --test-file test_home.py --skip-grid-check
+  
+  # Compare the latest stored build with the 20 before it, without running tests
+  python run_tests.py --compare-only --compare-builds 20
+  
+  # Skip read-only UI checks that already passed against the same frontend bundle
+  python run_tests.py --result-cache
+  
+  # Run only the tests affected by changes since the last successful build, plus the smoke core
+  python run_tests.py --changed-since $GIT_PREVIOUS_SUCCESSFUL_COMMIT
+  
+  # Refresh the impact map from what every test actually visits and renders
+  python run_tests.py --record-impact
+  
+  # Run the tests that cover the most pages, selectors and APIs in about a minute
+  python run_tests.py --budget 60s
+  
+  # Run Chrome and Firefox at the same time and merge their results into one report
+  python run_tests.py --browsers chrome,firefox
+  
+  # Fail on the first failure of every test, including quarantined ones
+  python run_tests.py --reruns 0 --no-quarantine
         """
     )
     
@@ -169,10 +371,13 @@ Examples:
                        help='Skip checking if Selenium Grid is available')
     
     parser.add_argument('--browser', 
-                       choices=['chrome', 'firefox'], 
+                       choices=BROWSERS, 
                        default=os.getenv('BROWSER', 'chrome'),
                        help='Browser to use for tests')
     
+    parser.add_argument('--browsers', type=browser_list, default=os.getenv('BROWSERS') or None,
+                       help='Run the suite in several browsers at the same time (e.g. "chrome,firefox")')
+    
     parser.add_argument('--headless', action='store_true',
                        default=os.getenv('HEADLESS', 'true').lower() == 'true',
                        help='Run browser in headless mode')
@@ -194,13 +399,110 @@ Examples:
     parser.add_argument('--pytest-args', 
                        help='Additional pytest arguments (as string)')
     
+    parser.add_argument('--watch', action='store_true',
+                       help='Keep the interpreter and browser warm and rerun changed or selected tests on every change')
+    
+    # Performance measurement
+    parser.add_argument('--profiles',
+                       help=f"Comma separated emulation profiles to run the suite under ({', '.join(PROFILES)})")
+    
+    parser.add_argument('--perf-budget-strict', action='store_true',
+                       help='Fail the run when a profile median exceeds its page-load budget')
+    
+    parser.add_argument('--trace-threshold', type=float,
+                       help='Trace Chrome during every test and keep traces of tests slower than this many seconds or failing')
+    
+    # Backend API record/replay
+    parser.add_argument('--api-proxy', choices=['record', 'replay'],
+                       help='Route the browser through a local proxy that records or replays backend API responses')
+    
+    parser.add_argument('--har-archive',
+                       default=os.getenv('HAR_ARCHIVE', os.path.join('recordings', 'api.har')),
+                       help='HAR archive written in record mode and served in replay mode')
+    
+    parser.add_argument('--replay-latency', action='store_true',
+                       help='Delay replayed API responses by their recorded latency')
+    
+    # Static asset audit
+    parser.add_argument('--audit-assets', action='store_true',
+                       help='Audit size, compression and caching of static assets before testing')
+    
+    parser.add_argument('--audit-workers', type=int, default=8,
+                       help='Concurrent connections used by the asset audit')
+    
+    parser.add_argument('--asset-growth-limit', type=float,
+                       help='Fail when any asset kind grows more than this percent since the last build')
+    
+    # Cross-build results store
+    parser.add_argument('--results-db', default=os.getenv('RESULTS_DB', DEFAULT_DB),
+                       help='SQLite store that every run appends its timings to ("none" to disable)')
+    
+    parser.add_argument('--compare-builds', type=int,
+                       help='After the run, test for latency regressions against this many previous builds')
+    
+    parser.add_argument('--compare-only', action='store_true',
+                       help='Only compare the latest stored build with earlier builds, without running tests')
+    
+    parser.add_argument('--regression-alpha', type=float, default=0.05,
+                       help='Significance level of the one-sided Mann-Whitney U test')
+    
+    parser.add_argument('--regression-effect', type=float, default=0.33,
+                       help="Minimum Cliff's delta for a significant slowdown to count as a regression")
+    
+    parser.add_argument('--fail-on-regression', action='store_true',
+                       help='Exit non-zero when the comparison finds regressions')
+    
+    # Streamed results summary
+    parser.add_argument('--summary-html', default=os.path.join('reports', 'summary.html'),
+                       help='Summary page built from the streamed JSONL results after the run')
+    
+    parser.add_argument('--summary-junit', default=os.path.join('reports', 'summary-junit.xml'),
+                       help='JUnit XML merged from the streamed JSONL results after the run')
+    
+    # Flake handling
+    parser.add_argument('--reruns', type=int, default=int(os.getenv('FLAKE_RERUNS', '2')),
+                       help='Rerun a failed test up to this many times in the same browser session, with backoff')
+    
+    parser.add_argument('--no-quarantine', action='store_true',
+                       default=os.getenv('FLAKE_QUARANTINE', 'true').lower() == 'false',
+                       help='Let failures of quarantined flaky tests fail the run again')
+    
+    # Route-affinity ordering
+    parser.add_argument('--no-route-affinity', action='store_true',
+                       default=os.getenv('ROUTE_AFFINITY', 'true').lower() == 'false',
+                       help='Keep the collection order and load every test\'s start page from scratch')
+    
+    # Browser resource sampling
+    parser.add_argument('--memory-ceiling', type=float, metavar='MB',
+                       default=float(os.environ['RESOURCE_PSS_CEILING_MB']) if os.getenv('RESOURCE_PSS_CEILING_MB') else None,
+                       help='Restart a local browser between tests once its processes use this much memory (0 disables)')
+    
+    # Change impact selection
+    parser.add_argument('--changed-since', default=os.getenv('IMPACT_BASE') or None, metavar='REF',
+                       help='Only run tests affected by changes since this git ref, plus the smoke core')
+    
+    parser.add_argument('--record-impact', action='store_true',
+                       default=os.getenv('IMPACT_RECORD', 'false').lower() == 'true',
+                       help='Record the pages, rendered selectors and API calls of each test into the impact map')
+    
+    # Time-budgeted selection
+    parser.add_argument('--budget', type=budget_seconds, default=os.getenv('TEST_BUDGET') or None,
+                       help='Run the tests covering the most routes, selectors and APIs within this time (e.g. 60s, 2m)')
+    
+    # Content-addressed result cache
+    parser.add_argument('--result-cache', action='store_true',
+                       default=os.getenv('RESULT_CACHE', 'false').lower() == 'true',
+                       help='Report read-only tests as cached-pass while the bundle and test source are unchanged')
+    
     args = parser.parse_args()
+    if args.browsers and len(args.browsers) == 1:
+        args.browser = args.browsers[0]
     
     print("SmartHotel360 Selenium Test Runner")
     print("=" * 40)
     print(f"Application URL: {args.app_url}")
     print(f"Selenium Hub: {args.selenium_hub}")
-    print(f"Browser: {args.browser} ({'headless' if args.headless else 'headed'})")
+    print(f"Browser: {', '.join(args.browsers or [args.browser])} ({'headless' if args.headless else 'headed'})")
     print("=" * 40)
     
     exit_code = run_tests(args)
@@ -0,0 +1,196 @@
+"""
+Scroll reveal and jank measurement
+Scrolls a page smoothly and records, per section, when it entered the viewport and when its
+content was ready, plus dropped frames and long tasks during the scroll
+"""
+
+import json
+import os
+import statistics
+from typing import Dict, List, Optional
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+from json_state import sharded_path
+
+
+# Section root and the element that only exists once the section's content rendered
+HOME_SECTIONS = {
+    'infogrid': {'root': '.sh-infogrid', 'content': '.sh-infogrid-row'},
+    'conference': {'root': '.sh-rooms_feature', 'content': '.sh-rooms_feature-slider > li'},
+    'smartphone': {'root': '.sh-smartphone', 'content': '.sh-smartphone-quote_container'},
+    'rooms': {'root': '.sh-home > .sh-rooms', 'content': '.sh-rooms-item'},
+}
+
+# Roughly one viewport per second at 1080p, slow enough for lazy content to start loading
+SCROLL_SPEED = float(os.getenv('SCROLL_SPEED', '1200'))
+
+SCROLL_REPORT = os.path.join('reports', 'scroll-reveal.json')
+
+# Installs the observers and starts a requestAnimationFrame-driven scroll to the bottom.
+# A section is ready once it intersected the viewport, its content element exists, no loading
+# indicator is left inside it and every image in it finished loading.
+INSTALL_SCRIPT = """
+var sections = arguments[0], speed = arguments[1], maxSeconds = arguments[2];
+var state = window.__shScroll = {
+    sections: {}, frames: [], long_tasks: [], scrolled: false, stopped: false, scroll_ms: null
+};
+var origin = performance.now();
+function now() { return performance.now() - origin; }
+Object.keys(sections).forEach(function (name) {
+    state.sections[name] = {entered_ms: null, ready_ms: null};
+});
+
+var observed = new Map();
+var observer = new IntersectionObserver(function (entries) {
+    entries.forEach(function (entry) {
+        var section = state.sections[observed.get(entry.target)];
+        if (entry.isIntersecting && section.entered_ms === null) { section.entered_ms = now(); }
+    });
+});
+function track() {
+    Object.keys(sections).forEach(function (name) {
+        var section = state.sections[name];
+        var root = document.querySelector(sections[name].root);
+        if (root && !observed.has(root)) {
+            observed.set(root, name);
+            observer.observe(root);
+        }
+        if (!root || section.entered_ms === null || section.ready_ms !== null) { return; }
+        var images = root.getElementsByTagName('img');
+        var loaded = Array.prototype.every.call(images, function (img) { return img.complete; });
+        if (loaded && root.querySelector(sections[name].content) && !root.querySelector('.sh-loading')) {
+            section.ready_ms = now();
+        }
+    });
+}
+
+try {
+    new PerformanceObserver(function (list) {
+        if (state.scrolled) { return; }
+        list.getEntries().forEach(function (entry) {
+            state.long_tasks.push({start_ms: entry.startTime - origin, duration_ms: entry.duration});
+        });
+    }).observe({entryTypes: ['longtask']});
+} catch (e) { state.long_tasks = null; }
+
+var last = null, atBottom = 0;
+function tick(timestamp) {
+    var delta = last === null ? 0 : timestamp - last;
+    last = timestamp;
+    track();
+    if (!state.scrolled) {
+        if (delta) { state.frames.push(delta); }
+        var bottom = document.documentElement.scrollHeight - window.innerHeight;
+        var y = Math.min(bottom, window.scrollY + speed * (delta || 16.7) / 1000);
+        window.scrollTo(0, y);
+        // Lazy content can grow the page, so the bottom has to hold for a few frames
+        atBottom = y >= bottom ? atBottom + 1 : 0;
+        if (atBottom > 20) {
+            state.scrolled = true;
+            state.scroll_ms = now();
+        }
+    }
+    var ready = Object.keys(sections).every(function (name) { return state.sections[name].ready_ms !== null; });
+    if ((state.scrolled && ready) || now() > maxSeconds * 1000) {
+        state.stopped = true;
+        observer.disconnect();
+        return;
+    }
+    requestAnimationFrame(tick);
+}
+requestAnimationFrame(tick);
+"""
+
+STATE_SCRIPT = "return window.__shScroll || null;"
+
+
+def frame_stats(frames: List[float]) -> Dict:
+    """Frame time distribution; a frame counts as dropped per missed display refresh"""
+    if not frames:
+        return {'frames': 0, 'dropped_frames': 0}
+    # Estimate the refresh interval from the fastest typical frames, so 120 Hz displays count correctly
+    interval = min(statistics.median(frames), 1000 / 60)
+    dropped = sum(max(0, round(frame / interval) - 1) for frame in frames)
+    ordered = sorted(frames)
+    return {
+        'frames': len(frames),
+        'dropped_frames': dropped,
+        'dropped_percent': round(dropped * 100.0 / (len(frames) + dropped), 1),
+        'median_frame_ms': round(statistics.median(frames), 1),
+        'p95_frame_ms': round(ordered[int(0.95 * (len(ordered) - 1))], 1),
+        'max_frame_ms': round(ordered[-1], 1),
+    }
+
+
+class ScrollRevealRecorder:
+    """Smooth scroll over the loaded page with per-section reveal events"""
+
+    def __init__(self, driver, sections: Optional[Dict[str, Dict]] = None,
+                 speed_px_s: float = SCROLL_SPEED, max_seconds: float = 60):
+        self.driver = driver
+        self.sections = sections or HOME_SECTIONS
+        self.speed = speed_px_s
+        self.max_seconds = max_seconds
+
+    def start(self):
+        self.driver.execute_script(INSTALL_SCRIPT, self.sections, self.speed, self.max_seconds)
+        return self
+
+    def state(self) -> Dict:
+        state = self.driver.execute_script(STATE_SCRIPT)
+        if state is None:
+            raise RuntimeError("Scroll recorder is not running on this page (navigated away?)")
+        return state
+
+    def wait_for_reveal(self, name: str, timeout: float = 15) -> Dict:
+        """Wait until a section entered the viewport and its content is ready, and return its timings"""
+        def ready(d):
+            section = self.state()['sections'][name]
+            return section if section['ready_ms'] is not None else None
+
+        try:
+            section = WebDriverWait(self.driver, timeout, poll_frequency=0.1).until(ready)
+        except TimeoutException:
+            if self.state()['sections'][name]['entered_ms'] is None:
+                raise TimeoutException(f"Section '{name}' never entered the viewport within {timeout}s")
+            raise TimeoutException(f"Section '{name}' entered the viewport but its content was not ready within {timeout}s")
+        return self.timings(section)
+
+    def wait_until_scrolled(self, timeout: float = 60) -> Dict:
+        """Wait until the scroll reached the bottom and every section is ready (or the recorder gave up)"""
+        WebDriverWait(self.driver, timeout, poll_frequency=0.25).until(lambda d: self.state()['stopped'])
+        return self.results()
+
+    @staticmethod
+    def timings(section: Dict) -> Dict:
+        entered, ready = section['entered_ms'], section['ready_ms']
+        return {
+            'entered_ms': None if entered is None else round(entered, 1),
+            'ready_ms': None if ready is None else round(ready, 1),
+            'reveal_ms': None if entered is None or ready is None else round(ready - entered, 1),
+        }
+
+    def results(self) -> Dict:
+        state = self.state()
+        long_tasks = state['long_tasks']
+        return {
+            'speed_px_s': self.speed,
+            'scroll_ms': None if state['scroll_ms'] is None else round(state['scroll_ms'], 1),
+            'sections': {name: self.timings(section) for name, section in state['sections'].items()},
+            'frames': frame_stats(state['frames']),
+            'long_tasks': None if long_tasks is None else {
+                'count': len(long_tasks),
+                'total_ms': round(sum(t['duration_ms'] for t in long_tasks), 1),
+                'max_ms': round(max((t['duration_ms'] for t in long_tasks), default=0), 1),
+            },
+        }
+
+
+def write_scroll_report(result: Dict, path: str = SCROLL_REPORT):
+    path = sharded_path(path)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(dict(result, build=os.getenv('BUILD_NUMBER')), f, indent=2)
+    print(f"✓ Scroll reveal report written to {path}")
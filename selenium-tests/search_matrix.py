@@ -0,0 +1,254 @@
+"""
+Search matrix engine
+Expands a compact spec of locations, dates and guest configurations into a pairwise-covering
+set of scenarios and drives them through the search widget across pooled sessions and tabs.
+"""
+
+import itertools
+import queue
+import statistics
+import threading
+import time
+from typing import Dict, List, Optional
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+from pages import HomePage
+
+
+TIMING_METRICS = ('suggestion_ms', 'date_selection_ms', 'guests_ms', 'find_enabled_ms', 'total_ms')
+
+# Starts loading a tab's next home page without blocking on it; the flag marks the outgoing document
+RELOAD_SCRIPT = "window.__shReloading = true; window.location.href = arguments[0];"
+READY_SCRIPT = "return !window.__shReloading && document.readyState === 'complete';"
+
+
+def all_combinations(spec: Dict[str, List]) -> List[Dict]:
+    names = list(spec)
+    return [dict(zip(names, values)) for values in itertools.product(*(spec[n] for n in names))]
+
+
+def pairwise(spec: Dict[str, List]) -> List[Dict]:
+    """Scenarios covering every pair of values of any two parameters (greedy, deterministic)"""
+    names = list(spec)
+    if len(names) < 2:
+        return all_combinations(spec)
+
+    uncovered = {
+        (a, va, b, vb)
+        for a, b in itertools.combinations(names, 2)
+        for va in spec[a] for vb in spec[b]
+    }
+
+    def covered_by(scenario):
+        return {(a, scenario[a], b, scenario[b]) for a, b in itertools.combinations(names, 2)}
+
+    scenarios = []
+    while uncovered:
+        # Seed with an uncovered pair, then fill every other parameter with the value covering most pairs
+        a, va, b, vb = min(uncovered, key=lambda p: (names.index(p[0]), names.index(p[2]), str(p[1]), str(p[3])))
+        scenario = {a: va, b: vb}
+        for name in names:
+            if name in scenario:
+                continue
+            scenario[name] = max(spec[name], key=lambda value: sum(
+                pair_key(names, name, value, other, other_value) in uncovered
+                for other, other_value in scenario.items()
+            ))
+        scenario = {name: scenario[name] for name in names}
+        uncovered -= covered_by(scenario)
+        scenarios.append(scenario)
+    return scenarios
+
+
+def pair_key(names: List[str], a: str, va, b: str, vb) -> tuple:
+    """Pair in parameter order, as stored in the uncovered set"""
+    if names.index(a) < names.index(b):
+        return (a, va, b, vb)
+    return (b, vb, a, va)
+
+
+def scenario_label(scenario: Dict) -> str:
+    return (f"{scenario['location']}, +{scenario['check_in']}d for {scenario['nights']}n, "
+            f"{scenario['rooms']} room(s), {scenario['adults']}A/{scenario['kids']}K"
+            f"{', pets' if scenario['pets'] else ''}")
+
+
+def wait_for(driver, condition, timeout: float, message: str):
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=0.05).until(condition)
+    except TimeoutException:
+        raise TimeoutException(message)
+
+
+def set_count(row, target: int):
+    """Click an increment/decrement control until its input shows target"""
+    buttons = row.find_elements(By.CSS_SELECTOR, '.sh-increment_decrement-button')
+    value_input = row.find_element(By.CSS_SELECTOR, '.sh-increment_decrement-input')
+    for _ in range(20):
+        current = int(value_input.get_attribute('value') or 0)
+        if current == target:
+            return
+        (buttons[1] if current < target else buttons[0]).click()
+    raise WebDriverException(f"Guest count stuck at {value_input.get_attribute('value')}, wanted {target}")
+
+
+def run_scenario(driver, scenario: Dict, timeout: float = 10) -> Dict:
+    """Drive one scenario through the loaded search widget and time each step"""
+    search = HomePage(driver).search
+    timings = {}
+    started = time.perf_counter()
+
+    # Location: type, wait for the first suggestion and pick it
+    step = time.perf_counter()
+    wait_for(driver, lambda d: search.has('where_input'), timeout, "Where input not rendered")
+    where = search.where_input
+    where.click()
+    where.send_keys(scenario['location'])
+    suggestions = wait_for(driver, lambda d: search.options, timeout, f"No suggestions for {scenario['location']}")
+    timings['suggestion_ms'] = (time.perf_counter() - step) * 1000
+    suggestions[0].click()
+
+    # Dates: check-in N days ahead, check-out after the stay length, then apply
+    step = time.perf_counter()
+    days = wait_for(driver, lambda d: search.available_days, timeout, "Date picker did not open")
+    days[min(scenario['check_in'], len(days) - 1)].click()
+    # The picker re-renders for the end date with the check-in as its first selectable day
+    days = wait_for(driver, lambda d: search.available_days, timeout, "End date picker did not render")
+    days[min(scenario['nights'], len(days) - 1)].click()
+    driver.find_element(By.CSS_SELECTOR, '.sh-search-calendar_button--highlight').click()
+    wait_for(driver, lambda d: search.has('guests_panel'), timeout, "Guests panel did not open")
+    timings['date_selection_ms'] = (time.perf_counter() - step) * 1000
+
+    # Guests: adults and kids counters, room count and pets
+    step = time.perf_counter()
+    rows = driver.find_elements(By.CSS_SELECTOR, '.sh-guests-people_row')
+    set_count(rows[0], scenario['adults'])
+    set_count(rows[1], scenario['kids'])
+    rooms = search.guest_rooms
+    if scenario['rooms'] <= 2:
+        rooms[scenario['rooms'] - 1].click()
+    else:
+        # The custom room counter's last button adds a room
+        for _ in range(scenario['rooms'] - 1):
+            driver.find_elements(By.CSS_SELECTOR, '.sh-guests-room_button')[-1].click()
+    search.guest_extra_buttons[1 if scenario['pets'] else 0].click()
+    timings['guests_ms'] = (time.perf_counter() - step) * 1000
+
+    wait_for(driver, lambda d: not search.find_button_disabled(), timeout, "Find button never enabled")
+    timings['find_enabled_ms'] = (time.perf_counter() - started) * 1000
+    timings['total_ms'] = timings['find_enabled_ms']
+    return {k: round(v, 1) for k, v in timings.items()}
+
+
+class SessionWorker(threading.Thread):
+    """Runs queued scenarios on one session, preloading the next home page in a spare tab"""
+
+    def __init__(self, driver, url: str, scenarios: queue.Queue, results: List, deadline: float,
+                 tabs: int = 2, timeout: float = 10):
+        super().__init__(daemon=True)
+        self.driver = driver
+        self.url = url
+        self.scenarios = scenarios
+        self.results = results
+        self.deadline = deadline
+        self.tab_count = tabs
+        self.timeout = timeout
+
+    def open_tabs(self) -> List[str]:
+        handles = [self.driver.current_window_handle]
+        for _ in range(self.tab_count - 1):
+            self.driver.switch_to.new_window('tab')
+            handles.append(self.driver.current_window_handle)
+        for handle in handles:
+            self.driver.switch_to.window(handle)
+            self.driver.execute_script(RELOAD_SCRIPT, self.url)
+        return handles
+
+    def run(self):
+        handles = self.open_tabs()
+        cache = HomePage(self.driver).cache
+        turn = 0
+        while time.time() < self.deadline:
+            try:
+                index, scenario = self.scenarios.get_nowait()
+            except queue.Empty:
+                break
+
+            # Tabs take turns: while one runs a scenario the others finish loading a fresh page
+            handle = handles[turn % len(handles)]
+            turn += 1
+            self.driver.switch_to.window(handle)
+            cache.invalidate()
+            result = {'index': index, 'scenario': scenario, 'label': scenario_label(scenario),
+                      'session': self.name, 'tab': handle}
+            try:
+                wait_for(self.driver, lambda d: d.execute_script(READY_SCRIPT),
+                         self.timeout * 3, "Home page did not finish loading")
+                result['timings'] = run_scenario(self.driver, scenario, self.timeout)
+                result['status'] = 'passed'
+            except (WebDriverException, IndexError) as e:
+                result['status'] = 'failed'
+                result['error'] = (getattr(e, 'msg', None) or str(e) or type(e).__name__).splitlines()[0]
+            self.results.append(result)
+
+            try:
+                self.driver.execute_script(RELOAD_SCRIPT, self.url)
+                cache.invalidate()
+            except WebDriverException:
+                pass
+
+        for handle in handles[1:]:
+            try:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+            except WebDriverException:
+                pass
+        if handles:
+            self.driver.switch_to.window(handles[0])
+
+
+def run_matrix(drivers: List, url: str, scenarios: List[Dict], budget_s: float,
+               tabs: int = 2, timeout: float = 10) -> Dict:
+    """Run scenarios concurrently until done or the wall-clock budget runs out"""
+    work = queue.Queue()
+    for index, scenario in enumerate(scenarios):
+        work.put((index, scenario))
+    results: List[Dict] = []
+    started = time.time()
+    workers = [SessionWorker(driver, url, work, results, started + budget_s, tabs, timeout) for driver in drivers]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    results.sort(key=lambda r: r['index'])
+    return {
+        'wall_clock_s': round(time.time() - started, 1),
+        'budget_s': budget_s,
+        'sessions': len(drivers),
+        'tabs_per_session': tabs,
+        'scenarios': len(scenarios),
+        'executed': len(results),
+        'not_run': len(scenarios) - len(results),
+        'summary': summarize(results),
+        'results': results,
+    }
+
+
+def summarize(results: List[Dict]) -> Dict:
+    """Median and worst timing per step over passed scenarios"""
+    passed = [r for r in results if r['status'] == 'passed']
+    summary = {'passed': len(passed), 'failed': len(results) - len(passed)}
+    for metric in TIMING_METRICS:
+        values = [r['timings'][metric] for r in passed]
+        if values:
+            summary[metric] = {'median': round(statistics.median(values), 1), 'max': max(values)}
+    return summary
+
+
+def slowest(results: List[Dict], metric: str = 'total_ms') -> Optional[Dict]:
+    passed = [r for r in results if r['status'] == 'passed']
+    return max(passed, key=lambda r: r['timings'][metric]) if passed else None
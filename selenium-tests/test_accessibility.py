@@ -0,0 +1,33 @@
+import pytest
+import os
+
+from asset_audit import AUDIT_ROUTES
+from accessibility import VIEWPORTS, IMPACTS, audit_routes, findings_at_least
+
+
+# Routes and viewports audited; viewports are names from accessibility.VIEWPORTS
+A11Y_ROUTES = [r for r in os.getenv('A11Y_ROUTES', ','.join(AUDIT_ROUTES)).split(',') if r]
+A11Y_VIEWPORTS = [v for v in os.getenv('A11Y_VIEWPORTS', ','.join(VIEWPORTS)).split(',') if v]
+
+# Lowest impact that fails the test; lower impacts are only reported
+A11Y_FAIL_IMPACT = os.getenv('A11Y_FAIL_IMPACT', 'critical')
+
+
+@pytest.mark.slow
+class TestAccessibility:
+    """Accessibility rule set evaluated in-page on every route and viewport"""
+    
+    def test_accessibility_audit(self, driver):
+        """Alt text, labels, button names, contrast, heading order and focus across routes"""
+        unknown = [v for v in A11Y_VIEWPORTS if v not in VIEWPORTS]
+        assert not unknown, f"Unknown viewport(s) {unknown} (available: {', '.join(VIEWPORTS)})"
+        assert A11Y_FAIL_IMPACT in IMPACTS, f"A11Y_FAIL_IMPACT must be one of {', '.join(IMPACTS)}"
+        
+        report = audit_routes(driver, driver.base_url, A11Y_ROUTES,
+                              viewports={v: VIEWPORTS[v] for v in A11Y_VIEWPORTS})
+        
+        for rule, count in sorted(report['totals'].items()):
+            print(f"  {rule:<24} {count:>5}")
+        
+        failures = findings_at_least(report, A11Y_FAIL_IMPACT)
+        assert not failures, f"{len(failures)} {A11Y_FAIL_IMPACT}+ accessibility findings:\n" + "\n".join(failures)
@@ -0,0 +1,32 @@
+from asset_audit import diff_against_baseline
+
+
+def asset(name, raw_bytes, kind='script'):
+    return {'url': f"http://app{name}", 'name': name, 'kind': kind, 'raw_bytes': raw_bytes}
+
+
+class TestBaselineDiff:
+    """Diffs against a previous build whose audit recorded failed or undecoded assets"""
+
+    def test_baseline_with_error_and_undecoded_entries(self):
+        baseline = {
+            'build': '41',
+            'assets': [
+                {'url': 'http://app/static/js/missing.js', 'error': 'Read timed out'},
+                asset('/static/js/vendor.js', None),
+                asset('/static/js/main.js', 1000),
+            ],
+            'totals': {'script': {'raw_bytes': 1000}},
+        }
+        current = [asset('/static/js/vendor.js', 5000), asset('/static/js/main.js', 1200)]
+        
+        diff = diff_against_baseline(current, baseline)
+        
+        assert diff['assets'] == [{'name': '/static/js/main.js', 'before': 1000, 'after': 1200, 'delta': 200}]
+        assert diff['totals']['script']['after'] == 6200
+
+    def test_undecoded_current_asset_is_not_reported_as_removed(self):
+        baseline = {'assets': [asset('/static/js/main.js', 1000)], 'totals': {}}
+        current = [asset('/static/js/main.js', None), {'url': 'http://app/x.css', 'error': 'could not decode'}]
+        
+        assert diff_against_baseline(current, baseline)['assets'] == []
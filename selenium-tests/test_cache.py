@@ -0,0 +1,157 @@
+import pytest
+from selenium.webdriver.support.ui import WebDriverWait
+import json
+import os
+import time
+import requests
+
+from asset_audit import classify
+from json_state import sharded_path
+from devtools import (
+    supports_cdp, clear_browser_cache, set_cache_disabled,
+    resource_timings, classify_resource, summarize_sources
+)
+
+
+CACHE_ROUTES = ['/', '/Pets', '/SearchRooms']
+
+CACHE_REPORT = os.path.join('reports', 'cache-effectiveness.json')
+
+
+def load_route(driver, url):
+    """Navigate and wait until the load event fired and no new resources arrive"""
+    driver.get(url)
+    WebDriverWait(driver, 30).until(
+        lambda d: d.execute_script(
+            "var n = performance.getEntriesByType('navigation')[0]; return !!n && n.loadEventEnd > 0;"
+        )
+    )
+
+    count = -1
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        current = driver.execute_script("return performance.getEntriesByType('resource').length;")
+        if current == count:
+            break
+        count = current
+        time.sleep(0.5)
+
+    return resource_timings(driver)
+
+
+def check_conditional_request(session, url, cold_headers):
+    """Replay a request with its validators and return the status the server answers with"""
+    headers = {}
+    if cold_headers.get('etag'):
+        headers['If-None-Match'] = cold_headers['etag']
+    if cold_headers.get('last_modified'):
+        headers['If-Modified-Since'] = cold_headers['last_modified']
+    if not headers:
+        return None
+    return session.get(url, headers=headers, timeout=15).status_code
+
+
+@pytest.mark.slow
+@pytest.mark.fresh_load
+class TestRepeatVisitCache:
+    """Cold versus warm visits to check returning guests reuse cached assets"""
+
+    def test_warm_visit_reuses_cached_assets(self, driver):
+        """Load each route cold then warm and compare cache usage and latency"""
+        if not supports_cdp(driver):
+            pytest.skip("Cache toggling needs the DevTools protocol (Chrome only)")
+
+        session = requests.Session()
+        conditional_status = {}
+        results = {}
+        # Warm visits that loaded each asset, and those that went to the network for it
+        warm_loads = {}
+        warm_refetches = {}
+
+        for route in CACHE_ROUTES:
+            url = driver.base_url.rstrip('/') + route
+
+            # Cold: empty cache, then let the cache fill during this load
+            clear_browser_cache(driver)
+            set_cache_disabled(driver, False)
+            cold = load_route(driver, url)
+
+            # Warm: same route again, as a returning guest would
+            driver.get('about:blank')
+            warm = load_route(driver, url)
+
+            cold_ms = cold['navigation']['duration'] if cold['navigation'] else None
+            warm_ms = warm['navigation']['duration'] if warm['navigation'] else None
+            # API calls are expected to hit the network; only static assets are judged
+            refetched = sorted(
+                entry['name'] for entry in warm['resources']
+                if classify_resource(entry) == 'network' and classify(entry['name'])
+            )
+
+            # Validators come from the server, not Resource Timing, so ask it directly;
+            # routes share the bundle, so each static asset is checked once
+            validators = {}
+            for entry in cold['resources']:
+                if not entry['name'].startswith(driver.base_url) or not classify(entry['name']):
+                    continue
+                if entry['name'] in conditional_status:
+                    if conditional_status[entry['name']] is not None:
+                        validators[entry['name']] = conditional_status[entry['name']]
+                    continue
+                try:
+                    response = session.head(entry['name'], timeout=15)
+                    cold_headers = {
+                        'etag': response.headers.get('ETag'),
+                        'last_modified': response.headers.get('Last-Modified'),
+                    }
+                    status = check_conditional_request(session, entry['name'], cold_headers)
+                except requests.exceptions.RequestException as e:
+                    print(f"⚠ Could not check validators for {entry['name']}: {e}")
+                    continue
+                conditional_status[entry['name']] = status
+                if status is not None:
+                    validators[entry['name']] = status
+
+            results[route] = {
+                'cold_ms': round(cold_ms, 1) if cold_ms is not None else None,
+                'warm_ms': round(warm_ms, 1) if warm_ms is not None else None,
+                'saving_ms': round(cold_ms - warm_ms, 1) if cold_ms is not None and warm_ms is not None else None,
+                'cold_sources': summarize_sources(cold['resources']),
+                'warm_sources': summarize_sources(warm['resources']),
+                'refetched_on_warm_visit': refetched,
+                'conditional_status': validators,
+            }
+
+            warm_sources = results[route]['warm_sources']
+            cached = warm_sources.get('cache', {}).get('requests', 0) + warm_sources.get('revalidated', {}).get('requests', 0)
+            print(f"✓ {route}: cold {results[route]['cold_ms']} ms, warm {results[route]['warm_ms']} ms, "
+                  f"saving {results[route]['saving_ms']} ms, {cached}/{len(warm['resources'])} requests from cache")
+
+            for name, status in validators.items():
+                if status != 304:
+                    print(f"⚠ {name} has validators but answered a conditional request with {status}")
+
+            for entry in warm['resources']:
+                warm_loads[entry['name']] = warm_loads.get(entry['name'], 0) + 1
+            for name in refetched:
+                warm_refetches[name] = warm_refetches.get(name, 0) + 1
+
+        # An asset only one route uses counts as refetched every time if that route refetched it
+        refetched_everywhere = sorted(name for name, count in warm_refetches.items() if count >= warm_loads.get(name, 0))
+        for name in refetched_everywhere:
+            print(f"⚠ Refetched from the network on every warm visit: {name}")
+
+        report_path = sharded_path(CACHE_REPORT)
+        os.makedirs('reports', exist_ok=True)
+        with open(report_path, 'w') as f:
+            json.dump({
+                'routes': results,
+                'refetched_every_visit': refetched_everywhere,
+            }, f, indent=2)
+        print(f"✓ Cache effectiveness report written to {report_path}")
+
+        broken_validators = [
+            name for route in results.values()
+            for name, status in route['conditional_status'].items() if status != 304
+        ]
+        assert not broken_validators, f"Assets ignored conditional requests: {broken_validators}"
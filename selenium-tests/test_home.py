@@ -5,10 +5,15 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import time
 
+from pages import HomePage
+from scroll_reveal import ScrollRevealRecorder, write_scroll_report
 
+
+@pytest.mark.readonly
 class TestHomePage:
     """Test cases for SmartHotel360 home page functionality"""
     
+    @pytest.mark.smoke
     def test_page_loads_successfully(self, home_page):
         """Test that home page loads and has correct title"""
         assert "SmartHotel360" in home_page.title
@@ -52,7 +57,7 @@ class TestHomePage:
         
         # Check navigation container
         try:
-            nav_menu = home_page.find_element(By.CLASS_NAME, "sh-nav_menu")
+            nav_menu = HomePage(home_page).nav.container
             assert nav_menu.is_displayed()
             print("✓ Navigation menu container found")
         except NoSuchElementException:
@@ -70,7 +75,7 @@ class TestHomePage:
             print("✓ Search component found")
             
             # Check search tabs
-            search_tabs = home_page.find_elements(By.CLASS_NAME, "sh-search-tab")
+            search_tabs = HomePage(home_page).search.tabs
             assert len(search_tabs) >= 2, "Expected Smart Room and Conference Room tabs"
             print(f"✓ Found {len(search_tabs)} search tabs")
             
@@ -82,14 +87,9 @@ class TestHomePage:
         wait = WebDriverWait(home_page, 10)
         
         try:
-            # Scroll to conference section
-            home_page.execute_script("window.scrollTo(0, 1000);")
-            time.sleep(1)
-            
-            conf_features = wait.until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "[class*='conference'], [class*='Conference']"))
-            )
-            print("✓ Conference rooms section found")
+            # Scroll until the conference carousel is in view with its features rendered
+            reveal = ScrollRevealRecorder(home_page).start().wait_for_reveal("conference")
+            print(f"✓ Conference rooms section found (ready {reveal['reveal_ms']:.0f} ms after entering view)")
             
         except TimeoutException:
             print("⚠ Conference rooms section not found (this might be expected)")
@@ -99,13 +99,9 @@ class TestHomePage:
         wait = WebDriverWait(home_page, 10)
         
         try:
-            # Scroll to infogrid section
-            home_page.execute_script("window.scrollTo(0, 500);")
-            time.sleep(1)
-            
-            infogrid = wait.until(
-                EC.presence_of_element_located((By.CLASS_NAME, "sh-infogrid"))
-            )
+            # Scroll until the infogrid section is in view with its rows rendered
+            reveal = ScrollRevealRecorder(home_page).start().wait_for_reveal("infogrid")
+            print(f"✓ Smart experience section ready {reveal['reveal_ms']:.0f} ms after entering view")
             
             # Check for infogrid rows
             infogrid_rows = home_page.find_elements(By.CLASS_NAME, "sh-infogrid-row")
@@ -120,13 +116,8 @@ class TestHomePage:
         wait = WebDriverWait(home_page, 10)
         
         try:
-            # Scroll to smartphone section
-            home_page.execute_script("window.scrollTo(0, 2000);")
-            time.sleep(2)
-            
-            smartphone_section = wait.until(
-                EC.presence_of_element_located((By.CLASS_NAME, "sh-smartphone"))
-            )
+            # Scroll until the smartphone section is in view with its testimonial and image loaded
+            ScrollRevealRecorder(home_page).start().wait_for_reveal("smartphone")
             
             # Check for smartphone image
             smartphone_image = home_page.find_element(By.CLASS_NAME, "sh-smartphone-image")
@@ -141,9 +132,8 @@ class TestHomePage:
         wait = WebDriverWait(home_page, 10)
         
         try:
-            # Scroll to bottom
-            home_page.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
+            # Scroll until the featured rooms at the bottom are in view and rendered
+            ScrollRevealRecorder(home_page).start().wait_for_reveal("rooms")
             
             # Look for rooms container or similar
             rooms_elements = home_page.find_elements(By.CSS_SELECTOR, "[class*='room'], [class*='Room']")
@@ -155,6 +145,28 @@ class TestHomePage:
         except Exception as e:
             print(f"⚠ Error checking rooms section: {e}")
     
+    @pytest.mark.fresh_load
+    def test_scroll_reveal_and_jank(self, home_page):
+        """Smooth scroll through the page, timing section reveals, dropped frames and long tasks"""
+        result = ScrollRevealRecorder(home_page).start().wait_until_scrolled()
+        write_scroll_report(result)
+        
+        for name, section in result['sections'].items():
+            if section['ready_ms'] is not None:
+                print(f"✓ {name}: in view at {section['entered_ms']:.0f} ms, ready {section['reveal_ms']:.0f} ms later")
+            elif section['entered_ms'] is not None:
+                print(f"⚠ {name}: in view at {section['entered_ms']:.0f} ms but content never became ready")
+        
+        frames = result['frames']
+        if frames['frames']:
+            print(f"ℹ {frames['frames']} frames, {frames['dropped_frames']} dropped ({frames['dropped_percent']}%), "
+                  f"p95 {frames['p95_frame_ms']} ms")
+        if result['long_tasks'] is not None:
+            print(f"ℹ {result['long_tasks']['count']} long tasks ({result['long_tasks']['total_ms']:.0f} ms) during the scroll")
+        
+        missed = [name for name, section in result['sections'].items() if section['entered_ms'] is None]
+        assert not missed, f"Sections never scrolled into view: {missed}"
+    
     def test_page_responsiveness_basic(self, home_page):
         """Basic responsiveness test - resize window"""
         original_size = home_page.get_window_size()
@@ -165,11 +177,9 @@ class TestHomePage:
             time.sleep(1)
             
             # Check if page still loads main elements
-            nav_menu = home_page.find_element(By.CLASS_NAME, "sh-nav_menu")
-            assert nav_menu.is_displayed()
-            
-            search_component = home_page.find_element(By.CLASS_NAME, "sh-search")
-            assert search_component.is_displayed()
+            page = HomePage(home_page)
+            assert page.nav.container.is_displayed()
+            assert page.search.root.is_displayed()
             
             print("✓ Page responsive on mobile size")
             
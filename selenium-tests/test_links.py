@@ -0,0 +1,31 @@
+import pytest
+import os
+
+from asset_audit import AUDIT_ROUTES
+from link_checker import check_links
+
+
+# Routes whose rendered DOM is crawled for href/src/srcset references
+LINK_ROUTES = [r for r in os.getenv('LINK_ROUTES', ','.join(AUDIT_ROUTES)).split(',') if r]
+
+# Concurrent checks overall and per host, so a CDN is not hammered by the whole pool
+LINK_WORKERS = int(os.getenv('LINK_WORKERS', '16'))
+LINK_HOST_CONCURRENCY = int(os.getenv('LINK_HOST_CONCURRENCY', '4'))
+
+# Links answering slower than this are reported but do not fail the test
+LINK_SLOW_MS = float(os.getenv('LINK_SLOW_MS', '2000'))
+
+
+@pytest.mark.slow
+class TestLinks:
+    """Every link and asset referenced by the rendered routes resolves"""
+    
+    def test_no_broken_links(self, driver):
+        """HEAD (or ranged GET) every unique URL; healthy results are cached between builds"""
+        report = check_links(driver, driver.base_url, LINK_ROUTES, workers=LINK_WORKERS,
+                             per_host=LINK_HOST_CONCURRENCY, slow_ms=LINK_SLOW_MS)
+        
+        assert report['links'], f"No links found on {LINK_ROUTES}"
+        broken = [f"{r['url']} ({r.get('status') or r.get('error')}) on {', '.join(r['pages'])}"
+                  for r in report['broken']]
+        assert not broken, f"{len(broken)} broken links:\n" + "\n".join(broken)
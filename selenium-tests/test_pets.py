@@ -6,10 +6,14 @@ from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import time
 import os
 
+from pages import HomePage, PetsPage
+from accessibility import AccessibilityAuditor
+
 
 class TestPetsFunctionality:
     """Test cases for SmartHotel360 pets feature"""
     
+    @pytest.mark.smoke
     def test_pets_page_navigation(self, driver):
         """Test navigation to pets page"""
         wait = WebDriverWait(driver, 10)
@@ -74,7 +78,7 @@ class TestPetsFunctionality:
         
         try:
             # Look for file input
-            file_inputs = driver.find_elements(By.CSS_SELECTOR, "input[type='file']")
+            file_inputs = PetsPage(driver).file_inputs
             
             if file_inputs:
                 file_input = file_inputs[0]
@@ -129,8 +133,7 @@ class TestPetsFunctionality:
         
         try:
             # Look for name input field
-            name_inputs = driver.find_elements(By.CSS_SELECTOR, 
-                "input[placeholder*='name'], input[name*='name'], input[id*='name']")
+            name_inputs = PetsPage(driver).name_inputs
             
             if name_inputs:
                 name_input = name_inputs[0]
@@ -208,16 +211,14 @@ class TestPetsFunctionality:
             time.sleep(2)
             
             # Try to activate guests section and enable pets
-            search_groups = driver.find_elements(By.CLASS_NAME, "sh-search-group")
+            search = HomePage(driver).search
             
-            if len(search_groups) >= 3:
-                # Click guests section
-                search_groups[2].click()
+            # Click guests section
+            if search.open_group(2):
                 time.sleep(2)
                 
                 # Look for pet selection buttons
-                pet_buttons = driver.find_elements(By.CSS_SELECTOR, 
-                    "button[class*='guest'][class*='extra'], .sh-guests-extra_button")
+                pet_buttons = search.guest_extra_buttons
                 
                 if len(pet_buttons) >= 2:
                     # Click "Yes" for bringing pets
@@ -225,15 +226,10 @@ class TestPetsFunctionality:
                     time.sleep(1)
                     
                     # Look for "Check it" link to pets page
-                    pet_links = driver.find_elements(By.CSS_SELECTOR, 
-                        "a[href*='Pets'], .sh-guests-pets_link")
+                    pet_links = search.pets_links
                     
                     if pet_links:
-                        visible_link = None
-                        for link in pet_links:
-                            if link.is_displayed():
-                                visible_link = link
-                                break
+                        visible_link = search.visible(pet_links)
                         
                         if visible_link:
                             print("✓ Pet check link found and visible")
@@ -273,32 +269,17 @@ class TestPetsFunctionality:
         time.sleep(3)
         
         try:
-            # Check for alt attributes on images
-            images = driver.find_elements(By.TAG_NAME, "img")
-            images_with_alt = 0
-            
-            for img in images:
-                alt_text = img.get_attribute("alt")
-                if alt_text:
-                    images_with_alt += 1
-            
-            print(f"✓ {images_with_alt}/{len(images)} images have alt attributes")
-            
-            # Check for form labels
-            inputs = driver.find_elements(By.TAG_NAME, "input")
-            labels = driver.find_elements(By.TAG_NAME, "label")
-            
-            print(f"✓ Found {len(labels)} labels for {len(inputs)} inputs")
+            # Evaluate the accessibility rule set in one round trip
+            page = AccessibilityAuditor(cache_path=None).audit(driver)
+            stats = page['stats']
             
-            # Check for button text
-            buttons = driver.find_elements(By.TAG_NAME, "button")
-            buttons_with_text = 0
+            print(f"✓ Audited {stats['images']} images, {stats['inputs']} inputs and {stats['buttons']} buttons")
             
-            for button in buttons:
-                if button.text.strip():
-                    buttons_with_text += 1
+            for finding in page['findings']:
+                print(f"⚠ {finding['rule']} ({finding['impact']}): {finding['count']} elements")
             
-            print(f"✓ {buttons_with_text}/{len(buttons)} buttons have text content")
+            if not page['findings']:
+                print("✓ No accessibility findings")
             
         except Exception as e:
             print(f"⚠ Error checking pets page accessibility: {e}")
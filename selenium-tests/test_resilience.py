@@ -0,0 +1,97 @@
+import pytest
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+import base64
+import os
+import time
+
+from local_proxy import FaultRule
+
+
+# How quickly the UI must become usable while a backend dependency misbehaves
+TIME_TO_USABLE_BUDGET_MS = float(os.getenv('TIME_TO_USABLE_BUDGET_MS', '5000'))
+
+# 1x1 PNG picked in the pet uploader
+PIXEL_PNG = base64.b64decode(
+    'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII='
+)
+
+
+def time_to_usable(driver, url, locator, timeout=30):
+    """Milliseconds from starting navigation until the element is clickable"""
+    start = time.time()
+    driver.get(url)
+    try:
+        WebDriverWait(driver, timeout).until(EC.element_to_be_clickable(locator))
+    except TimeoutException:
+        pytest.fail(f"{locator[1]} never became interactive within {timeout}s")
+    return (time.time() - start) * 1000
+
+
+def assert_faults_matched(proxy):
+    """A rule that never matched a request means the scenario exercised nothing"""
+    unmatched = [rule for rule in proxy.faults if not rule.hits]
+    assert not unmatched, f"Fault rules never matched a request: {unmatched}"
+
+
+@pytest.mark.slow
+class TestFrontendResilience:
+    """Time-to-usable-UI while backend API calls are slow, failing or hanging"""
+
+    @pytest.mark.faults(FaultRule(r'/api/testimonials', hang=True))
+    def test_search_usable_while_testimonials_hang(self, driver, fault_scenario):
+        """Search widget is interactive even when testimonials never answer"""
+        elapsed = time_to_usable(driver, driver.base_url, (By.CSS_SELECTOR, "input[placeholder*='Where']"))
+        print(f"✓ Search input interactive after {elapsed:.0f} ms with testimonials hanging")
+        assert_faults_matched(fault_scenario)
+        assert elapsed <= TIME_TO_USABLE_BUDGET_MS, \
+            f"Search took {elapsed:.0f} ms to become usable (budget {TIME_TO_USABLE_BUDGET_MS:.0f} ms)"
+
+    @pytest.mark.faults(FaultRule(r'/api/testimonials', status=500))
+    def test_home_renders_when_testimonials_fail(self, driver, fault_scenario):
+        """Hero and search still render when testimonials return 500"""
+        elapsed = time_to_usable(driver, driver.base_url, (By.CLASS_NAME, "sh-search-tab"))
+        hero_title = driver.find_element(By.CLASS_NAME, "sh-hero-title")
+        assert hero_title.is_displayed()
+        print(f"✓ Home page usable after {elapsed:.0f} ms with testimonials returning 500")
+        assert_faults_matched(fault_scenario)
+        assert elapsed <= TIME_TO_USABLE_BUDGET_MS
+
+    @pytest.mark.faults(FaultRule(r'/api/(Pets|SignalRInfo)', latency_ms=8000, methods=['POST']))
+    def test_pets_page_usable_while_upload_slow(self, driver, fault_scenario, tmp_path):
+        """Pets page stays interactive while the upload requests take 8 seconds"""
+        time_to_usable(driver, f"{driver.base_url}/Pets", (By.CLASS_NAME, "sh-uploader"))
+        picture = tmp_path / 'pet.png'
+        picture.write_bytes(PIXEL_PNG)
+        
+        # The page only calls the pets API when a picture is uploaded
+        driver.find_element(By.CSS_SELECTOR, "input[type='file']").send_keys(str(picture))
+        try:
+            WebDriverWait(driver, 10).until(lambda d: fault_scenario.faults[0].hits > 0)
+        except TimeoutException:
+            pytest.fail("Picking a picture sent no upload request through the proxy")
+        
+        start = time.time()
+        WebDriverWait(driver, 30).until(EC.element_to_be_clickable((By.CSS_SELECTOR, ".sh-nav_menu-links a")))
+        elapsed = (time.time() - start) * 1000
+        assert driver.find_element(By.CLASS_NAME, "sh-uploader").is_displayed()
+        print(f"✓ Navigation interactive {elapsed:.0f} ms into an upload delayed 8s")
+        assert elapsed <= TIME_TO_USABLE_BUDGET_MS
+
+    @pytest.mark.faults(FaultRule(r'/api/testimonials', drop=True))
+    def test_home_survives_dropped_connections(self, driver, fault_scenario):
+        """Home page stays usable when the testimonials connection is reset"""
+        elapsed = time_to_usable(driver, driver.base_url, (By.CSS_SELECTOR, "input[placeholder*='Where']"))
+        print(f"✓ Search input interactive after {elapsed:.0f} ms with dropped API connections")
+        assert_faults_matched(fault_scenario)
+        assert elapsed <= TIME_TO_USABLE_BUDGET_MS
+
+    @pytest.mark.faults(FaultRule(r'/api/config', latency_ms=1500, bandwidth_kbps=64))
+    def test_search_usable_with_slow_config(self, driver, fault_scenario):
+        """Search becomes usable once a slow, bandwidth-capped /api/config arrives"""
+        elapsed = time_to_usable(driver, driver.base_url, (By.CSS_SELECTOR, "input[placeholder*='Where']"))
+        print(f"✓ Search input interactive after {elapsed:.0f} ms with /api/config delayed 1.5s at 64 kbit/s")
+        assert_faults_matched(fault_scenario)
+        assert elapsed <= TIME_TO_USABLE_BUDGET_MS + 1500
@@ -0,0 +1,45 @@
+from results_store import connect, compare_builds
+
+
+def store_builds(db_path, durations):
+    """One build per page-load duration, oldest first, next to a test whose duration stays steady"""
+    with connect(db_path) as conn:
+        for number, seconds in enumerate(durations, start=1):
+            build_id = conn.execute('INSERT INTO builds (build, browser, recorded_at) VALUES (?, ?, ?)',
+                                    (str(number), 'chrome', number)).lastrowid
+            conn.execute('INSERT INTO samples (build_id, series, value) VALUES (?, ?, ?)',
+                         (build_id, 'test:test_home.py::TestHomePage::test_page_load', seconds))
+            conn.execute('INSERT INTO samples (build_id, series, value) VALUES (?, ?, ?)',
+                         (build_id, 'test:test_home.py::TestHomePage::test_navigation_menu', 3.0 + number % 3 * 0.05))
+
+
+class TestRegressionDetection:
+    """Per-test durations have one value per build and must still be judged at the defaults"""
+
+    BASELINE = [10.2, 9.8, 10.0, 10.4, 9.9, 10.1, 10.3, 9.7, 10.0, 10.2]
+
+    def test_slow_test_flagged_with_default_settings(self, tmp_path):
+        db_path = str(tmp_path / 'results.db')
+        store_builds(db_path, self.BASELINE + [14.0])
+        report = compare_builds(db_path=db_path, report_path=str(tmp_path / 'regressions.json'))
+        
+        flagged = [r['series'] for r in report['regressions']]
+        assert flagged == ['test:test_home.py::TestHomePage::test_page_load']
+        assert report['regressions'][0]['test'] == 'robust-z'
+        assert report['underpowered'] == 0
+
+    def test_usual_duration_not_flagged(self, tmp_path):
+        db_path = str(tmp_path / 'results.db')
+        store_builds(db_path, self.BASELINE + [10.3])
+        report = compare_builds(db_path=db_path, report_path=str(tmp_path / 'regressions.json'))
+        
+        assert report['regressions'] == []
+        assert report['compared'] == 2
+
+    def test_short_history_is_underpowered(self, tmp_path):
+        db_path = str(tmp_path / 'results.db')
+        store_builds(db_path, self.BASELINE[:3] + [14.0])
+        report = compare_builds(db_path=db_path, report_path=str(tmp_path / 'regressions.json'))
+        
+        assert report['regressions'] == []
+        assert report['underpowered'] == 2
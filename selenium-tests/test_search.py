@@ -6,30 +6,26 @@ from selenium.webdriver.common.keys import Keys
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import time
 
+from pages import HomePage
+
 
 class TestSearchFunctionality:
     """Test cases for SmartHotel360 search functionality"""
     
+    @pytest.mark.smoke
     def test_search_tabs_present(self, home_page):
         """Test that search tabs are present and clickable"""
         wait = WebDriverWait(home_page, 10)
+        search = HomePage(home_page).search
         
         try:
-            search_tabs = wait.until(
-                EC.presence_of_all_elements_located((By.CLASS_NAME, "sh-search-tab"))
-            )
+            search_tabs = wait.until(lambda driver: search.tabs)
             
             assert len(search_tabs) >= 2
             
             # Check Smart Room tab
-            smart_tab = None
-            conference_tab = None
-            
-            for tab in search_tabs:
-                if "smart room" in tab.text.lower():
-                    smart_tab = tab
-                elif "conference" in tab.text.lower():
-                    conference_tab = tab
+            smart_tab = search.tab("smart room")
+            conference_tab = search.tab("conference")
             
             assert smart_tab is not None, "Smart Room tab not found"
             assert conference_tab is not None, "Conference Room tab not found"
@@ -48,42 +44,20 @@ class TestSearchFunctionality:
     def test_where_input_functionality(self, home_page):
         """Test location search input"""
         wait = WebDriverWait(home_page, 10)
+        search = HomePage(home_page).search
         
         try:
             # Find where input (might be input or div)
-            where_input = None
-            
-            # Try different selectors
-            possible_selectors = [
-                (By.CSS_SELECTOR, "input[placeholder*='Where']"),
-                (By.CSS_SELECTOR, "[ref='whereinput']"),
-                (By.CSS_SELECTOR, ".sh-search-input"),
-                (By.XPATH, "//input[contains(@placeholder, 'Where')]")
-            ]
-            
-            for selector in possible_selectors:
-                try:
-                    where_input = home_page.find_element(*selector)
-                    if where_input.is_displayed():
-                        break
-                except NoSuchElementException:
-                    continue
+            where_input = search.where_input if search.has("where_input") else None
             
             if where_input is None:
                 # Try clicking on search area to activate input
-                search_groups = home_page.find_elements(By.CLASS_NAME, "sh-search-group")
-                if search_groups:
-                    search_groups[0].click()
+                if search.open_group(0):
                     time.sleep(1)
                     
                     # Try finding input again
-                    for selector in possible_selectors:
-                        try:
-                            where_input = home_page.find_element(*selector)
-                            if where_input.is_displayed():
-                                break
-                        except NoSuchElementException:
-                            continue
+                    if search.has("where_input"):
+                        where_input = search.where_input
             
             if where_input:
                 # Test typing in location
@@ -93,7 +67,7 @@ class TestSearchFunctionality:
                 
                 # Check if suggestions appear
                 try:
-                    suggestions = home_page.find_elements(By.CLASS_NAME, "sh-search-option")
+                    suggestions = search.options
                     if suggestions:
                         print(f"✓ Found {len(suggestions)} location suggestions")
                         # Click first suggestion
@@ -114,6 +88,7 @@ class TestSearchFunctionality:
     def test_when_date_selection(self, home_page):
         """Test date picker functionality"""
         wait = WebDriverWait(home_page, 10)
+        search = HomePage(home_page).search
         
         try:
             # Find and click when section
@@ -152,7 +127,7 @@ class TestSearchFunctionality:
                             
                             # Try to click a date
                             try:
-                                date_elements = home_page.find_elements(By.CSS_SELECTOR, ".react-datepicker__day:not(.react-datepicker__day--disabled)")
+                                date_elements = search.available_days
                                 if date_elements:
                                     date_elements[5].click()  # Click a future date
                                     time.sleep(1)
@@ -175,6 +150,7 @@ class TestSearchFunctionality:
     def test_guests_selection(self, home_page):
         """Test guests/rooms selection functionality"""
         wait = WebDriverWait(home_page, 10)
+        search = HomePage(home_page).search
         
         try:
             # Find guests section
@@ -198,13 +174,13 @@ class TestSearchFunctionality:
             if guests_clicked:
                 # Check for guests configuration panel
                 try:
-                    guests_config = home_page.find_element(By.CLASS_NAME, "sh-guests")
+                    guests_config = search.guests_panel
                     if guests_config.is_displayed():
                         print("✓ Guests configuration panel found")
                         
                         # Test increment/decrement buttons
                         try:
-                            increment_buttons = home_page.find_elements(By.CSS_SELECTOR, "button[class*='increment'], .sh-guests-room_button")
+                            increment_buttons = search.guest_room_buttons
                             if increment_buttons:
                                 increment_buttons[0].click()
                                 time.sleep(1)
@@ -214,7 +190,7 @@ class TestSearchFunctionality:
                         
                         # Test room selection
                         try:
-                            room_buttons = home_page.find_elements(By.CLASS_NAME, "sh-guests-room")
+                            room_buttons = search.guest_rooms
                             if room_buttons:
                                 room_buttons[0].click()
                                 time.sleep(1)
@@ -224,14 +200,14 @@ class TestSearchFunctionality:
                             
                         # Test pet selection
                         try:
-                            pet_buttons = home_page.find_elements(By.CSS_SELECTOR, "button[class*='guest'][class*='extra'], .sh-guests-extra_button")
+                            pet_buttons = search.guest_extra_buttons
                             if len(pet_buttons) >= 2:
                                 pet_buttons[1].click()  # Click "Yes" for pets
                                 time.sleep(1)
                                 print("✓ Pet selection working")
                                 
                                 # Check if "Check it" link appears
-                                pet_link = home_page.find_elements(By.CSS_SELECTOR, "[href*='Pets'], .sh-guests-pets_link")
+                                pet_link = search.pets_links
                                 if pet_link:
                                     print("✓ Pet check link found")
                         except Exception:
@@ -248,24 +224,11 @@ class TestSearchFunctionality:
     def test_find_room_button(self, home_page):
         """Test Find a Room button functionality"""
         wait = WebDriverWait(home_page, 10)
+        search = HomePage(home_page).search
         
         try:
             # Look for Find a Room button
-            find_room_selectors = [
-                (By.LINK_TEXT, "Find a Room"),
-                (By.PARTIAL_LINK_TEXT, "Find"),
-                (By.CLASS_NAME, "sh-search-button"),
-                (By.CSS_SELECTOR, "a[href*='SearchRooms']")
-            ]
-            
-            find_button = None
-            for selector in find_room_selectors:
-                try:
-                    find_button = home_page.find_element(*selector)
-                    if find_button.is_displayed():
-                        break
-                except NoSuchElementException:
-                    continue
+            find_button = search.find_button if search.has("find_button") else None
             
             if find_button:
                 # Check if button is enabled/disabled
@@ -292,16 +255,11 @@ class TestSearchFunctionality:
     def test_conference_room_tab(self, home_page):
         """Test Conference Room tab functionality"""
         wait = WebDriverWait(home_page, 10)
+        search = HomePage(home_page).search
         
         try:
             # Find and click Conference Room tab
-            search_tabs = home_page.find_elements(By.CLASS_NAME, "sh-search-tab")
-            
-            conference_tab = None
-            for tab in search_tabs:
-                if "conference" in tab.text.lower():
-                    conference_tab = tab
-                    break
+            conference_tab = search.tab("conference")
             
             if conference_tab:
                 conference_tab.click()
@@ -312,11 +270,8 @@ class TestSearchFunctionality:
                     print("✓ Conference Room tab activated")
                     
                     # Check if button text changed
-                    find_buttons = home_page.find_elements(By.CLASS_NAME, "sh-search-button")
-                    for button in find_buttons:
-                        if "conference" in button.text.lower():
-                            print("✓ Button text changed to Conference Room")
-                            break
+                    if search.has("find_button") and "conference" in search.find_button.text.lower():
+                        print("✓ Button text changed to Conference Room")
                 else:
                     print("⚠ Conference Room tab not activated")
             else:
@@ -328,26 +283,24 @@ class TestSearchFunctionality:
     def test_search_workflow_end_to_end(self, home_page):
         """Test complete search workflow"""
         wait = WebDriverWait(home_page, 10)
+        search = HomePage(home_page).search
         
         try:
             print("Starting end-to-end search workflow test...")
             
             # Step 1: Enter location
-            search_groups = home_page.find_elements(By.CLASS_NAME, "sh-search-group")
-            if search_groups:
-                search_groups[0].click()
+            if search.open_group(0):
                 time.sleep(1)
                 
                 # Try to find and use location input
-                location_inputs = home_page.find_elements(By.CSS_SELECTOR, "input[placeholder*='Where'], .sh-search-input")
-                if location_inputs:
-                    location_input = location_inputs[0]
+                if search.has("where_input"):
+                    location_input = search.where_input
                     location_input.clear()
                     location_input.send_keys("Seattle")
                     time.sleep(2)
                     
                     # Try to select first suggestion
-                    suggestions = home_page.find_elements(By.CLASS_NAME, "sh-search-option")
+                    suggestions = search.options
                     if suggestions:
                         suggestions[0].click()
                         time.sleep(1)
@@ -358,12 +311,11 @@ class TestSearchFunctionality:
                     print("⚠ Step 1: Location input not found")
             
             # Step 2: Select dates (if when section available)
-            if len(search_groups) >= 2:
-                search_groups[1].click()
+            if search.open_group(1):
                 time.sleep(2)
                 
                 # Look for date picker
-                date_pickers = home_page.find_elements(By.CSS_SELECTOR, ".react-datepicker__day:not(.react-datepicker__day--disabled)")
+                date_pickers = search.available_days
                 if date_pickers and len(date_pickers) >= 2:
                     date_pickers[1].click()  # Start date
                     time.sleep(1)
@@ -375,16 +327,13 @@ class TestSearchFunctionality:
                     print("⚠ Step 2: Date selection not available")
             
             # Step 3: Configure guests (if guests section available)
-            if len(search_groups) >= 3:
-                search_groups[2].click()
+            if search.open_group(2):
                 time.sleep(2)
                 print("✓ Step 3: Guests section opened")
             
             # Step 4: Check Find button status
-            find_buttons = home_page.find_elements(By.CLASS_NAME, "sh-search-button")
-            if find_buttons:
-                button = find_buttons[0]
-                is_disabled = "disabled" in button.get_attribute("class").lower()
+            if search.has("find_button"):
+                is_disabled = search.find_button_disabled()
                 print(f"✓ Step 4: Find button status - {'Disabled' if is_disabled else 'Enabled'}")
             
             print("✓ End-to-end search workflow test completed")
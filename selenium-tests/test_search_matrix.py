@@ -0,0 +1,69 @@
+import pytest
+import json
+import os
+
+from json_state import sharded_path
+from search_matrix import pairwise, all_combinations, run_matrix, slowest, TIMING_METRICS
+
+
+# Values per search parameter; every pair of values appears in at least one scenario.
+# check_in is days from today, nights the stay length. Override with a JSON object.
+SEARCH_MATRIX_SPEC = json.loads(os.getenv('SEARCH_MATRIX_SPEC', '') or json.dumps({
+    'location': ['Seattle', 'New York', 'Barcelona', 'London'],
+    'check_in': [1, 14],
+    'nights': [1, 3, 7],
+    'rooms': [1, 2],
+    'adults': [1, 2, 4],
+    'kids': [0, 2],
+    'pets': [False, True],
+}))
+
+# 'pairwise' (default) or 'full' for the complete cartesian product
+SEARCH_MATRIX_MODE = os.getenv('SEARCH_MATRIX_MODE', 'pairwise')
+
+# Wall-clock budget; scenarios not started by then are reported as not run
+SEARCH_MATRIX_BUDGET = float(os.getenv('SEARCH_MATRIX_BUDGET', '300'))
+
+# Tabs per session: while one tab runs a scenario the others preload a fresh home page
+SEARCH_MATRIX_TABS = int(os.getenv('SEARCH_MATRIX_TABS', '2'))
+
+SEARCH_MATRIX_REPORT = os.path.join('reports', 'search-matrix.json')
+
+
+@pytest.mark.slow
+class TestSearchMatrix:
+    """Search widget over a pairwise matrix of locations, dates and guest configurations"""
+
+    def test_search_matrix(self, browser_pool):
+        """Every scenario reaches an enabled Find button; per-step timings are recorded"""
+        if SEARCH_MATRIX_MODE == 'full':
+            scenarios = all_combinations(SEARCH_MATRIX_SPEC)
+        else:
+            scenarios = pairwise(SEARCH_MATRIX_SPEC)
+        print(f"ℹ {len(scenarios)} {SEARCH_MATRIX_MODE} scenarios "
+              f"(full product has {len(all_combinations(SEARCH_MATRIX_SPEC))}) on {len(browser_pool)} sessions "
+              f"x {SEARCH_MATRIX_TABS} tabs, budget {SEARCH_MATRIX_BUDGET:.0f}s")
+
+        report = run_matrix(browser_pool, browser_pool[0].base_url, scenarios, SEARCH_MATRIX_BUDGET,
+                            tabs=SEARCH_MATRIX_TABS)
+
+        report_path = sharded_path(SEARCH_MATRIX_REPORT)
+        os.makedirs('reports', exist_ok=True)
+        with open(report_path, 'w') as f:
+            json.dump(dict(report, spec=SEARCH_MATRIX_SPEC, mode=SEARCH_MATRIX_MODE), f, indent=2)
+
+        summary = report['summary']
+        for metric in TIMING_METRICS:
+            if metric in summary:
+                print(f"  {metric:<18} median {summary[metric]['median']:>8.0f} ms   max {summary[metric]['max']:>8.0f} ms")
+        worst = slowest(report['results'])
+        if worst:
+            print(f"ℹ Slowest scenario: {worst['label']} ({worst['timings']['total_ms']:.0f} ms)")
+        print(f"✓ {report['executed']}/{report['scenarios']} scenarios in {report['wall_clock_s']}s, "
+              f"report written to {report_path}")
+
+        assert report['executed'] > 0, "No scenario started within the budget"
+        if report['not_run']:
+            print(f"⚠ {report['not_run']} scenarios did not start within {SEARCH_MATRIX_BUDGET:.0f}s")
+        failures = [f"{r['label']}: {r['error']}" for r in report['results'] if r['status'] == 'failed']
+        assert not failures, f"{len(failures)} search scenarios failed:\n" + "\n".join(failures)
@@ -0,0 +1,193 @@
+import pytest
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+import json
+import os
+import statistics
+import time
+
+from json_state import sharded_path
+
+
+# Cities typed one keystroke at a time; override with a comma separated list
+TYPEAHEAD_QUERIES = [
+    q.strip() for q in os.getenv(
+        'TYPEAHEAD_QUERIES', 'Seattle,New York,San Francisco,Barcelona,London,Boston'
+    ).split(',') if q.strip()
+]
+
+# Pause between keystrokes, roughly a fast typist
+TYPEAHEAD_KEY_DELAY = float(os.getenv('TYPEAHEAD_KEY_DELAY', '0.12'))
+
+# How long to wait for outstanding suggestion requests after the last keystroke
+TYPEAHEAD_SETTLE_TIMEOUT = float(os.getenv('TYPEAHEAD_SETTLE_TIMEOUT', '5'))
+
+TYPEAHEAD_REPORT = os.path.join('reports', 'typeahead-benchmark.json')
+
+# Wraps window.fetch for the Cities endpoint and records keystrokes and
+# suggestion list renders with performance.now() timestamps, so the timings
+# come from the page itself rather than WebDriver round trips.
+INSTRUMENT_SCRIPT = """
+if (window.__shTypeahead) { return; }
+var state = window.__shTypeahead = {requests: [], keys: [], renders: []};
+var originalFetch = window.fetch;
+window.fetch = function (input) {
+    var url = typeof input === 'string' ? input : (input && input.url) || '';
+    if (url.indexOf('Cities?name=') === -1) {
+        return originalFetch.apply(this, arguments);
+    }
+    var entry = {
+        seq: state.requests.length + 1,
+        query: decodeURIComponent(url.split('name=')[1] || ''),
+        sent: performance.now(),
+        received: null
+    };
+    state.requests.push(entry);
+    return originalFetch.apply(this, arguments).then(function (response) {
+        entry.received = performance.now();
+        return response;
+    });
+};
+document.addEventListener('keyup', function (e) {
+    if (e.target && e.target.getAttribute && e.target.getAttribute('placeholder') === 'Where') {
+        state.keys.push({t: performance.now(), value: e.target.value});
+    }
+}, true);
+new MutationObserver(function () {
+    var options = document.querySelectorAll('.sh-search-group .sh-search-option');
+    var last = state.renders[state.renders.length - 1];
+    var first = options.length ? options[0].textContent : '';
+    if (!last || last.count !== options.length || last.first !== first) {
+        state.renders.push({t: performance.now(), count: options.length, first: first});
+    }
+}).observe(document.body, {childList: true, subtree: true, characterData: true});
+"""
+
+
+def analyze_keystrokes(query, state):
+    """Turn the raw in-page timeline for one query into per-keystroke samples"""
+    keys = state['keys']
+    requests = state['requests']
+    renders = state['renders']
+    samples = []
+
+    for index, key in enumerate(keys):
+        window_end = keys[index + 1]['t'] if index + 1 < len(keys) else float('inf')
+        sent = [r for r in requests if key['t'] <= r['sent'] < window_end]
+
+        # Suggestions have refreshed once a non-empty list renders after the keystroke
+        refresh = next((r for r in renders if r['t'] > key['t'] and r['count'] > 0), None)
+        refresh_ms = None
+        if refresh is not None and refresh['t'] < window_end:
+            refresh_ms = round(refresh['t'] - key['t'], 1)
+
+        # A response is stale when it lands after the response to a newer request,
+        # because the store dispatches every response and the older list wins
+        stale = False
+        for request in sent:
+            if request['received'] is None:
+                continue
+            stale = stale or any(
+                newer['seq'] > request['seq'] and newer['received'] is not None
+                and newer['received'] < request['received']
+                for newer in requests
+            )
+
+        samples.append({
+            'query': query,
+            'prefix': key['value'],
+            'prefix_length': len(key['value']),
+            'requests_sent': len(sent),
+            'refresh_ms': refresh_ms,
+            'stale_overwrite': stale,
+        })
+
+    return samples
+
+
+def summarize_by_prefix_length(samples):
+    """Aggregate keystroke samples per prefix length"""
+    summary = {}
+    for length in sorted({s['prefix_length'] for s in samples}):
+        bucket = [s for s in samples if s['prefix_length'] == length]
+        latencies = sorted(s['refresh_ms'] for s in bucket if s['refresh_ms'] is not None)
+        summary[length] = {
+            'keystrokes': len(bucket),
+            'requests': sum(s['requests_sent'] for s in bucket),
+            'refreshed': len(latencies),
+            'median_ms': round(statistics.median(latencies), 1) if latencies else None,
+            'p90_ms': latencies[int(0.9 * (len(latencies) - 1))] if latencies else None,
+            'stale_overwrites': sum(1 for s in bucket if s['stale_overwrite']),
+        }
+    return summary
+
+
+@pytest.mark.slow
+class TestTypeaheadLatency:
+    """Keystroke-level latency benchmark for the "Where" location input"""
+
+    def type_query(self, driver, query):
+        """Type a query one keystroke at a time and return the in-page timeline"""
+        wait = WebDriverWait(driver, 10)
+        where_input = wait.until(
+            EC.element_to_be_clickable((By.CSS_SELECTOR, "input[placeholder*='Where']"))
+        )
+        where_input.click()
+        where_input.clear()
+        driver.execute_script(
+            "var s = window.__shTypeahead; s.requests = []; s.keys = []; s.renders = [];"
+        )
+
+        for char in query:
+            where_input.send_keys(char)
+            time.sleep(TYPEAHEAD_KEY_DELAY)
+
+        try:
+            WebDriverWait(driver, TYPEAHEAD_SETTLE_TIMEOUT).until(
+                lambda d: d.execute_script(
+                    "return window.__shTypeahead.requests.every(function (r) { return r.received !== null; });"
+                )
+            )
+        except TimeoutException:
+            print(f"⚠ Suggestion requests for '{query}' still pending after {TYPEAHEAD_SETTLE_TIMEOUT}s")
+
+        return driver.execute_script("return window.__shTypeahead;")
+
+    def test_typeahead_latency_per_prefix_length(self, home_page):
+        """Benchmark suggestion refresh time, request count and stale overwrites per keystroke"""
+        home_page.execute_script(INSTRUMENT_SCRIPT)
+
+        samples = []
+        for query in TYPEAHEAD_QUERIES:
+            state = self.type_query(home_page, query)
+            query_samples = analyze_keystrokes(query, state)
+            samples.extend(query_samples)
+            print(f"✓ Typed '{query}': {len(state['requests'])} suggestion requests "
+                  f"for {len(state['keys'])} keystrokes")
+
+        assert samples, "No keystrokes were recorded on the Where input"
+
+        summary = summarize_by_prefix_length(samples)
+
+        print("Prefix | Keys | Requests | Refreshed | Median ms | p90 ms | Stale")
+        for length, row in summary.items():
+            print(f"{length:>6} | {row['keystrokes']:>4} | {row['requests']:>8} | {row['refreshed']:>9} | "
+                  f"{row['median_ms'] if row['median_ms'] is not None else '-':>9} | "
+                  f"{row['p90_ms'] if row['p90_ms'] is not None else '-':>6} | {row['stale_overwrites']:>5}")
+
+        report_path = sharded_path(TYPEAHEAD_REPORT)
+        os.makedirs('reports', exist_ok=True)
+        with open(report_path, 'w') as f:
+            json.dump({
+                'queries': TYPEAHEAD_QUERIES,
+                'key_delay_s': TYPEAHEAD_KEY_DELAY,
+                'by_prefix_length': summary,
+                'keystrokes': samples,
+            }, f, indent=2)
+        print(f"✓ Typeahead benchmark written to {report_path}")
+
+        stale = sum(row['stale_overwrites'] for row in summary.values())
+        if stale:
+            print(f"⚠ {stale} keystrokes had suggestions overwritten by a stale response")
@@ -0,0 +1,47 @@
+import pytest
+
+from visual import VisualChecker, MAX_DIFF_RATIO
+
+
+# Name, route and element; the baseline name also records browser and window width
+VISUAL_TARGETS = [
+    ('home-nav', '/', '.sh-nav_menu'),
+    ('home-hero', '/', '.sh-hero'),
+    ('home-search', '/', '.sh-search'),
+    ('pets-hero', '/Pets', '.sh-pets-hero'),
+    ('pets-uploader', '/Pets', '.sh-uploader'),
+]
+
+
+@pytest.fixture(scope="module")
+def visual(driver_init):
+    """One checker for the module, writing the comparison report when done"""
+    checker = VisualChecker(driver_init)
+    yield checker
+    report = checker.write_report()
+    print(f"ℹ {report['screenshots']} screenshots compared in {report['compare_ms_total']:.0f} ms "
+          f"(slowest {report['compare_ms_max']:.0f} ms)")
+
+
+class TestVisualRegression:
+    """Element screenshots of the hero, search widget and Pets page against stored baselines"""
+    
+    @pytest.mark.parametrize("name,route,selector", VISUAL_TARGETS, ids=[t[0] for t in VISUAL_TARGETS])
+    def test_matches_baseline(self, driver, visual, name, route, selector):
+        """Screenshot differs from its baseline by at most VISUAL_MAX_DIFF of its pixels"""
+        url = f"{driver.base_url}{route}" if route != '/' else driver.base_url
+        if driver.current_url.rstrip('/') != url.rstrip('/'):
+            driver.get(url)
+        
+        result = visual.check(name, selector)
+        print(f"ℹ {result['name']}: {result['status']} (capture {result['capture_ms']:.0f} ms, "
+              f"compare {result['compare_ms']:.1f} ms, {result['engine']})")
+        
+        if result['status'] == 'size-changed':
+            pytest.fail(f"{result['name']} is {result['size']} instead of {result['expected_size']} "
+                        f"(see {result['diff_image']})")
+        assert result['status'] != 'changed', (
+            f"{result['name']} differs in {result['diff_ratio']:.3%} of pixels "
+            f"(limit {MAX_DIFF_RATIO:.3%}, perceptual hash distance {result['phash_distance']}), "
+            f"see {result['diff_image']}"
+        )
@@ -0,0 +1,120 @@
+"""
+Always-on Chrome performance tracing, kept only for slow or failing tests
+ChromeDriver records trace events into its performance log; each test's events are
+held in a bounded ring buffer and written compressed when the test crosses the
+duration threshold or fails.
+"""
+
+import gzip
+import json
+import os
+import re
+from collections import deque
+from typing import Optional
+
+from devtools import supports_cdp
+
+
+TRACE_CATEGORIES = ','.join([
+    'devtools.timeline',
+    'disabled-by-default-devtools.timeline',
+    'disabled-by-default-devtools.timeline.frame',
+    'blink.user_timing',
+    'loading',
+    'v8.execute',
+    'toplevel',
+])
+
+TRACE_DIR = os.path.join('reports', 'traces')
+
+
+def trace_threshold() -> Optional[float]:
+    """Duration in seconds above which a test's trace is kept; None disables tracing"""
+    value = os.getenv('TRACE_THRESHOLD', '').strip()
+    return float(value) if value else None
+
+
+def trace_buffer_events() -> int:
+    """Most recent trace events kept per test"""
+    return int(os.getenv('TRACE_BUFFER_EVENTS', '200000'))
+
+
+def configure_tracing(chrome_options):
+    """Ask ChromeDriver to trace the whole session into its performance log"""
+    prefs = dict(chrome_options.capabilities.get('goog:loggingPrefs', {}), performance='ALL')
+    chrome_options.set_capability('goog:loggingPrefs', prefs)
+    chrome_options.add_experimental_option('perfLoggingPrefs', {
+        'enableNetwork': False,
+        'enablePage': False,
+        'traceCategories': TRACE_CATEGORIES,
+        'bufferUsageReportingInterval': 1000,
+    })
+
+
+class TraceRecorder:
+    """Drains ChromeDriver's trace events into a ring buffer for the running test"""
+
+    def __init__(self, driver, threshold: float, max_events: int):
+        self.driver = driver
+        self.threshold = threshold
+        self.events = deque(maxlen=max_events)
+        self.dropped = 0
+        self.enabled = supports_cdp(driver)
+        if not self.enabled:
+            print("⚠ Chrome tracing requested but the browser does not support it")
+
+    def drain(self):
+        """Move pending trace events from ChromeDriver into the ring buffer"""
+        if not self.enabled:
+            return
+        try:
+            entries = self.driver.get_log('performance')
+        except Exception as e:
+            print(f"⚠ Could not read trace events: {e}")
+            return
+        for entry in entries:
+            message = json.loads(entry['message'])['message']
+            if message.get('method') != 'Tracing.dataCollected':
+                continue
+            if len(self.events) == self.events.maxlen:
+                self.dropped += 1
+            self.events.append(message['params'])
+
+    def attach(self, driver):
+        """Drain on every driver.get so ChromeDriver never holds more than one page's events"""
+        original_get = driver.get
+
+        def get(url):
+            original_get(url)
+            self.drain()
+
+        driver.get = get
+
+    def start_test(self):
+        """Discard events from before the test"""
+        self.drain()
+        self.events.clear()
+        self.dropped = 0
+
+    def finish_test(self, nodeid: str, duration: float, failed: bool) -> Optional[str]:
+        """Write the buffered trace if the test was slow or failed; returns the file path"""
+        if not self.enabled:
+            return None
+        self.drain()
+        if not failed and duration <= self.threshold:
+            self.events.clear()
+            self.dropped = 0
+            return None
+
+        os.makedirs(TRACE_DIR, exist_ok=True)
+        filename = re.sub(r'[^A-Za-z0-9_.-]+', '_', nodeid).strip('_') + '.json.gz'
+        path = os.path.join(TRACE_DIR, filename)
+        with gzip.open(path, 'wt') as f:
+            json.dump({'traceEvents': list(self.events)}, f)
+
+        reason = 'failed' if failed else f"took {duration:.1f}s (threshold {self.threshold}s)"
+        dropped = f", oldest {self.dropped} events dropped" if self.dropped else ''
+        print(f"ℹ Test {reason}, Chrome trace saved to {path} ({len(self.events)} events{dropped})")
+        self.events.clear()
+        self.dropped = 0
+        return path
@@ -0,0 +1,220 @@
+"""
+Visual regression
+Element-cropped screenshots compared to content-addressed, compressed PNG baselines with a
+manifest pre-check and vectorized pixel diffs
+"""
+
+import hashlib
+import io
+import json
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+from PIL import Image, ImageChops
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from json_state import load_json, sharded_path, updated_json
+
+try:
+    import numpy
+except ImportError:  # falls back to Pillow channel arithmetic, slower on large crops
+    numpy = None
+
+
+BASELINE_DIR = 'visual-baselines'
+OUTPUT_DIR = os.path.join('reports', 'visual')
+REPORT_PATH = os.path.join('reports', 'visual-regression.json')
+
+# A pixel differs when any channel moves more than this; absorbs anti-aliasing noise
+PIXEL_TOLERANCE = int(os.getenv('VISUAL_PIXEL_TOLERANCE', '16'))
+
+# Share of differing pixels a screenshot may have and still match its baseline
+MAX_DIFF_RATIO = float(os.getenv('VISUAL_MAX_DIFF', '0.001'))
+
+# Freezes animations, transitions and the text caret so consecutive captures are stable
+STABILIZE_CSS = """
+var style = document.getElementById('sh-visual-stabilize') || document.createElement('style');
+style.id = 'sh-visual-stabilize';
+style.textContent = '*, *::before, *::after { animation: none !important; transition: none !important; '
+    + 'caret-color: transparent !important; }';
+document.head.appendChild(style);
+"""
+
+# Resolves once web fonts loaded and every image inside the element finished decoding
+ELEMENT_READY_SCRIPT = """
+var el = arguments[0], done = arguments[arguments.length - 1];
+var images = Array.prototype.filter.call(el.getElementsByTagName('img'), function (img) { return !img.complete; });
+Promise.all([document.fonts ? document.fonts.ready : null].concat(images.map(function (img) {
+    return new Promise(function (resolve) { img.onload = img.onerror = resolve; });
+}))).then(function () { requestAnimationFrame(function () { done(true); }); });
+"""
+
+
+def pixel_digest(image: Image.Image) -> str:
+    """Hash of the decoded pixels, independent of PNG encoder settings"""
+    return hashlib.sha256(f"{image.size}".encode() + image.tobytes()).hexdigest()
+
+
+def difference_hash(image: Image.Image, size: int = 16) -> str:
+    """Perceptual dHash: sign of horizontal gradients on a downscaled grayscale copy"""
+    small = image.convert('L').resize((size + 1, size), Image.BILINEAR)
+    pixels = list(small.getdata())
+    bits = 0
+    for row in range(size):
+        for col in range(size):
+            offset = row * (size + 1) + col
+            bits = (bits << 1) | (pixels[offset] > pixels[offset + 1])
+    return f"{bits:0{size * size // 4}x}"
+
+
+def hash_distance(a: str, b: str) -> int:
+    return bin(int(a, 16) ^ int(b, 16)).count('1')
+
+
+def diff_mask(actual: Image.Image, expected: Image.Image, tolerance: int = PIXEL_TOLERANCE) -> Tuple[int, Image.Image]:
+    """Number of pixels differing beyond the tolerance and a mask image marking them"""
+    if numpy is not None:
+        delta = numpy.abs(numpy.asarray(actual, dtype=numpy.int16) - numpy.asarray(expected, dtype=numpy.int16))
+        mask = delta.max(axis=2) > tolerance
+        return int(mask.sum()), Image.fromarray(mask.astype(numpy.uint8) * 255, 'L')
+
+    red, green, blue = ImageChops.difference(actual, expected).split()
+    channel_max = ImageChops.lighter(ImageChops.lighter(red, green), blue)
+    mask = channel_max.point(lambda v: 255 if v > tolerance else 0)
+    return mask.histogram()[255], mask
+
+
+def highlight(actual: Image.Image, mask: Image.Image) -> Image.Image:
+    """Actual screenshot dimmed, with differing pixels painted red"""
+    dimmed = Image.blend(actual, Image.new('RGB', actual.size, 'white'), 0.6)
+    return Image.composite(Image.new('RGB', actual.size, (255, 0, 0)), dimmed, mask)
+
+
+class BaselineStore:
+    """Baseline PNGs stored once per distinct image, addressed by pixel digest, plus a name manifest"""
+
+    def __init__(self, root: str = BASELINE_DIR):
+        self.root = root
+        self.manifest_path = os.path.join(root, 'manifest.json')
+        self.manifest: Dict[str, Dict] = load_json(self.manifest_path)
+
+    def object_path(self, digest: str) -> str:
+        return os.path.join(self.root, 'objects', digest[:2], f"{digest}.png")
+
+    def get(self, name: str) -> Optional[Dict]:
+        return self.manifest.get(name)
+
+    def load(self, entry: Dict) -> Image.Image:
+        with Image.open(self.object_path(entry['digest'])) as image:
+            return image.convert('RGB')
+
+    def put(self, name: str, image: Image.Image, digest: str, phash: str):
+        path = self.object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            image.save(path, format='PNG', optimize=True, compress_level=9)
+        self.manifest[name] = {
+            'digest': digest,
+            'phash': phash,
+            'size': list(image.size),
+            'updated_at': time.time(),
+            'build': os.getenv('BUILD_NUMBER'),
+        }
+        # Only this entry is written; other processes' baselines recorded meanwhile are kept
+        with updated_json(self.manifest_path, indent=2, sort_keys=True) as manifest:
+            manifest[name] = self.manifest[name]
+
+
+class VisualChecker:
+    """Captures element screenshots and compares them with the stored baselines"""
+
+    def __init__(self, driver, store: Optional[BaselineStore] = None, update: Optional[bool] = None):
+        self.driver = driver
+        self.store = store or BaselineStore()
+        self.update = os.getenv('VISUAL_UPDATE', 'false').lower() == 'true' if update is None else update
+        self.results = []
+
+    def baseline_name(self, name: str) -> str:
+        """Baselines are per browser and window width, since both change rendering"""
+        browser = self.driver.capabilities.get('browserName', 'browser')
+        width = self.driver.get_window_size()['width']
+        return f"{name}@{browser}-{width}"
+
+    def capture(self, selector: str, timeout: float = 10) -> Image.Image:
+        element = WebDriverWait(self.driver, timeout).until(
+            EC.visibility_of_element_located((By.CSS_SELECTOR, selector))
+        )
+        self.driver.execute_script(STABILIZE_CSS)
+        self.driver.execute_async_script(ELEMENT_READY_SCRIPT, element)
+        with Image.open(io.BytesIO(element.screenshot_as_png)) as image:
+            return image.convert('RGB')
+
+    def check(self, name: str, selector: str) -> Dict:
+        """Compare one element with its baseline; records a new baseline when none exists or updating"""
+        started = time.perf_counter()
+        actual = self.capture(selector)
+        capture_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        key = self.baseline_name(name)
+        digest, phash = pixel_digest(actual), difference_hash(actual)
+        entry = self.store.get(key)
+        result = {'name': key, 'selector': selector, 'size': list(actual.size),
+                  'engine': 'numpy' if numpy is not None else 'pillow'}
+
+        if entry is None or self.update:
+            self.store.put(key, actual, digest, phash)
+            result['status'] = 'baseline-updated' if entry else 'baseline-created'
+        elif entry['digest'] == digest:
+            # Pre-check on the manifest alone: identical pixels, the baseline is never decoded
+            result['status'] = 'identical'
+        else:
+            expected = self.store.load(entry)
+            result['phash_distance'] = hash_distance(entry['phash'], phash)
+            mask = None
+            if expected.size != actual.size:
+                result.update(status='size-changed', expected_size=entry['size'])
+            else:
+                differing, mask = diff_mask(actual, expected)
+                ratio = differing / float(actual.size[0] * actual.size[1])
+                result.update(differing_pixels=differing, diff_ratio=round(ratio, 6),
+                              status='within-tolerance' if ratio <= MAX_DIFF_RATIO else 'changed')
+            if result['status'] != 'within-tolerance':
+                result['diff_image'] = self.save_artifacts(key, actual, expected, mask)
+
+        result['capture_ms'] = round(capture_ms, 1)
+        result['compare_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        self.results.append(result)
+        return result
+
+    @staticmethod
+    def save_artifacts(key: str, actual: Image.Image, expected: Image.Image, mask: Optional[Image.Image]) -> str:
+        """Write actual, expected and (when sizes match) highlighted diff images; returns the main artifact"""
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        stem = os.path.join(OUTPUT_DIR, key.replace('/', '_').replace('@', '-'))
+        actual.save(f"{stem}-actual.png")
+        expected.save(f"{stem}-expected.png")
+        if mask is None:
+            return f"{stem}-actual.png"
+        highlight(actual, mask).save(f"{stem}-diff.png")
+        return f"{stem}-diff.png"
+
+    def write_report(self, path: str = REPORT_PATH) -> Dict:
+        compare = [r['compare_ms'] for r in self.results]
+        report = {
+            'build': os.getenv('BUILD_NUMBER'),
+            'pixel_tolerance': PIXEL_TOLERANCE,
+            'max_diff_ratio': MAX_DIFF_RATIO,
+            'screenshots': len(self.results),
+            'compare_ms_total': round(sum(compare), 1),
+            'compare_ms_max': max(compare, default=0),
+            'results': self.results,
+        }
+        path = sharded_path(path)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        return report
@@ -0,0 +1,129 @@
+"""
+Warm test daemon with watch mode
+Keeps one interpreter and warm browser sessions alive, watches the test directory and
+reruns the changed or selected tests in-process with pytest.main.
+"""
+
+import glob
+import os
+import sys
+import time
+from typing import Callable, Dict, List
+
+import pytest
+
+from devtools import supports_cdp, emulate_network, set_cpu_throttling
+
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Files whose changes trigger a rerun
+WATCHED_PATTERNS = ('*.py', 'pytest.ini')
+
+# Modules that must survive reloads: this daemon holds the warm browsers
+PERSISTENT_MODULES = {'watch_daemon', 'run_tests'}
+
+
+class WarmBrowserPool:
+    """Browser sessions reused across in-process pytest runs, keyed by launch settings"""
+
+    def __init__(self):
+        self.drivers: Dict[tuple, object] = {}
+
+    def checkout(self, key: tuple, launch: Callable):
+        """Return the warm browser for these settings, launching one on first use or if it died"""
+        driver = self.drivers.get(key)
+        if driver is not None:
+            try:
+                self.reset(driver)
+                print("✓ Reusing warm browser session")
+                return driver
+            except Exception as e:
+                print(f"⚠ Warm browser session is gone ({e}), launching a new one")
+        driver = launch()
+        self.drivers[key] = driver
+        return driver
+
+    def reset(self, driver):
+        """Undo state a previous run left behind"""
+        # Recorders and the element cache from the previous run wrap navigation on the instance
+        for name in ('get', 'back', 'forward', 'refresh', 'element_cache'):
+            driver.__dict__.pop(name, None)
+        driver.get('about:blank')
+        driver.delete_all_cookies()
+        if supports_cdp(driver):
+            emulate_network(driver, 0, -1, -1)
+            set_cpu_throttling(driver, 1)
+
+    def quit_all(self):
+        for driver in self.drivers.values():
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        self.drivers.clear()
+
+    def pytest_configure(self, config):
+        config.warm_browsers = self
+
+
+def snapshot() -> Dict[str, float]:
+    """Modification time of every watched file"""
+    files = {}
+    for pattern in WATCHED_PATTERNS:
+        for path in glob.glob(os.path.join(TEST_DIR, pattern)):
+            files[path] = os.path.getmtime(path)
+    return files
+
+
+def changed_files(before: Dict[str, float], after: Dict[str, float]) -> List[str]:
+    return sorted(path for path in set(before) | set(after) if before.get(path) != after.get(path))
+
+
+def purge_test_modules():
+    """Forget imported test and helper modules so pytest re-imports edited code"""
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, '__file__', None) or ''
+        if os.path.dirname(os.path.abspath(path)) == TEST_DIR and name not in PERSISTENT_MODULES:
+            del sys.modules[name]
+
+
+def rerun_targets(changed: List[str], selection: List[str]) -> List[str]:
+    """Changed test modules, or the selection when a shared helper changed"""
+    tests = [os.path.basename(p) for p in changed if os.path.basename(p).startswith('test_')]
+    if tests and len(tests) == len(changed):
+        return tests
+    return selection
+
+
+def run_daemon(selection: List[str], pytest_args: List[str], poll_interval: float = 0.5) -> int:
+    """Run the selection once, then rerun on every change until interrupted"""
+    pool = WarmBrowserPool()
+    os.chdir(TEST_DIR)
+    targets = selection
+    exit_code = 0
+    try:
+        while True:
+            purge_test_modules()
+            files = snapshot()
+            started = time.time()
+            exit_code = pytest.main(targets + pytest_args, plugins=[pool])
+            print(f"\nℹ Run finished in {time.time() - started:.1f}s with exit code {int(exit_code)}; "
+                  f"watching {TEST_DIR} for changes (Ctrl+C to stop)")
+
+            while True:
+                time.sleep(poll_interval)
+                current = snapshot()
+                changed = changed_files(files, current)
+                if changed:
+                    # Let editors finish writing before re-importing
+                    time.sleep(poll_interval)
+                    changed = changed_files(files, snapshot())
+                    break
+            print(f"ℹ Changed: {', '.join(os.path.basename(p) for p in changed)}")
+            targets = rerun_targets(changed, selection)
+    except KeyboardInterrupt:
+        print("\nℹ Stopping watch daemon")
+    finally:
+        pool.quit_all()
+    return int(exit_code)